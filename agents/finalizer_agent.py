@@ -1,5 +1,6 @@
 from crewai import Agent, Task
 from google_sheets_manager import GoogleSheetsManager
+from llm_manager import llm_manager
 from email_service import EmailService
 from config import FINAL_SELECTION_COUNT, VOICE_PASSING_MARKS
 
@@ -17,7 +18,8 @@ class FinalizerAgent:
             candidates based on multiple criteria. You excel at analyzing both quantitative scores 
             and qualitative content to make fair, informed decisions about candidate selection.""",
             verbose=True,
-            allow_delegation=False
+            allow_delegation=False,
+            llm=llm_manager.get_llm()
         )
     
     def finalize_selection(self):
@@ -107,22 +109,24 @@ class FinalizerAgent:
     def _send_final_selection_emails(self, top_5_students):
         """Send final selection emails to top 5 students"""
         try:
-            email_results = []
+            results = self.email_service.send_bulk_emails(
+                [{'email': student['email'], 'name': student['name']} for student in top_5_students],
+                'final_selection'
+            )
             
-            for student in top_5_students:
-                success = self.email_service.send_final_selection_email(
-                    student['email'],
-                    student['name']
-                )
-                
+            email_results = []
+            for student, result in zip(top_5_students, results):
                 email_results.append({
                     'name': student['name'],
                     'email': student['email'],
                     'total_score': student['total_score'],
-                    'email_sent': success
+                    'email_sent': result['success'],
+                    # 'queued' or 'sending' until the outbox has delivered it
+                    'email_status': result['status']
                 })
             
-            print(f"Sent final selection emails to {len(email_results)} students")
+            sent = sum(1 for result in email_results if result['email_sent'])
+            print(f"Final selection emails: {sent} sent, {len(email_results) - sent} queued or failed")
             return email_results
             
         except Exception as e:
@@ -1,5 +1,6 @@
 from crewai import Agent, Task
 from google_sheets_manager import GoogleSheetsManager
+from llm_manager import llm_manager
 from config import QUIZ_PASSING_MARKS
 import json
 
@@ -16,7 +17,8 @@ class QuizCheckerAgent:
             student responses and providing fair, accurate scoring. You have a keen eye for detail 
             and ensure that all student responses are evaluated consistently and fairly.""",
             verbose=True,
-            allow_delegation=False
+            allow_delegation=False,
+            llm=llm_manager.get_llm()
         )
     
     def check_quiz_responses(self, student_responses):
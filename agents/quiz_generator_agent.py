@@ -1,12 +1,95 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
 from crewai import Agent, Task
-from config import QUIZ_QUESTIONS_COUNT
-from google_sheets_manager import GoogleSheetsManager
+from config import (
+    QUIZ_QUESTIONS_COUNT,
+    QUIZ_STREAM_FLUSH_SIZE,
+    LLM_STRUCTURED_OUTPUT,
+    LLM_MAX_REPAIR_ATTEMPTS,
+    QUESTION_BANK_ENABLED,
+    QUESTION_BANK_TOPUP_SIZE,
+    QUIZ_GENERATION_MODE,
+    QUIZ_SHARD_WORKERS,
+    QUIZ_TOPUP_MAX_ATTEMPTS,
+    QUIZ_TOPUP_MAX_EXCLUSIONS,
+    NEAR_DUPLICATE_THRESHOLD
+)
+from google_sheets_manager import GoogleSheetsManager, BufferedSheetWriter
 from llm_manager import llm_manager
+from llm_metrics import metrics
+from model_router import model_router
+from near_duplicate_index import MinHashLSHIndex, question_index_text
+from question_bank import QuestionBank, question_fingerprint
+from structured_output import (
+    QUIZ_ITEM_EXAMPLE,
+    QUIZ_ITEM_SCHEMA,
+    QUIZ_RESPONSE_SCHEMA,
+    parse_json_object,
+    validate_quiz_item,
+    validate_with_repairs
+)
+
+class QuizStreamParser:
+    """Incrementally parse streamed quiz text into completed questions"""
+    
+    def __init__(self):
+        self._pending = ''
+        self._current_question = {}
+    
+    def feed(self, chunk):
+        """Consume a chunk of text and return the questions it completed"""
+        self._pending += chunk
+        completed = []
+        while '\n' in self._pending:
+            line, self._pending = self._pending.split('\n', 1)
+            question = self._consume_line(line)
+            if question:
+                completed.append(question)
+        return completed
+    
+    def close(self):
+        """Consume the trailing partial line and return any final question"""
+        completed = []
+        if self._pending:
+            question = self._consume_line(self._pending)
+            self._pending = ''
+            if question:
+                completed.append(question)
+        return completed
+    
+    def _consume_line(self, line):
+        """Apply one line to the current question, returning it once complete"""
+        line = line.strip()
+        current_question = self._current_question
+        # Handle different question formats
+        if line.startswith('Question:') or line.startswith('Question ') or (line.startswith('Question') and ':' in line):
+            # Extract question text after "Question:" or "Question "
+            question_text = line.split(':', 1)[1].strip() if ':' in line else line.replace('Question', '').strip()
+            self._current_question = {'question': question_text}
+        elif not current_question:
+            return None
+        elif line.startswith('A)'):
+            current_question['option1'] = line.replace('A)', '').strip()
+        elif line.startswith('B)'):
+            current_question['option2'] = line.replace('B)', '').strip()
+        elif line.startswith('C)'):
+            current_question['option3'] = line.replace('C)', '').strip()
+        elif line.startswith('D)'):
+            current_question['option4'] = line.replace('D)', '').strip()
+        elif line.startswith('Correct Answer:') or line.startswith('Correct Answer '):
+            # The answer line closes a question block, so emit it right away
+            current_question['correct_answer'] = line.split(':', 1)[1].strip() if ':' in line else line.replace('Correct Answer', '').strip()
+            self._current_question = {}
+            return current_question
+        return None
 
 class QuizGeneratorAgent:
     def __init__(self):
-        self.llm = llm_manager.get_llm()
         self.sheets_manager = GoogleSheetsManager()
+        self.question_bank = QuestionBank()
+        self.duplicate_index = None
+        self.model = model_router.model_for('quiz_generation')
     
     def create_agent(self):
         """Create the Quiz Generator Agent"""
@@ -19,15 +102,23 @@ class QuizGeneratorAgent:
             that are fair, clear, and appropriately challenging for students at various levels.""",
             verbose=True,
             allow_delegation=False,
-            llm=self.llm
+            llm=llm_manager.get_llm()
         )
     
-    def generate_quiz_questions(self, topics):
-        """Generate quiz questions based on given topics"""
-        try:
-            # Create prompt for quiz generation
-            prompt = f"""
-            Generate {QUIZ_QUESTIONS_COUNT} multiple-choice quiz questions on the following topics: {', '.join(topics)}
+    def _build_exclusions(self, exclude):
+        """Prompt section listing accepted questions the model must not repeat"""
+        if not exclude:
+            return ''
+        listed = '\n'.join(f"            - {text}" for text in exclude[-QUIZ_TOPUP_MAX_EXCLUSIONS:])
+        return f"""
+            These questions are already in the quiz. Do not repeat or paraphrase any of them:
+{listed}
+            """
+    
+    def _build_quiz_prompt(self, topics, count=QUIZ_QUESTIONS_COUNT, exclude=None):
+        """Build the quiz generation prompt"""
+        return f"""
+            Generate {count} multiple-choice quiz questions on the following topics: {', '.join(topics)}
             
             Each question should have:
             1. A clear, well-formulated question
@@ -48,14 +139,39 @@ class QuizGeneratorAgent:
             - Cover different aspects of AI and Data Science
             - Are clear and unambiguous
             - Have plausible distractors
-            """
+            {self._build_exclusions(exclude)}"""
+    
+    def _build_quiz_json_prompt(self, topics, count, exclude=None):
+        """Build the quiz generation prompt for the structured JSON response mode"""
+        return f"""
+            Generate {count} multiple-choice quiz questions on the following topics: {', '.join(topics)}
             
-            # Use centralized LLM provider
-            from llm_provider import MODEL
+            Each question should have:
+            1. A clear, well-formulated question
+            2. Four multiple-choice options (A, B, C, D)
+            3. One correct answer
+            4. Questions should test both theoretical knowledge and practical understanding
             
-            response = MODEL.generate_content(prompt)
-            print(f"Raw response from OpenAI: {response.text[:200]}...")
-            questions_data = self._parse_quiz_response(response.text)
+            Make sure questions are:
+            - Appropriate for intermediate to advanced level
+            - Cover different aspects of AI and Data Science
+            - Are clear and unambiguous
+            - Have plausible distractors
+            
+            Label each question's difficulty as easy, medium or hard.
+            Return only a JSON object of the form {{"questions": [...]}} with exactly {count} items.
+            Each item must match this format: {QUIZ_ITEM_EXAMPLE}
+            {self._build_exclusions(exclude)}"""
+    
+    def generate_quiz_questions(self, topics):
+        """Generate quiz questions based on given topics"""
+        try:
+            tag = 'QuizGeneratorAgent.generate_quiz_questions'
+            if QUESTION_BANK_ENABLED:
+                questions_data = self._assemble_from_bank(topics, QUIZ_QUESTIONS_COUNT, tag)
+            else:
+                questions_data = self._reject_near_duplicates(self._generate_questions(topics, QUIZ_QUESTIONS_COUNT, tag))
+                questions_data = self._fill_to_count(questions_data, topics, QUIZ_QUESTIONS_COUNT, tag)
             
             # Store questions in Google Sheets
             self._store_questions_in_sheets(questions_data)
@@ -66,35 +182,356 @@ class QuizGeneratorAgent:
             print(f"Error generating quiz questions: {e}")
             return []
     
+    def _generate_questions(self, topics, count, tag):
+        """Generate new questions, sharding across topics when the sharded mode is on"""
+        if QUIZ_GENERATION_MODE == 'sharded' and len(topics) > 1:
+            return self._generate_sharded(self._split_count(topics, count), tag)
+        return self._generate_single(topics, count, tag)
+    
+    def _fill_to_count(self, questions, topics, count, tag):
+        """Request only the missing questions when a quiz comes back short, excluding the accepted ones"""
+        questions = list(questions[:count])
+        for attempt in range(QUIZ_TOPUP_MAX_ATTEMPTS):
+            missing = count - len(questions)
+            if missing <= 0:
+                break
+            
+            print(f"🔁 Quiz is {missing} questions short, requesting top-up (attempt {attempt + 1}/{QUIZ_TOPUP_MAX_ATTEMPTS})")
+            try:
+                new_questions = self._generate_single(
+                    topics, missing, f"{tag}:topup", exclude=[q.get('question', '') for q in questions]
+                )
+            except Exception as e:
+                print(f"Error topping up quiz questions: {e}")
+                continue
+            questions.extend(self._reject_near_duplicates(new_questions)[:missing])
+        
+        if len(questions) < count:
+            print(f"⚠️ Quiz still has {len(questions)} of {count} questions after {QUIZ_TOPUP_MAX_ATTEMPTS} top-ups")
+        return questions
+    
+    def _generate_single(self, topics, count, tag, exclude=None):
+        """Generate new questions with a single LLM call"""
+        if LLM_STRUCTURED_OUTPUT:
+            return self._request_questions(topics, count, tag, exclude)
+        
+        # Create prompt for quiz generation
+        prompt = self._build_quiz_prompt(topics, count, exclude)
+        
+        response = self.model.generate_content(prompt, tag=tag)
+        print(f"Raw response from OpenAI: {response.text[:200]}...")
+        return self._parse_quiz_response(response.text)
+    
+    def _generate_shards(self, shards, tag):
+        """Generate each (topic, count) shard concurrently and return the results in shard order"""
+        shards = [(topic, count) for topic, count in shards if count > 0]
+        if not shards:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(QUIZ_SHARD_WORKERS, len(shards))) as executor:
+            # Each shard runs in a copy of this context so its LLM calls count towards the current run
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._generate_single, [topic], count, tag)
+                for topic, count in shards
+            ]
+            
+            results = []
+            for (topic, _), future in zip(shards, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"Error generating questions for '{topic}': {e}")
+                    results.append([])
+        return results
+    
+    def _generate_sharded(self, shards, tag):
+        """Generate shards in parallel and merge them in a deterministic, de-duplicated order"""
+        started_at = time.time()
+        results = self._generate_shards(shards, tag)
+        questions = self._dedupe_questions(self._interleave(results))
+        print(f"Generated {len(questions)} questions from {len(results)} shards in {time.time() - started_at:.1f}s")
+        return questions
+    
+    def _interleave(self, groups):
+        """Merge per-topic lists round-robin so the quiz does not cluster questions by topic"""
+        merged = []
+        for round_index in range(max((len(group) for group in groups), default=0)):
+            merged.extend(group[round_index] for group in groups if round_index < len(group))
+        return merged
+    
+    def _dedupe_questions(self, questions):
+        """Drop repeated questions, keeping the first occurrence"""
+        seen = set()
+        unique = []
+        for question in questions:
+            fingerprint = question_fingerprint(question)
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                unique.append(question)
+        
+        if len(unique) < len(questions):
+            print(f"Removed {len(questions) - len(unique)} duplicate questions across shards")
+        return unique
+    
+    def _get_duplicate_index(self):
+        """Build the near-duplicate index over banked and currently stored questions on first use"""
+        if self.duplicate_index is None:
+            index = MinHashLSHIndex(threshold=NEAR_DUPLICATE_THRESHOLD)
+            try:
+                existing = self.question_bank.get_questions() + self.sheets_manager.get_quiz_questions()
+            except Exception as e:
+                print(f"Error loading existing questions for duplicate detection: {e}")
+                existing = []
+            for question in existing:
+                index.add(question_fingerprint(question), question_index_text(question))
+            self.duplicate_index = index
+        return self.duplicate_index
+    
+    def _is_near_duplicate(self, question):
+        """Check a question against every stored question, indexing it when it is new"""
+        index = self._get_duplicate_index()
+        fingerprint = question_fingerprint(question)
+        signature = index.signature(question_index_text(question))
+        
+        matches = index.query(signature=signature)
+        if matches:
+            print(f"♻️ Rejected near-duplicate question (similarity {matches[0][1]:.2f}): {question.get('question', '')[:60]}...")
+            return True
+        
+        index.add(fingerprint, signature=signature)
+        return False
+    
+    def _reject_near_duplicates(self, questions):
+        """Drop questions that paraphrase a stored question or an earlier one in the batch"""
+        return [question for question in questions if not self._is_near_duplicate(question)]
+    
+    def _split_count(self, topics, count):
+        """Split a question count across topics as evenly as possible, earlier topics taking the remainder"""
+        base, remainder = divmod(count, len(topics)) if topics else (0, 0)
+        return [(topic, base + (1 if i < remainder else 0)) for i, topic in enumerate(topics)]
+    
+    def _assemble_from_bank(self, topics, count, tag):
+        """Assemble a quiz from the question bank, generating only for topics that run short"""
+        quotas = [(topic, quota) for topic, quota in self._split_count(topics, count) if quota > 0]
+        
+        top_ups = []
+        for topic, quota in quotas:
+            unused = self.question_bank.unused_count(topic)
+            if unused >= quota:
+                metrics.record_cache_hit(tag)
+                print(f"📚 Using {quota} banked questions for '{topic}'")
+            else:
+                # Top up in batches so the next few quizzes on this topic stay local
+                top_ups.append((topic, max(QUESTION_BANK_TOPUP_SIZE, quota - unused)))
+        
+        if QUIZ_GENERATION_MODE == 'sharded':
+            generated = self._generate_shards(top_ups, tag)
+        else:
+            generated = []
+            for topic, needed in top_ups:
+                # One topic failing must not discard the banked questions of the others
+                try:
+                    generated.append(self._generate_single([topic], needed, tag))
+                except Exception as e:
+                    print(f"Error generating questions for '{topic}': {e}")
+                    generated.append([])
+        
+        for (topic, _), new_questions in zip(top_ups, generated):
+            added = self.question_bank.add_questions(topic, self._reject_near_duplicates(new_questions))
+            print(f"📚 Topped up '{topic}' with {added} new questions")
+        
+        for topic, quota in quotas:
+            self._fill_bank_topic(topic, quota, tag)
+        
+        questions = self._interleave([self.question_bank.take_questions(topic, quota) for topic, quota in quotas])
+        
+        print(f"Assembled {len(questions)} questions from the question bank")
+        return questions
+    
+    def _fill_bank_topic(self, topic, quota, tag):
+        """Generate only the questions a topic still lacks for its quota, excluding the banked ones"""
+        for attempt in range(QUIZ_TOPUP_MAX_ATTEMPTS):
+            missing = quota - self.question_bank.unused_count(topic)
+            if missing <= 0:
+                return
+            
+            print(f"🔁 '{topic}' is {missing} questions short, requesting top-up (attempt {attempt + 1}/{QUIZ_TOPUP_MAX_ATTEMPTS})")
+            try:
+                exclude = [q['question'] for q in self.question_bank.get_questions(topic)]
+                new_questions = self._generate_single([topic], missing, f"{tag}:topup", exclude=exclude)
+            except Exception as e:
+                print(f"Error topping up '{topic}': {e}")
+                continue
+            self.question_bank.add_questions(topic, self._reject_near_duplicates(new_questions))
+    
+    def _request_questions(self, topics, count, tag, exclude=None):
+        """Request questions as JSON and validate them, re-asking only for invalid items"""
+        response = self.model.generate_json(
+            self._build_quiz_json_prompt(topics, count, exclude),
+            'quiz_questions',
+            QUIZ_RESPONSE_SCHEMA,
+            tag=tag
+        )
+        payload = parse_json_object(response.text) or {}
+        raw_items = payload.get('questions') if isinstance(payload.get('questions'), list) else []
+        
+        validated = validate_with_repairs(
+            self.model,
+            raw_items[:count],
+            validate_quiz_item,
+            'quiz question',
+            QUIZ_ITEM_EXAMPLE,
+            QUIZ_ITEM_SCHEMA,
+            LLM_MAX_REPAIR_ATTEMPTS,
+            context=f"You are writing multiple-choice quiz questions on: {', '.join(topics)}",
+            tag=tag
+        )
+        questions = [question for question in validated if question]
+        
+        print(f"Received {len(questions)} valid questions out of {count} requested")
+        return questions
+    
+    def generate_quiz_questions_stream(self, topics, on_question=None):
+        """Generate quiz questions while streaming, storing and reporting each one as it completes"""
+        questions_data = []
+        writer = BufferedSheetWriter(
+            self.sheets_manager,
+            'Quiz Questions',
+            start_row=2,  # Start from row 2 (after headers)
+            flush_size=QUIZ_STREAM_FLUSH_SIZE
+        )
+        started_at = time.time()
+        tag = 'QuizGeneratorAgent.generate_quiz_questions_stream'
+        
+        def accept(question, check_duplicate=True):
+            return self._accept_streamed_question(question, questions_data, writer, on_question, started_at, check_duplicate)
+        
+        try:
+            if QUESTION_BANK_ENABLED:
+                self._stream_from_bank(topics, QUIZ_QUESTIONS_COUNT, tag, accept)
+            else:
+                self._stream_questions(topics, QUIZ_QUESTIONS_COUNT, tag, accept)
+            
+        except Exception as e:
+            print(f"Error streaming quiz questions: {e}")
+        
+        finally:
+            try:
+                writer.close()
+                print(f"Successfully stored {writer.rows_written} streamed questions in Google Sheets")
+            except Exception as e:
+                print(f"Error storing streamed questions in sheets: {e}")
+        
+        print(f"Streamed {len(questions_data)} questions in {time.time() - started_at:.1f}s")
+        return questions_data
+    
+    def _stream_from_bank(self, topics, count, tag, accept):
+        """Serve banked questions first, then stream only each topic's shortfall and add it to the bank"""
+        quotas = [(topic, quota) for topic, quota in self._split_count(topics, count) if quota > 0]
+        
+        shortfalls = []
+        for topic, quota in quotas:
+            banked = self.question_bank.take_questions(topic, min(quota, self.question_bank.unused_count(topic)))
+            if len(banked) == quota:
+                metrics.record_cache_hit(tag)
+            if banked:
+                print(f"📚 Using {len(banked)} banked questions for '{topic}'")
+            for question in banked:
+                # Banked questions are already in the duplicate index
+                accept(question, check_duplicate=False)
+            if len(banked) < quota:
+                shortfalls.append((topic, quota - len(banked)))
+        
+        for topic, missing in shortfalls:
+            print(f"📚 Streaming {missing} new questions for '{topic}'")
+            self._stream_questions([topic], missing, tag, accept, bank_topic=topic)
+    
+    def _stream_questions(self, topics, count, tag, accept, bank_topic=None):
+        """Stream new questions, topping up a short stream with non-streamed requests for just the missing ones"""
+        accepted = []
+        invalid = []
+        parser = QuizStreamParser()
+        for chunk in self.model.generate_content_stream(self._build_quiz_prompt(topics, count), tag=tag):
+            self._accept_new_questions(parser.feed(chunk), accepted, count, accept, bank_topic, invalid)
+        self._accept_new_questions(parser.close(), accepted, count, accept, bank_topic, invalid)
+        
+        if invalid and LLM_STRUCTURED_OUTPUT and len(accepted) < count:
+            # Malformed streamed questions get the same structured re-ask as the non-streamed path
+            repaired = validate_with_repairs(
+                self.model,
+                invalid[:count - len(accepted)],
+                validate_quiz_item,
+                'quiz question',
+                QUIZ_ITEM_EXAMPLE,
+                QUIZ_ITEM_SCHEMA,
+                LLM_MAX_REPAIR_ATTEMPTS,
+                context=f"You are writing multiple-choice quiz questions on: {', '.join(topics)}",
+                tag=tag
+            )
+            self._accept_new_questions([q for q in repaired if q], accepted, count, accept, bank_topic)
+        
+        for _ in range(QUIZ_TOPUP_MAX_ATTEMPTS):
+            missing = count - len(accepted)
+            if missing <= 0:
+                break
+            print(f"🔁 Streamed quiz is {missing} questions short, requesting top-up")
+            exclude = [q.get('question', '') for q in accepted]
+            try:
+                top_up = self._generate_single(topics, missing, f"{tag}:topup", exclude)
+            except Exception as e:
+                print(f"Error topping up streamed questions: {e}")
+                continue
+            self._accept_new_questions(top_up, accepted, count, accept, bank_topic)
+        
+        if len(accepted) < count:
+            print(f"⚠️ Streamed {len(accepted)} of {count} questions after {QUIZ_TOPUP_MAX_ATTEMPTS} top-ups")
+        return accepted
+    
+    def _accept_new_questions(self, questions, accepted, count, accept, bank_topic=None, invalid=None):
+        """Validate newly generated questions and pass them to the caller until the count is reached,
+        banking the accepted ones and collecting invalid ones in `invalid` for a re-ask"""
+        for question in questions:
+            if len(accepted) >= count:
+                return
+            item = self._question_to_item(question)
+            question, errors = validate_quiz_item(item)
+            if errors:
+                print(f"⚠️ Dropped invalid quiz question ({'; '.join(errors)}): {str(item.get('question', ''))[:60]}")
+                if invalid is not None:
+                    invalid.append(item)
+                continue
+            if not accept(question):
+                continue
+            accepted.append(question)
+            if bank_topic:
+                try:
+                    # Already in this quiz, so it is banked as used
+                    self.question_bank.add_questions(bank_topic, [question], used=True)
+                except Exception as e:
+                    print(f"Error adding streamed question to the question bank: {e}")
+    
+    def _accept_streamed_question(self, question, questions_data, writer, on_question, started_at, check_duplicate=True):
+        """Record a completed streamed question, queue it for storage and notify the caller; returns False for a duplicate"""
+        if check_duplicate and self._is_near_duplicate(question):
+            return False
+        
+        questions_data.append(question)
+        if len(questions_data) == 1:
+            print(f"First question ready after {time.time() - started_at:.1f}s")
+        
+        try:
+            writer.add(self._question_to_row(question))
+        except Exception as e:
+            print(f"Error storing streamed question in sheets: {e}")
+        
+        if on_question:
+            on_question(len(questions_data), question)
+        return True
+    
     def _parse_quiz_response(self, response_text):
         """Parse the generated quiz response into structured data"""
-        questions = []
-        lines = response_text.split('\n')
-        
-        current_question = {}
-        for line in lines:
-            line = line.strip()
-            # Handle different question formats
-            if line.startswith('Question:') or line.startswith('Question ') or (line.startswith('Question') and ':' in line):
-                if current_question and 'correct_answer' in current_question:
-                    questions.append(current_question)
-                # Extract question text after "Question:" or "Question "
-                question_text = line.split(':', 1)[1].strip() if ':' in line else line.replace('Question', '').strip()
-                current_question = {'question': question_text}
-            elif line.startswith('A)'):
-                current_question['option1'] = line.replace('A)', '').strip()
-            elif line.startswith('B)'):
-                current_question['option2'] = line.replace('B)', '').strip()
-            elif line.startswith('C)'):
-                current_question['option3'] = line.replace('C)', '').strip()
-            elif line.startswith('D)'):
-                current_question['option4'] = line.replace('D)', '').strip()
-            elif line.startswith('Correct Answer:') or line.startswith('Correct Answer '):
-                current_question['correct_answer'] = line.split(':', 1)[1].strip() if ':' in line else line.replace('Correct Answer', '').strip()
-        
-        # Add the last question
-        if current_question and 'correct_answer' in current_question:
-            questions.append(current_question)
+        parser = QuizStreamParser()
+        questions = parser.feed(response_text) + parser.close()
         
         # Debug: Print what we found
         print(f"Parsed {len(questions)} questions from response")
@@ -103,21 +540,31 @@ class QuizGeneratorAgent:
         
         return questions
     
+    def _question_to_item(self, question):
+        """Convert a question dict in sheet format into the quiz item format the validator checks"""
+        return {
+            'question': question.get('question', ''),
+            'options': {letter: question.get(f'option{i}', '') for i, letter in enumerate('ABCD', 1)},
+            'correct_answer': question.get('correct_answer', ''),
+            'difficulty': question.get('difficulty', '')
+        }
+    
+    def _question_to_row(self, question):
+        """Convert a question dict into a Quiz Questions sheet row"""
+        return [
+            question.get('question', ''),
+            question.get('option1', ''),
+            question.get('option2', ''),
+            question.get('option3', ''),
+            question.get('option4', ''),
+            question.get('correct_answer', '')
+        ]
+    
     def _store_questions_in_sheets(self, questions_data):
         """Store generated questions in Google Sheets"""
         try:
             # Prepare data for Google Sheets
-            sheet_data = []
-            for question in questions_data:
-                row = [
-                    question.get('question', ''),
-                    question.get('option1', ''),
-                    question.get('option2', ''),
-                    question.get('option3', ''),
-                    question.get('option4', ''),
-                    question.get('correct_answer', '')
-                ]
-                sheet_data.append(row)
+            sheet_data = [self._question_to_row(question) for question in questions_data]
             
             # Write to Google Sheets
             self.sheets_manager.write_data(
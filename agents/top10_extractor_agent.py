@@ -1,5 +1,6 @@
 from crewai import Agent, Task
 from google_sheets_manager import GoogleSheetsManager
+from llm_manager import llm_manager
 from email_service import EmailService
 from config import TOP_STUDENTS_COUNT
 
@@ -18,7 +19,8 @@ class Top10ExtractorAgent:
             performance data and ensuring that the best candidates receive appropriate recognition 
             and next steps in the selection process.""",
             verbose=True,
-            allow_delegation=False
+            allow_delegation=False,
+            llm=llm_manager.get_llm()
         )
     
     def extract_top_students(self):
@@ -65,21 +67,21 @@ class Top10ExtractorAgent:
     def _send_video_invitations(self, top_students):
         """Send voice submission invitations to top students"""
         try:
-            email_results = []
+            print(f"Debug: Sending voice invitations to {len(top_students)} students")
+            results = self.email_service.send_bulk_emails(
+                [{'email': student['email'], 'name': student['name']} for student in top_students],
+                'voice_submission'
+            )
             
-            for student in top_students:
-                print(f"Debug: Sending voice invitation to {student['name']} ({student['email']})")
-                success = self.email_service.send_voice_submission_invitation(
-                    student['email'],
-                    student['name']
-                )
-                print(f"Debug: Email sent to {student['name']}: {success}")
-                
+            email_results = []
+            for student, result in zip(top_students, results):
                 email_results.append({
                     'name': student['name'],
                     'email': student['email'],
                     'marks': student['marks'],
-                    'email_sent': success
+                    'email_sent': result['success'],
+                    # 'queued' or 'sending' until the outbox has delivered it
+                    'email_status': result['status']
                 })
             
             # Store results in Google Sheets
@@ -1,11 +1,77 @@
+import threading
 from crewai import Agent, Task
+from config import (
+    AUDIO_FETCH_WORKERS,
+    TRANSCRIPTION_ENGINE,
+    VOICE_PIPELINE_ENABLED,
+    VOICE_PIPELINE_PREPROCESS_WORKERS,
+    VOICE_PIPELINE_QUEUE_SIZE,
+    VOICE_PIPELINE_SCORE_WORKERS
+)
 from google_sheets_manager import GoogleSheetsManager
+from llm_gateway import gateway
+from llm_manager import llm_manager
+from model_router import model_router
+from voice_pipeline import PipelineStage, StagedPipeline
 from voice_processor import VoiceProcessor
 
+# The scoring breakers are process-wide, so the re-score queue, its timer and the close listener are too:
+# they are set up once per process and the most recently created agent does the re-scoring
+_rescore_lock = threading.Lock()
+_rescore_state = {'agent': None, 'pending': [], 'timer': None, 'registered': False}
+# The re-score thread and the pipeline's persist stage both write to the Voice Submissions sheet
+_sheets_lock = threading.Lock()
+
+def _on_scoring_circuit_closed(model_id):
+    """Close listener registered once per process; hands over to the active agent"""
+    agent = _rescore_state['agent']
+    if agent is not None:
+        agent._on_circuit_closed(model_id)
+
+def _run_scheduled_rescore():
+    """Timer callback: re-score whatever is still pending with the active agent"""
+    with _rescore_lock:
+        _rescore_state['timer'] = None
+        agent = _rescore_state['agent']
+    if agent is None:
+        return
+    try:
+        agent.rescore_pending()
+    except Exception as e:
+        print(f"Error re-scoring provisional voice results: {e}")
+
 class VoiceCheckerAgent:
     def __init__(self):
         self.sheets_manager = GoogleSheetsManager()
         self.voice_processor = VoiceProcessor()
+        self.pipeline = None
+        
+        # Provisional scores are re-scored as soon as a scoring model's circuit closes again
+        self._scoring_breakers = [
+            gateway.get_breaker(model_router.model_for(task).model_id) for task in ('voice_scoring', 'voice_escalation')
+        ]
+        with _rescore_lock:
+            _rescore_state['agent'] = self
+            first_agent = not _rescore_state['registered']
+            _rescore_state['registered'] = True
+        if not first_agent:
+            return
+        for breaker in self._scoring_breakers:
+            breaker.add_close_listener(_on_scoring_circuit_closed)
+        
+        # Provisional scores left over from an earlier run
+        pending = self._load_pending_rescores()
+        if pending:
+            with _rescore_lock:
+                _rescore_state['pending'].extend(pending)
+            print(f"🔁 {len(pending)} provisional voice scores from an earlier run are waiting for a re-score")
+            self._schedule_rescore()
+    
+    @property
+    def pending_rescores(self):
+        """Provisional results waiting for a re-score, shared by every agent in the process"""
+        with _rescore_lock:
+            return list(_rescore_state['pending'])
     
     def create_agent(self):
         """Create the Voice Checker Agent"""
@@ -16,14 +82,27 @@ class VoiceCheckerAgent:
             and transcription. You have advanced skills in processing various audio formats and 
             generating accurate, detailed transcripts that capture the essence of spoken content.""",
             verbose=True,
-            allow_delegation=False
+            allow_delegation=False,
+            llm=llm_manager.get_llm()
         )
     
     def process_voice_submissions(self, voice_submissions):
         """Process voice submissions and generate transcripts"""
         try:
+            if VOICE_PIPELINE_ENABLED:
+                return self._process_with_pipeline(voice_submissions)
+            
             results = []
             
+            # Transcribe the whole cohort up front so recordings are spread across the transcription workers
+            transcripts = self.voice_processor.get_audio_transcripts([
+                submission.get('voice_link', '') or submission.get('video_link', '')
+                for submission in voice_submissions
+                if submission.get('student_name') and (submission.get('voice_link') or submission.get('video_link'))
+            ])
+            links = list(transcripts)
+            features = dict(zip(links, self.voice_processor.compute_features(links, [transcripts[link] for link in links])))
+            
             for submission in voice_submissions:
                 student_name = submission.get('student_name', '')
                 voice_link = submission.get('voice_link', '') or submission.get('video_link', '')  # Support both keys
@@ -35,13 +114,12 @@ class VoiceCheckerAgent:
                 print(f"Processing voice submission for {student_name}")
                 
                 # Process the voice submission
-                result = self.voice_processor.process_audio_submission(student_name, voice_link)
+                result = self.voice_processor.process_audio_submission(
+                    student_name, voice_link, transcripts.get(voice_link), features.get(voice_link)
+                )
                 
                 if result:
-                    # Store in Google Sheets
-                    self._store_voice_result(result)
-                    results.append(result)
-                    print(f"✅ Processed voice for {student_name}: Score {result['score']}/10")
+                    results.append(self._persist_result(result))
                 else:
                     print(f"❌ Failed to process voice for {student_name}")
             
@@ -58,6 +136,52 @@ class VoiceCheckerAgent:
                 'message': f'Voice processing failed: {str(e)}'
             }
     
+    def _process_with_pipeline(self, voice_submissions):
+        """Run submissions through fetch, preprocess, transcribe, features, score and persist stages at once,
+        so downloads, transcription workers and LLM calls all stay busy"""
+        jobs = []
+        for submission in voice_submissions:
+            student_name = submission.get('student_name', '')
+            voice_link = submission.get('voice_link', '') or submission.get('video_link', '')  # Support both keys
+            if not student_name or not voice_link:
+                print(f"Missing data for submission: {submission}")
+                continue
+            jobs.append({'student_name': student_name, 'audio_link': voice_link})
+        
+        processor = self.voice_processor
+        transcribe_workers = processor.get_transcription_pool().workers if TRANSCRIPTION_ENGINE != 'simulated' else 1
+        self.pipeline = StagedPipeline([
+            PipelineStage('fetch', processor.fetch_stage, AUDIO_FETCH_WORKERS),
+            PipelineStage('preprocess', processor.preprocess_stage, VOICE_PIPELINE_PREPROCESS_WORKERS),
+            # Threads only wait on the worker processes, so one per process keeps every core busy
+            PipelineStage('transcribe', processor.transcribe_stage, transcribe_workers),
+            # Features are vectorized, so one worker takes everything queued as a batch
+            PipelineStage('features', processor.features_stage, 1, batch_size=VOICE_PIPELINE_QUEUE_SIZE),
+            PipelineStage('score', processor.score_stage, VOICE_PIPELINE_SCORE_WORKERS),
+            # A single writer keeps sheet appends in order
+            PipelineStage('persist', self._persist_result, 1)
+        ])
+        
+        print(f"🎵 Pipelining {len(jobs)} voice submissions")
+        results = self.pipeline.run(jobs)
+        self.pipeline.print_stats()
+        
+        return {
+            'status': 'completed',
+            'processed_voices': results,
+            'message': f'Successfully processed {len(results)} voice submissions',
+            'pipeline_stats': self.pipeline.stats()
+        }
+    
+    def _persist_result(self, result):
+        """Store a scored submission and queue it for re-scoring if its score is provisional"""
+        with _sheets_lock:
+            self._store_voice_result(result)
+        if result.get('needs_rescore'):
+            self._queue_rescore(result)
+        print(f"✅ Processed voice for {result['student_name']}: Score {result['score']}/10")
+        return result
+    
     def _store_voice_result(self, result):
         """Store voice processing result in Google Sheets"""
         try:
@@ -78,6 +202,117 @@ class VoiceCheckerAgent:
         except Exception as e:
             print(f"❌ Error storing voice result: {e}")
     
+    def _load_pending_rescores(self):
+        """Pending re-scores stored in the analysis memo"""
+        memo = self.voice_processor.analysis_memo
+        if memo is None:
+            return []
+        try:
+            return memo.get_pending_rescores()
+        except Exception as e:
+            print(f"Error loading pending re-scores: {e}")
+            return []
+    
+    def _queue_rescore(self, result):
+        """Queue a provisional result for re-scoring, persisting it so a restart does not lose it"""
+        with _rescore_lock:
+            _rescore_state['pending'].append(result)
+        memo = self.voice_processor.analysis_memo
+        if memo is not None:
+            try:
+                memo.add_pending_rescore(result['student_name'], result['audio_link'], result['transcript'])
+            except Exception as e:
+                print(f"Error storing pending re-score: {e}")
+        self._schedule_rescore()
+    
+    def _schedule_rescore(self):
+        """Try the re-scores again once an open circuit would let a probe through, even if no other LLM call comes"""
+        with _rescore_lock:
+            if _rescore_state['timer'] is not None:
+                return
+            delay = max(breaker.open_seconds for breaker in self._scoring_breakers)
+            timer = threading.Timer(delay, _run_scheduled_rescore)
+            timer.daemon = True
+            _rescore_state['timer'] = timer
+            timer.start()
+    
+    def _on_circuit_closed(self, model_id):
+        """Re-score provisional results in the background once the LLM is reachable again"""
+        with _rescore_lock:
+            if not _rescore_state['pending']:
+                return
+        threading.Thread(target=self.rescore_pending, daemon=True).start()
+    
+    def rescore_pending(self):
+        """Re-score provisional results from their stored transcripts and update their sheet rows;
+        recordings that could not be transcribed are fetched and transcribed again first"""
+        with _rescore_lock:
+            pending, _rescore_state['pending'] = _rescore_state['pending'], []
+        
+        memo = self.voice_processor.analysis_memo
+        rescored = []
+        for index, result in enumerate(pending):
+            if result['transcript'].startswith('Error'):
+                new_result = self.voice_processor.process_audio_submission(result['student_name'], result['audio_link'])
+                if new_result['transcript'].startswith('Error'):
+                    # Left in the memo only, so a recording that stays unreachable is retried once per run
+                    print(f"⚠️ Still could not transcribe {result['student_name']}'s recording, retrying on the next run")
+                    continue
+                result['transcript'] = new_result['transcript']
+                if new_result.get('needs_rescore') and memo is not None:
+                    try:
+                        memo.add_pending_rescore(result['student_name'], result['audio_link'], result['transcript'])
+                    except Exception as e:
+                        print(f"Error storing pending re-score: {e}")
+            else:
+                new_result = self.voice_processor.score_transcript(
+                    result['student_name'], result['audio_link'], result['transcript']
+                )
+            if new_result.get('needs_rescore'):
+                # Still degraded: keep this and the rest queued for the next recovery
+                with _rescore_lock:
+                    _rescore_state['pending'].extend(pending[index:])
+                self._schedule_rescore()
+                break
+            
+            with _sheets_lock:
+                self._update_voice_result(new_result)
+            if memo is not None:
+                try:
+                    memo.remove_pending_rescore(result['student_name'], result['audio_link'])
+                except Exception as e:
+                    print(f"Error clearing pending re-score: {e}")
+            result.update(new_result)
+            rescored.append(result)
+            print(f"🔁 Re-scored voice for {result['student_name']}: Score {result['score']}/10")
+        
+        return rescored
+    
+    def _update_voice_result(self, result):
+        """Overwrite the score and analysis of a stored voice result"""
+        try:
+            voice_data = self.sheets_manager.read_data('Voice Submissions', 'A:E')
+            # The latest row for the student and link holds the provisional score
+            for row_number in range(len(voice_data), 1, -1):
+                row = voice_data[row_number - 1]
+                if len(row) >= 2 and row[0] == result['student_name'] and row[1] == result['audio_link']:
+                    # The transcript too, in case the provisional score came from a failed transcription
+                    self.sheets_manager.write_data(
+                        'Voice Submissions',
+                        [[
+                            result['transcript'][:500] + '...' if len(result['transcript']) > 500 else result['transcript'],
+                            result['score'],
+                            result['analysis'][:200] + '...' if len(result['analysis']) > 200 else result['analysis']
+                        ]],
+                        f'C{row_number}'
+                    )
+                    return
+            print(f"⚠️ No stored voice result found for {result['student_name']}, appending the re-score")
+            self._store_voice_result(result)
+            
+        except Exception as e:
+            print(f"❌ Error updating voice result: {e}")
+    
     def create_task(self, voice_submissions):
         """Create a task for processing voice submissions"""
         return Task(
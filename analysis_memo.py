@@ -0,0 +1,136 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from config import ANALYSIS_MEMO_PATH
+
+def transcript_hash(transcript):
+    """Stable hash of a transcript's text"""
+    return hashlib.sha256(transcript.strip().encode('utf-8')).hexdigest()
+
+class AnalysisMemo:
+    """Persistent SQLite memo of transcripts per recording and analyses per transcript and rubric version"""
+
+    def __init__(self, db_path=ANALYSIS_MEMO_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        """Open the database on first use and create the schema"""
+        if self._connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    file_id TEXT NOT NULL,
+                    engine TEXT NOT NULL,
+                    transcript TEXT NOT NULL,
+                    transcript_hash TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (file_id, engine)
+                );
+                CREATE TABLE IF NOT EXISTS analyses (
+                    file_id TEXT NOT NULL,
+                    transcript_hash TEXT NOT NULL,
+                    rubric_version TEXT NOT NULL,
+                    analysis TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    scored_by TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (file_id, transcript_hash, rubric_version)
+                );
+                CREATE TABLE IF NOT EXISTS pending_rescores (
+                    student_name TEXT NOT NULL,
+                    audio_link TEXT NOT NULL,
+                    transcript TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (student_name, audio_link)
+                );
+            """)
+        return self._connection
+
+    def get_transcript(self, file_id, engine):
+        """Stored transcript of a recording for a transcription engine, or None"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT transcript FROM transcripts WHERE file_id = ? AND engine = ?",
+                (file_id, engine)
+            ).fetchone()
+            return row['transcript'] if row else None
+
+    def put_transcript(self, file_id, engine, transcript):
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?, ?, ?)",
+                (file_id, engine, transcript, transcript_hash(transcript), datetime.now().isoformat(timespec='seconds'))
+            )
+            connection.commit()
+
+    def get_analysis(self, file_id, transcript, rubric_version):
+        """Stored analysis for this exact transcript under the current rubric, or None"""
+        with self._lock:
+            row = self._connect().execute(
+                """SELECT analysis, score, scored_by FROM analyses
+                   WHERE file_id = ? AND transcript_hash = ? AND rubric_version = ?""",
+                (file_id, transcript_hash(transcript), rubric_version)
+            ).fetchone()
+            return dict(row) if row else None
+
+    def put_analysis(self, file_id, transcript, rubric_version, analysis, score, scored_by):
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (file_id, transcript_hash(transcript), rubric_version, analysis, score, scored_by,
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+            connection.commit()
+
+    def prune_analyses(self, rubric_version):
+        """Delete analyses made under any other rubric version; returns the number removed"""
+        with self._lock:
+            connection = self._connect()
+            removed = connection.execute(
+                "DELETE FROM analyses WHERE rubric_version != ?", (rubric_version,)
+            ).rowcount
+            connection.commit()
+            return removed
+
+    def add_pending_rescore(self, student_name, audio_link, transcript):
+        """Remember a provisionally scored submission so a restart still re-scores it"""
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO pending_rescores VALUES (?, ?, ?, ?)",
+                (student_name, audio_link, transcript, datetime.now().isoformat(timespec='seconds'))
+            )
+            connection.commit()
+
+    def remove_pending_rescore(self, student_name, audio_link):
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "DELETE FROM pending_rescores WHERE student_name = ? AND audio_link = ?", (student_name, audio_link)
+            )
+            connection.commit()
+
+    def get_pending_rescores(self):
+        """Submissions still waiting for a re-score, oldest first"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT student_name, audio_link, transcript FROM pending_rescores ORDER BY created_at"
+            ).fetchall()
+            return [dict(row) for row in rows]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
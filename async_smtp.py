@@ -0,0 +1,272 @@
+import asyncio
+import base64
+import smtplib
+import socket
+import ssl
+import time
+from config import (
+    EMAIL_SMTP_SERVER,
+    EMAIL_SMTP_PORT,
+    EMAIL_USERNAME,
+    EMAIL_PASSWORD,
+    EMAIL_SMTP_USE_TLS,
+    EMAIL_SMTP_POOL_SIZE,
+    EMAIL_SMTP_TIMEOUT,
+    EMAIL_SMTP_NOOP_AFTER_SECONDS,
+    EMAIL_SMTP_MAX_IDLE_SECONDS,
+    EMAIL_SMTP_MAX_MESSAGES_PER_CONNECTION
+)
+from smtp_pool import RECONNECT_ERRORS, provider_limits
+
+class AsyncSMTPConnection:
+    """One SMTP session on asyncio streams. MAIL, RCPT and DATA go out in a single write when the
+    server offers PIPELINING, so a message costs two round trips instead of four.
+    Failures raise the same smtplib exceptions as the blocking client."""
+
+    def __init__(self, host, port, username, password, use_tls, timeout):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.extensions = {}
+        self.reader = None
+        self.writer = None
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages = 0
+
+    async def connect(self):
+        implicit_tls = ssl.create_default_context() if self.port == 465 else None
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=implicit_tls), self.timeout
+        )
+        code, message = await self._read_reply()
+        if code != 220:
+            self.close()
+            raise smtplib.SMTPConnectError(code, message)
+        try:
+            await self._ehlo()
+            if self.use_tls and self.port != 465:
+                if 'starttls' not in self.extensions:
+                    raise smtplib.SMTPNotSupportedError("STARTTLS extension not supported by server.")
+                await self._command("STARTTLS", 220)
+                await self.writer.start_tls(ssl.create_default_context(), server_hostname=self.host)
+                await self._ehlo()
+            if self.username and self.password:
+                credentials = base64.b64encode(f"\0{self.username}\0{self.password}".encode('utf-8')).decode('ascii')
+                code, message = await self._command(f"AUTH PLAIN {credentials}")
+                if code != 235:
+                    raise smtplib.SMTPAuthenticationError(code, message)
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    async def _read_reply(self):
+        lines = []
+        while True:
+            try:
+                line = await asyncio.wait_for(self.reader.readline(), self.timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"No reply from {self.host} within {self.timeout:.0f}s")
+            if not line:
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            lines.append(line[4:].strip())
+            if line[3:4] != b'-':
+                try:
+                    return int(line[:3]), b"\n".join(lines)
+                except ValueError:
+                    raise smtplib.SMTPServerDisconnected(f"Malformed reply: {line!r}")
+
+    async def _command(self, command, expected=None):
+        self.writer.write(command.encode('ascii') + b"\r\n")
+        await self.writer.drain()
+        code, message = await self._read_reply()
+        if expected is not None and code != expected:
+            raise smtplib.SMTPResponseException(code, message)
+        return code, message
+
+    async def _ehlo(self):
+        code, message = await self._command(f"EHLO {socket.getfqdn()}")
+        if code != 250:
+            raise smtplib.SMTPHeloError(code, message)
+        self.extensions = {}
+        for line in message.decode('latin-1').split('\n')[1:]:
+            name, _, params = line.partition(' ')
+            self.extensions[name.lower()] = params
+
+    async def send(self, from_addr, to_addrs, message):
+        """Send one message, returning the refused recipients like smtplib.sendmail"""
+        commands = [f"MAIL FROM:<{from_addr}>"] + [f"RCPT TO:<{address}>" for address in to_addrs] + ["DATA"]
+        if 'pipelining' in self.extensions:
+            self.writer.write("".join(f"{command}\r\n" for command in commands).encode('ascii'))
+            await self.writer.drain()
+            replies = [await self._read_reply() for _ in commands]
+        else:
+            replies = [await self._command(commands[0])]
+            if replies[0][0] == 250:
+                replies += [await self._command(command) for command in commands[1:-1]]
+                if any(code in (250, 251) for code, _ in replies[1:]):
+                    replies.append(await self._command("DATA"))
+
+        code, reply = replies[0]
+        if code != 250:
+            await self._reset(code)
+            raise smtplib.SMTPSenderRefused(code, reply, from_addr)
+        refused = {
+            address: replies[index + 1]
+            for index, address in enumerate(to_addrs)
+            if index + 1 < len(replies) and replies[index + 1][0] not in (250, 251)
+        }
+        if len(refused) == len(to_addrs):
+            await self._reset(replies[-1][0])
+            raise smtplib.SMTPRecipientsRefused(refused)
+        code, reply = replies[-1]
+        if code != 354:
+            await self._reset(code)
+            raise smtplib.SMTPDataError(code, reply)
+
+        data = smtplib.quotedata(message)
+        if not data.endswith("\r\n"):
+            data += "\r\n"
+        self.writer.write(data.encode('ascii') + b".\r\n")
+        await self.writer.drain()
+        code, reply = await self._read_reply()
+        if code != 250:
+            await self._reset(code)
+            raise smtplib.SMTPDataError(code, reply)
+        self.messages += 1
+        return refused
+
+    async def _reset(self, code):
+        if code == 421:
+            # The server is closing the session; smtplib does the same
+            self.close()
+            return
+        try:
+            await self._command("RSET")
+        except Exception:
+            self.close()
+
+    async def noop(self):
+        return (await self._command("NOOP"))[0]
+
+    async def quit(self):
+        try:
+            await self._command("QUIT")
+        except Exception:
+            pass
+        self.close()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+class AsyncSMTPPool:
+    """asyncio counterpart of SMTPConnectionPool: keep-alive sessions reused most recently first,
+    NOOP checks after idling, and one transparent reconnect when the server drops a session.
+    Belongs to the event loop it is first used on."""
+
+    def __init__(self, host=EMAIL_SMTP_SERVER, port=EMAIL_SMTP_PORT, username=EMAIL_USERNAME, password=EMAIL_PASSWORD,
+                 use_tls=EMAIL_SMTP_USE_TLS, size=EMAIL_SMTP_POOL_SIZE, timeout=EMAIL_SMTP_TIMEOUT,
+                 noop_after=EMAIL_SMTP_NOOP_AFTER_SECONDS, max_idle=EMAIL_SMTP_MAX_IDLE_SECONDS,
+                 max_messages=EMAIL_SMTP_MAX_MESSAGES_PER_CONNECTION):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = max(1, size or provider_limits(host)[0])
+        self.timeout = timeout
+        self.noop_after = noop_after
+        self.max_idle = max_idle
+        self.max_messages = max_messages
+        self._slots = None
+        self._idle = []
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.noop_checks = 0
+        self.messages_sent = 0
+
+    async def _connect(self):
+        connection = AsyncSMTPConnection(self.host, self.port, self.username, self.password, self.use_tls, self.timeout)
+        await connection.connect()
+        self.connections_opened += 1
+        return connection
+
+    async def _checkout(self):
+        while self._idle:
+            connection = self._idle.pop()
+            idle_for = time.monotonic() - connection.last_used
+            if idle_for > self.max_idle or connection.writer is None:
+                await connection.quit()
+                continue
+            if idle_for > self.noop_after:
+                self.noop_checks += 1
+                try:
+                    healthy = await connection.noop() == 250
+                except Exception:
+                    healthy = False
+                if not healthy:
+                    connection.close()
+                    continue
+            return connection
+        return await self._connect()
+
+    async def _checkin(self, connection):
+        if connection.writer is None:
+            return
+        if connection.messages >= self.max_messages:
+            await connection.quit()
+            return
+        connection.last_used = time.monotonic()
+        self._idle.append(connection)
+
+    def _should_reconnect(self, error):
+        return isinstance(error, RECONNECT_ERRORS) or getattr(error, 'smtp_code', None) == 421
+
+    async def send(self, from_addr, to_addrs, message):
+        """Send a message over a pooled session, returning the refused recipients"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            for attempt in range(2):
+                connection = await self._checkout()
+                try:
+                    refused = await connection.send(from_addr, to_addrs, message)
+                except Exception as e:
+                    if self._should_reconnect(e):
+                        connection.close()
+                        if attempt == 0:
+                            self.reconnects += 1
+                            print(f"🔌 SMTP session to {self.host} dropped ({e}), reconnecting")
+                            continue
+                    elif isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException)):
+                        # The session was reset and can carry the next message
+                        await self._checkin(connection)
+                    else:
+                        connection.close()
+                    raise
+
+                self.messages_sent += 1
+                await self._checkin(connection)
+                return refused
+
+    def stats(self):
+        return {
+            'host': self.host,
+            'idle_connections': len(self._idle),
+            'connections_opened': self.connections_opened,
+            'reconnects': self.reconnects,
+            'noop_checks': self.noop_checks,
+            'messages_sent': self.messages_sent
+        }
+
+    async def close(self):
+        """Quit every idle session"""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await connection.quit()
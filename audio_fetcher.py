@@ -0,0 +1,294 @@
+import hashlib
+import ipaddress
+import json
+import mimetypes
+import os
+import re
+import socket
+import threading
+from urllib.parse import urljoin, urlparse
+import requests
+from bs4 import BeautifulSoup
+from config import (
+    AUDIO_CACHE_DIR,
+    AUDIO_MAX_DOWNLOAD_MB,
+    AUDIO_FETCH_CHUNK_BYTES,
+    AUDIO_FETCH_TIMEOUT,
+    AUDIO_URL_ALLOW_PRIVATE_HOSTS,
+    DRIVE_DOWNLOAD_URL
+)
+
+AUDIO_EXTENSIONS = {
+    'audio/mpeg': '.mp3',
+    'audio/mp3': '.mp3',
+    'audio/mp4': '.m4a',
+    'audio/x-m4a': '.m4a',
+    'audio/wav': '.wav',
+    'audio/x-wav': '.wav',
+    'audio/wave': '.wav',
+    'audio/ogg': '.ogg',
+    'audio/webm': '.webm',
+    'video/mp4': '.mp4'
+}
+
+# Generic binary types some file hosts serve recordings as
+BINARY_CONTENT_TYPES = ('application/octet-stream', 'binary/octet-stream')
+MAX_REDIRECTS = 5
+
+class AudioTooLargeError(ValueError):
+    """Raised when a recording exceeds the download size limit"""
+
+class IncompleteDownloadError(IOError):
+    """Raised when a download ends before the announced size; the partial file is kept for resuming"""
+
+class UnsafeURLError(ValueError):
+    """Raised for a submitted link that is not http(s) or whose host resolves to a non-public address"""
+
+def check_public_url(url):
+    """Raise UnsafeURLError unless the URL is http(s) and every address its host resolves to is public,
+    so a submitted link cannot reach loopback, private-network or link-local (cloud metadata) services"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise UnsafeURLError(f"Only http(s) links can be downloaded: {url}")
+    try:
+        port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP)}
+    except (socket.gaierror, ValueError) as e:
+        raise UnsafeURLError(f"Cannot resolve the host of {url}: {e}")
+    for address in addresses:
+        check_public_address(url, address)
+
+def check_public_address(url, address):
+    """Raise UnsafeURLError unless an address the URL's host resolved or connected to is public"""
+    ip = ipaddress.ip_address(address.split('%')[0])
+    if not ip.is_global or ip.is_multicast:
+        raise UnsafeURLError(f"Refusing to download {url}: {urlparse(url).hostname} is at the non-public address {ip}")
+
+def peer_address(response):
+    """Address a streamed response is being read from, or None once its connection is gone"""
+    for path in (('_fp', 'fp', 'raw', '_sock'), ('_connection', 'sock')):
+        sock = response.raw
+        for name in path:
+            sock = getattr(sock, name, None)
+        if sock is not None:
+            try:
+                return sock.getpeername()[0]
+            except OSError:
+                pass
+    return None
+
+def is_media_type(content_type):
+    """Whether a response Content-Type can hold an audio or video recording"""
+    content_type = content_type.split(';')[0].strip().lower()
+    return content_type.split('/')[0] in ('audio', 'video') or content_type in BINARY_CONTENT_TYPES
+
+# Failures worth resuming; HTTP errors such as 404 or 403 are not retried
+RESUMABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    IncompleteDownloadError
+)
+
+class AudioFetcher:
+    """Stream Drive recordings in chunks into a content-addressed cache keyed by file ID"""
+
+    def __init__(self, cache_dir=AUDIO_CACHE_DIR, max_bytes=int(AUDIO_MAX_DOWNLOAD_MB * 1024 * 1024),
+                 chunk_size=AUDIO_FETCH_CHUNK_BYTES, url_template=DRIVE_DOWNLOAD_URL):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.url_template = url_template
+        self.session = requests.Session()
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self.downloads = 0
+        self.cache_hits = 0
+
+    def _file_lock(self, file_id):
+        """One lock per file ID so concurrent requests for a recording download it once"""
+        with self._locks_lock:
+            return self._locks.setdefault(file_id, threading.Lock())
+
+    def _safe_id(self, file_id):
+        return re.sub(r'[^A-Za-z0-9_-]', '_', file_id)
+
+    def _index_path(self, file_id):
+        return os.path.join(self.cache_dir, 'ids', f"{self._safe_id(file_id)}.json")
+
+    def _partial_path(self, file_id):
+        return os.path.join(self.cache_dir, 'partial', f"{self._safe_id(file_id)}.part")
+
+    def _blob_path(self, digest, extension):
+        # Identical recordings uploaded under different file IDs share one blob
+        return os.path.join(self.cache_dir, 'blobs', digest[:2], f"{digest}{extension}")
+
+    def cached_path(self, file_id):
+        """Path of the cached recording for a file ID, or None"""
+        try:
+            with open(self._index_path(file_id), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        path = self._blob_path(entry['sha256'], entry.get('extension', ''))
+        return path if os.path.exists(path) else None
+
+    def fetch(self, file_id, attempts=3, url=None):
+        """Return the local path of a recording, downloading it only if it is not cached.
+        file_id is the cache key; url overrides the Drive download URL for recordings hosted elsewhere."""
+        with self._file_lock(file_id):
+            path = self.cached_path(file_id)
+            if path:
+                self.cache_hits += 1
+                return path
+
+            for attempt in range(attempts):
+                try:
+                    path = self._download(file_id, url)
+                    break
+                except RESUMABLE_ERRORS as e:
+                    # Interrupted downloads resume from the .part file on the next attempt
+                    if attempt == attempts - 1:
+                        raise
+                    print(f"⚠️ Download of {file_id} interrupted ({e}), retrying")
+            self.downloads += 1
+            return path
+
+    def _open_stream(self, file_id, offset, url=None):
+        """Open the download, resuming from the offset and passing Drive's large-file confirmation page"""
+        headers = {'Range': f"bytes={offset}-"} if offset else {}
+        if url:
+            response = self._open_url(url, headers)
+        else:
+            response = self.session.get(self.url_template.format(file_id=file_id), headers=headers,
+                                        stream=True, timeout=AUDIO_FETCH_TIMEOUT)
+
+        if not url and response.headers.get('Content-Type', '').startswith('text/html'):
+            # Drive answers large files with a virus-scan warning form instead of the bytes
+            form = BeautifulSoup(response.text, 'html.parser').find('form')
+            if not form or not form.get('action'):
+                raise ValueError(f"Drive did not return audio for file ID {file_id}; is it shared publicly?")
+            params = {field.get('name'): field.get('value', '') for field in form.find_all('input') if field.get('name')}
+            response = self.session.get(form['action'], params=params, headers=headers, stream=True, timeout=AUDIO_FETCH_TIMEOUT)
+
+        if response.status_code == 416:
+            # The partial file already holds every byte
+            return response, offset
+        response.raise_for_status()
+        if offset and response.status_code != 206:
+            # The server ignored the range, so start over
+            offset = 0
+        return response, offset
+
+    def _open_url(self, url, headers):
+        """Open a submitted link, checking the host before every redirect hop is followed
+        and the Content-Type before any of the body is read"""
+        for _ in range(MAX_REDIRECTS + 1):
+            if not AUDIO_URL_ALLOW_PRIVATE_HOSTS:
+                check_public_url(url)
+            response = self.session.get(url, headers=headers, stream=True, timeout=AUDIO_FETCH_TIMEOUT,
+                                        allow_redirects=False)
+            if not AUDIO_URL_ALLOW_PRIVATE_HOSTS:
+                self._check_peer(url, response)
+            if not response.is_redirect:
+                break
+            response.close()
+            url = urljoin(url, response.headers['Location'])
+        else:
+            raise UnsafeURLError(f"Too many redirects while downloading {url}")
+
+        content_type = response.headers.get('Content-Type', '')
+        if response.status_code in (200, 206) and not is_media_type(content_type):
+            response.close()
+            raise ValueError(f"{url} returned {content_type or 'no Content-Type'}, not an audio or video file")
+        return response
+
+    def _check_peer(self, url, response):
+        """Check the address the request really went to, since the host may resolve differently
+        (DNS rebinding) between check_public_url and the connection"""
+        proxies = self.session.merge_environment_settings(url, {}, None, None, None)['proxies']
+        if requests.utils.select_proxy(url, proxies):
+            # The peer is the configured proxy, which resolves the host itself
+            return
+        address = peer_address(response)
+        try:
+            if address is not None:
+                check_public_address(url, address)
+            elif not response.is_redirect:
+                raise UnsafeURLError(f"Cannot tell which address {url} was downloaded from")
+        except UnsafeURLError:
+            response.close()
+            raise
+
+    def _total_size(self, response, offset):
+        content_range = response.headers.get('Content-Range', '')
+        if '/' in content_range and not content_range.endswith('/*'):
+            return int(content_range.rsplit('/', 1)[1])
+        if response.headers.get('Content-Length'):
+            return offset + int(response.headers['Content-Length'])
+        return None
+
+    def _extension(self, response):
+        disposition = response.headers.get('Content-Disposition', '')
+        match = re.search(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)', disposition)
+        if match and os.path.splitext(match.group(1))[1]:
+            return os.path.splitext(match.group(1))[1].lower()
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+        return AUDIO_EXTENSIONS.get(content_type) or mimetypes.guess_extension(content_type) or ''
+
+    def _download(self, file_id, url=None):
+        """Stream the recording to a .part file, resuming any earlier partial download, then store it by hash"""
+        partial_path = self._partial_path(file_id)
+        os.makedirs(os.path.dirname(partial_path), exist_ok=True)
+        offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+
+        response, offset = self._open_stream(file_id, offset, url)
+        with response:
+            total = self._total_size(response, offset)
+            if total is not None and total > self.max_bytes:
+                raise AudioTooLargeError(
+                    f"Recording {file_id} is {total / 1048576:.1f} MB, over the {self.max_bytes / 1048576:.0f} MB limit"
+                )
+
+            digest = hashlib.sha256()
+            if offset:
+                print(f"⏯️ Resuming download of {file_id} at {offset} bytes")
+                with open(partial_path, 'rb') as f:
+                    for block in iter(lambda: f.read(self.chunk_size), b''):
+                        digest.update(block)
+
+            size = offset
+            if response.status_code != 416:
+                with open(partial_path, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if not chunk:
+                            continue
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            f.close()
+                            os.remove(partial_path)
+                            raise AudioTooLargeError(f"Recording {file_id} exceeds the {self.max_bytes / 1048576:.0f} MB limit")
+                        f.write(chunk)
+                        digest.update(chunk)
+
+            if total is not None and size < total:
+                # Keep the partial file so the next attempt resumes where this one stopped
+                raise IncompleteDownloadError(f"Download of {file_id} stopped at {size} of {total} bytes")
+            extension = self._extension(response)
+
+        sha256 = digest.hexdigest()
+        blob_path = self._blob_path(sha256, extension)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if os.path.exists(blob_path):
+            os.remove(partial_path)
+        else:
+            os.replace(partial_path, blob_path)
+
+        index_path = self._index_path(file_id)
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'file_id': file_id, 'sha256': sha256, 'extension': extension, 'size': size}, f)
+        os.replace(index_path + '.tmp', index_path)
+
+        print(f"📥 Downloaded {file_id} ({size / 1024:.0f} KB)")
+        return blob_path
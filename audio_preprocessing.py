@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import wave
+import numpy as np
+from config import (
+    AUDIO_PREPROCESSED_DIR,
+    AUDIO_SAMPLE_RATE,
+    AUDIO_MAX_DURATION_SECONDS,
+    AUDIO_OVERLONG_POLICY,
+    AUDIO_VAD_AGGRESSIVENESS,
+    AUDIO_MAX_PAUSE_SECONDS
+)
+
+FRAME_MS = 30
+# Speech kept on either side of a voiced frame so word onsets and endings are not clipped
+HANGOVER_MS = 150
+
+class AudioPreprocessingError(ValueError):
+    """Raised when a recording cannot be turned into speech audio for transcription"""
+
+class AudioTooLongError(AudioPreprocessingError):
+    """Raised for recordings over the duration limit when the policy is to reject them"""
+
+class LinearResampler:
+    """Streaming linear-interpolation resampler; state carries across chunks so block edges do not click"""
+
+    def __init__(self, source_rate, target_rate):
+        self.step = source_rate / target_rate
+        self._position = 0.0
+        self._last = None
+
+    def process(self, samples):
+        if self.step == 1.0:
+            return samples
+        buffer = samples if self._last is None else np.concatenate(([self._last], samples))
+        if len(buffer) < 2:
+            self._last = buffer[-1] if len(buffer) else self._last
+            return np.zeros(0, dtype=np.float32)
+        count = int(np.floor((len(buffer) - 1 - self._position) / self.step)) + 1 if self._position <= len(buffer) - 1 else 0
+        positions = self._position + self.step * np.arange(count)
+        resampled = np.interp(positions, np.arange(len(buffer)), buffer).astype(np.float32)
+        self._position += self.step * count - (len(buffer) - 1)
+        self._last = buffer[-1]
+        return resampled
+
+class AudioPreprocessor:
+    """Decode a recording to 16 kHz mono PCM, enforce the duration limit while streaming,
+    and trim silence so transcription time per submission is bounded"""
+
+    def __init__(self, output_dir=AUDIO_PREPROCESSED_DIR, sample_rate=AUDIO_SAMPLE_RATE,
+                 max_seconds=AUDIO_MAX_DURATION_SECONDS, overlong_policy=AUDIO_OVERLONG_POLICY,
+                 vad_aggressiveness=AUDIO_VAD_AGGRESSIVENESS, max_pause_seconds=AUDIO_MAX_PAUSE_SECONDS):
+        if overlong_policy not in ('truncate', 'reject'):
+            raise ValueError(f"Unknown overlong policy: {overlong_policy}")
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.max_seconds = max_seconds
+        self.overlong_policy = overlong_policy
+        self.vad_aggressiveness = vad_aggressiveness
+        self.max_pause_seconds = max_pause_seconds
+        self.ffmpeg = shutil.which('ffmpeg')
+        self.ffprobe = shutil.which('ffprobe')
+        try:
+            import webrtcvad
+            self._vad = webrtcvad.Vad(vad_aggressiveness)
+        except ImportError:
+            self._vad = None
+
+    @property
+    def signature(self):
+        """Short identifier of the settings; preprocessed files and transcripts are only reused under the same one"""
+        settings = [self.sample_rate, self.max_seconds, self.overlong_policy, self.vad_aggressiveness,
+                    self.max_pause_seconds, 'webrtc' if self._vad else 'energy']
+        return hashlib.sha256(json.dumps(settings).encode('utf-8')).hexdigest()[:10]
+
+    def process(self, audio_path):
+        """Return the path of a 16-bit mono WAV holding only the speech of the recording"""
+        name = os.path.splitext(os.path.basename(audio_path))[0]
+        output_path = os.path.join(self.output_dir, f"{name}.{self.signature}.wav")
+        if os.path.exists(output_path) and os.path.exists(output_path + '.json'):
+            return output_path
+
+        duration = self.probe_duration(audio_path)
+        if duration is not None and duration > self.max_seconds and self.overlong_policy == 'reject':
+            # Rejected from the header alone, before any decoding
+            raise AudioTooLongError(self._too_long_message(audio_path, duration))
+
+        samples = self.decode(audio_path)
+        decoded_seconds = len(samples) / self.sample_rate
+        if decoded_seconds > self.max_seconds:
+            if self.overlong_policy == 'reject':
+                raise AudioTooLongError(self._too_long_message(audio_path, duration or decoded_seconds))
+            samples = samples[:int(self.max_seconds * self.sample_rate)]
+            print(f"✂️ Truncated {os.path.basename(audio_path)} to the first {self.max_seconds:.0f}s")
+
+        voiced = self.speech_frames(samples)
+        speech = self.trim_silence(samples, voiced)
+        if not len(speech):
+            raise AudioPreprocessingError(f"No speech detected in {os.path.basename(audio_path)}")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        with wave.open(output_path + '.tmp', 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(speech.tobytes())
+        # Measurements of the original recording, kept for pre-scoring features
+        with open(output_path + '.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                'duration_seconds': round(len(samples) / self.sample_rate, 3),
+                'speech_seconds': round(int(voiced.sum()) * FRAME_MS / 1000, 3)
+            }, f)
+        os.replace(output_path + '.tmp', output_path)
+
+        print(f"🎚️ Preprocessed {os.path.basename(audio_path)}: "
+              f"{duration or decoded_seconds:.1f}s → {len(speech) / self.sample_rate:.1f}s of speech")
+        return output_path
+
+    def stats(self, output_path):
+        """Duration and speech seconds of the recording behind a preprocessed file, or None"""
+        try:
+            with open(output_path + '.json', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _too_long_message(self, audio_path, seconds):
+        return (f"Recording {os.path.basename(audio_path)} is {seconds:.0f}s long, "
+                f"over the {self.max_seconds:.0f}s limit")
+
+    def probe_duration(self, audio_path):
+        """Duration in seconds read from the container header, or None if it cannot be read cheaply"""
+        try:
+            with wave.open(audio_path, 'rb') as wav:
+                return wav.getnframes() / wav.getframerate()
+        except (wave.Error, EOFError, OSError):
+            pass
+        if not self.ffprobe:
+            return None
+        try:
+            result = subprocess.run(
+                [self.ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', audio_path],
+                capture_output=True, text=True, timeout=30
+            )
+            return float(result.stdout.strip())
+        except (ValueError, subprocess.SubprocessError):
+            return None
+
+    def decode(self, audio_path):
+        """Decode to int16 mono at the target rate, reading no more than the duration limit allows"""
+        # One extra frame past the limit is enough to tell an overlong recording from one at the limit
+        max_samples = int(self.max_seconds * self.sample_rate) + self.sample_rate * FRAME_MS // 1000
+        chunks = []
+        total = 0
+        for chunk in self._stream_pcm(audio_path, max_samples / self.sample_rate):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= max_samples:
+                break
+        if not chunks:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(chunks)[:max_samples]
+
+    def _stream_pcm(self, audio_path, max_seconds):
+        try:
+            with wave.open(audio_path, 'rb') as wav:
+                yield from self._stream_wav(wav)
+                return
+        except (wave.Error, EOFError):
+            pass
+
+        if not self.ffmpeg:
+            raise AudioPreprocessingError(
+                f"Decoding {os.path.splitext(audio_path)[1] or 'this format'} needs ffmpeg on the PATH"
+            )
+        # ffmpeg stops decoding at the limit, so an hour-long upload costs no more than a short one
+        process = subprocess.Popen(
+            [self.ffmpeg, '-nostdin', '-v', 'error', '-i', audio_path, '-t', f"{max_seconds:.3f}",
+             '-f', 's16le', '-ac', '1', '-ar', str(self.sample_rate), '-'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        try:
+            produced = False
+            for block in iter(lambda: process.stdout.read(self.sample_rate * 2), b''):
+                produced = True
+                yield np.frombuffer(block[:len(block) - len(block) % 2], dtype=np.int16)
+            if process.wait() != 0 and not produced:
+                error = process.stderr.read().decode('utf-8', 'replace').strip()
+                raise AudioPreprocessingError(f"Could not decode {os.path.basename(audio_path)}: {error}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.stderr.close()
+
+    def _stream_wav(self, wav):
+        """PCM WAV without ffmpeg: one second at a time, downmixed and resampled with numpy"""
+        width = wav.getsampwidth()
+        if width not in (1, 2, 4):
+            raise AudioPreprocessingError(f"Unsupported WAV sample width: {width * 8} bits")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        resampler = LinearResampler(rate, self.sample_rate)
+        while True:
+            frames = wav.readframes(rate)
+            if not frames:
+                break
+            if width == 1:
+                samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) * 256
+            elif width == 2:
+                samples = np.frombuffer(frames, dtype='<i2').astype(np.float32)
+            else:
+                samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 65536
+            samples = samples.reshape(-1, channels).mean(axis=1)
+            yield np.clip(np.round(resampler.process(samples)), -32768, 32767).astype(np.int16)
+
+    def speech_frames(self, samples):
+        """Voice-activity flag per 30 ms frame: webrtcvad when installed, else an adaptive energy threshold"""
+        frame_length = self.sample_rate * FRAME_MS // 1000
+        count = len(samples) // frame_length
+        if not count:
+            return np.zeros(0, dtype=bool)
+        frames = samples[:count * frame_length].reshape(count, frame_length)
+
+        if self._vad and self.sample_rate in (8000, 16000, 32000, 48000):
+            return np.array([self._vad.is_speech(frame.tobytes(), self.sample_rate) for frame in frames])
+
+        rms = np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1)) + 1e-9
+        level = 20 * np.log10(rms / 32768)
+        # Speech sits well above the room's noise floor; louder VAD settings demand a wider margin
+        noise_floor = np.percentile(level, 10)
+        threshold = max(noise_floor + 6 + 3 * self.vad_aggressiveness, -55.0)
+        return level > threshold
+
+    def trim_silence(self, samples, voiced=None):
+        """Drop leading and trailing silence and shorten pauses to at most the configured length"""
+        if voiced is None:
+            voiced = self.speech_frames(samples)
+        if not voiced.any():
+            return np.zeros(0, dtype=np.int16)
+
+        hangover = max(1, HANGOVER_MS // FRAME_MS)
+        padded = voiced.copy()
+        for shift in range(1, hangover + 1):
+            padded[shift:] |= voiced[:-shift]
+            padded[:-shift] |= voiced[shift:]
+
+        # Pauses inside the speech are kept up to max_pause_seconds so phrasing survives
+        max_pause_frames = int(self.max_pause_seconds * 1000 / FRAME_MS)
+        first, last = np.flatnonzero(padded)[[0, -1]]
+        keep = np.zeros_like(padded)
+        run = 0
+        for index in range(first, last + 1):
+            run = 0 if padded[index] else run + 1
+            keep[index] = run <= max_pause_frames
+
+        frame_length = self.sample_rate * FRAME_MS // 1000
+        mask = np.repeat(keep, frame_length)
+        return samples[:len(mask)][mask]
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark email delivery end to end against smtp_sink.py, with no real mail provider.
+Compares the threaded sender, the durable outbox and the asyncio sender.
+
+Usage: python bench_email.py --messages 2000 --connections 4 --latency 0.005
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+def build_recipients(count):
+    return [{'email': f"student{i:05d}@example.com", 'name': f"Student {i:05d}"} for i in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark email delivery against a local SMTP sink")
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--connections', type=int, default=4, help="Pooled SMTP sessions")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds the sink spends accepting each message")
+    parser.add_argument('--modes', default='threaded,outbox,async', help="Comma-separated: threaded, outbox, async")
+    args = parser.parse_args()
+
+    from smtp_sink import SMTPSink
+    sink = SMTPSink(latency=args.latency)
+    host, port = sink.start()
+    workdir = tempfile.mkdtemp(prefix='bench_email_')
+
+    # Configuration is read at import time, so point everything at the sink first
+    os.environ['EMAIL_SMTP_SERVER'] = host
+    os.environ['EMAIL_SMTP_PORT'] = str(port)
+    os.environ['EMAIL_SMTP_USE_TLS'] = 'false'
+    os.environ['EMAIL_USERNAME'] = 'bench@example.com'
+    os.environ['EMAIL_PASSWORD'] = 'bench'
+    os.environ['FROM_EMAIL'] = 'bench@example.com'
+    os.environ['EMAIL_SMTP_POOL_SIZE'] = str(args.connections)
+    os.environ['EMAIL_SMTP_MAX_MESSAGES_PER_CONNECTION'] = str(args.messages + 1)
+    # The sink has no provider limits; a fresh quota file keeps real counts untouched
+    os.environ['EMAIL_RATE_PER_MINUTE'] = str(args.messages * 10)
+    os.environ['EMAIL_RATE_PER_DAY'] = str(args.messages * 10)
+    os.environ['EMAIL_QUOTA_PATH'] = os.path.join(workdir, 'email_quota.json')
+    os.environ['EMAIL_OUTBOX_PATH'] = os.path.join(workdir, 'email_outbox.db')
+    os.environ['EMAIL_OUTBOX_POLL_SECONDS'] = '0.05'
+
+    from email_service import EmailService, AsyncEmailService
+
+    print(f"🧪 SMTP sink: {host}:{port} ({args.latency * 1000:.1f} ms per message)")
+    print(f"📧 Messages: {args.messages}, SMTP sessions: {args.connections}")
+
+    recipients = build_recipients(args.messages)
+    rows = []
+    for mode in [mode.strip() for mode in args.modes.split(',') if mode.strip()]:
+        received_before = sink.stats()['messages']
+        connections_before = sink.stats()['connections']
+        started = time.perf_counter()
+
+        if mode == 'threaded':
+            service = EmailService()
+            service.use_outbox = False
+            results = service.send_bulk_emails(recipients, 'quiz_invitation', quiz_link="https://example.com/quiz")
+            sent = sum(1 for result in results if result['success'])
+            render_stats = service.renderer.last_batch_stats
+        elif mode == 'outbox':
+            service = EmailService()
+            service.use_outbox = True
+            # Each run uses its own cohort so earlier runs do not make these duplicates
+            cohort = f"bench-{time.time_ns()}"
+            service.send_bulk_emails(recipients, 'quiz_invitation', cohort=cohort, quiz_link="https://example.com/quiz")
+            service.outbox_drainer.flush(timeout=600)
+            sent = service.outbox.counts(cohort).get('sent', 0)
+            render_stats = None
+        elif mode == 'async':
+            async def run_async():
+                service = AsyncEmailService()
+                try:
+                    results = await service.send_bulk_emails(recipients, 'quiz_invitation', quiz_link="https://example.com/quiz")
+                finally:
+                    await service.close()
+                return sum(1 for result in results if result['success']), service.renderer.last_batch_stats
+            sent, render_stats = asyncio.run(run_async())
+        else:
+            print(f"⚠️ Unknown mode: {mode}")
+            continue
+
+        elapsed = time.perf_counter() - started
+        rows.append({
+            'mode': mode,
+            'sent': sent,
+            'received': sink.stats()['messages'] - received_before,
+            'connections': sink.stats()['connections'] - connections_before,
+            'seconds': elapsed,
+            'render_us': render_stats['per_message_us'] if render_stats else None
+        })
+
+    sink.stop()
+
+    print("\n" + "=" * 50)
+    print("📊 Benchmark Summary")
+    print("=" * 50)
+    for row in rows:
+        render = f", rendering {row['render_us']:.0f} µs/message" if row['render_us'] is not None else ""
+        print(
+            f"  {row['mode']}: {row['sent']}/{args.messages} sent, {row['received']} received by the sink over "
+            f"{row['connections']} connections in {row['seconds']:.2f}s ({row['sent'] / row['seconds']:.0f} messages/s{render})"
+        )
+
+if __name__ == "__main__":
+    main()
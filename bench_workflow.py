@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark the complete AISB workflow with no network access.
+LLM calls go to mock_llm_server.py and Google Sheets is kept in memory.
+
+Usage: python bench_workflow.py --students 10000 --latency lognormal:-2.3:0.4
+"""
+
+import argparse
+import os
+import random
+import time
+
+def build_student_responses(count, questions_count, seed):
+    """Build deterministic student records with random A-D answers"""
+    rng = random.Random(seed)
+    return [
+        {
+            'name': f"Student {i:05d}",
+            'email': f"student{i:05d}@example.com",
+            'responses': [rng.choice('ABCD') for _ in range(questions_count)]
+        }
+        for i in range(count)
+    ]
+
+def build_voice_submissions(count):
+    """Build voice submissions for the first students in the cohort"""
+    return [
+        {
+            'student_name': f"Student {i:05d}",
+            'voice_link': f"https://drive.google.com/file/d/BENCH{i:05d}/view"
+        }
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark run_complete_workflow against local stand-ins")
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--voices', type=int, default=50, help="Number of voice submissions to process")
+    parser.add_argument('--latency', default='fixed:0.05', help="Mock LLM latency distribution")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of mock LLM requests that fail")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--smtp-port', type=int, default=1, help="Local port for email delivery (closed by default)")
+    args = parser.parse_args()
+
+    from mock_llm_server import MockLLMServer
+    server = MockLLMServer(latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+    base_url = server.start()
+
+    # Configuration is read at import time, so point everything at the stand-ins first
+    os.environ['OPENAI_BASE_URL'] = base_url
+    os.environ['GOOGLE_SHEETS_BACKEND'] = 'memory'
+    os.environ['EMAIL_SMTP_SERVER'] = '127.0.0.1'
+    os.environ['EMAIL_SMTP_PORT'] = str(args.smtp_port)
+
+    from config import QUIZ_QUESTIONS_COUNT
+    from crewai_workflow import AISBOnboardingWorkflow
+    from llm_metrics import metrics
+
+    print(f"🧪 Mock LLM server: {base_url} (latency {args.latency}, error rate {args.error_rate})")
+    print(f"👥 Students: {args.students}, voice submissions: {args.voices}")
+
+    student_responses = build_student_responses(args.students, QUIZ_QUESTIONS_COUNT, args.seed)
+    voice_submissions = build_voice_submissions(args.voices)
+    topics = ["Artificial Intelligence", "Machine Learning", "Data Science", "Python Programming", "Statistics"]
+
+    workflow = AISBOnboardingWorkflow()
+    started_at = time.perf_counter()
+    result = workflow.run_complete_workflow(topics, student_responses, voice_submissions)
+    elapsed = time.perf_counter() - started_at
+
+    server.stop()
+
+    print("\n" + "=" * 50)
+    print("📊 Benchmark Summary")
+    print("=" * 50)
+    print(f"Status: {result.get('status')}")
+    print(f"Wall time: {elapsed:.2f}s ({args.students / elapsed:.0f} students/s)")
+    print(f"Mock LLM requests served: {server.request_count}")
+
+    for stage in metrics.stage_totals():
+        print(
+            f"  {stage['tag']}: {stage['calls']} calls, {stage['total_tokens']} tokens, "
+            f"{stage['latency_seconds']:.2f}s LLM time, {stage['retries']} retries, {stage['hedges']} hedges, {stage['errors']} errors"
+        )
+
+    for savings in metrics.prompt_savings_totals():
+        print(f"  ✂️ {savings['tag']}: {savings['tokens_saved']} prompt tokens saved over {savings['trimmed']} trimmed prompts")
+
+if __name__ == "__main__":
+    main()
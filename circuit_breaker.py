@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import deque
+from config import (
+    LLM_BREAKER_WINDOW,
+    LLM_BREAKER_MIN_CALLS,
+    LLM_BREAKER_ERROR_RATE,
+    LLM_BREAKER_SLOW_CALL_SECONDS,
+    LLM_BREAKER_SLOW_CALL_RATE,
+    LLM_BREAKER_OPEN_SECONDS
+)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a model whose circuit is open"""
+
+class CircuitBreaker:
+    """Trip on a high error or slow-call rate, fail fast while open, then probe before closing again"""
+
+    def __init__(self, name, window=LLM_BREAKER_WINDOW, min_calls=LLM_BREAKER_MIN_CALLS,
+                 error_rate=LLM_BREAKER_ERROR_RATE, slow_call_seconds=LLM_BREAKER_SLOW_CALL_SECONDS,
+                 slow_call_rate=LLM_BREAKER_SLOW_CALL_RATE, open_seconds=LLM_BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)  # (failed, slow) per call
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._close_listeners = []
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+
+    def add_close_listener(self, callback):
+        """Call back (with the breaker name) whenever the circuit closes after an outage"""
+        with self._lock:
+            if callback not in self._close_listeners:
+                self._close_listeners.append(callback)
+
+    def allow_request(self):
+        """Whether a call may go out now; half-open lets a single probe through"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency_seconds):
+        """Record a completed call; a slow success still counts towards the slow-call rate"""
+        slow = latency_seconds >= self.slow_call_seconds
+        listeners = []
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if slow:
+                    self._trip()
+                    return
+                self._state = CLOSED
+                self._outcomes.clear()
+                listeners = list(self._close_listeners)
+                print(f"🟢 Circuit for {self.name} closed again")
+            else:
+                self._outcomes.append((False, slow))
+                self._evaluate()
+
+        for callback in listeners:
+            try:
+                callback(self.name)
+            except Exception as e:
+                print(f"Error in circuit close listener: {e}")
+
+    def record_failure(self):
+        """Record a failed call"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trip()
+                return
+            self._outcomes.append((True, False))
+            self._evaluate()
+
+    def record_rejected(self):
+        """Record a call the API answered but refused (e.g. 400 or 422): not an outage, yet no proof of
+        recovery either, so a half-open probe slot is freed without closing the circuit"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                return
+            if self._state == CLOSED:
+                self._outcomes.append((False, False))
+                self._evaluate()
+
+    def release_probe(self):
+        """Free the half-open probe slot of a call that ended without an outcome, e.g. an abandoned stream"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def _evaluate(self):
+        if self._state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow_calls = sum(1 for _, slow in self._outcomes if slow)
+        if failures / len(self._outcomes) >= self.error_rate or slow_calls / len(self._outcomes) >= self.slow_call_rate:
+            self._trip()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        print(f"🔴 Circuit for {self.name} opened; failing fast for {self.open_seconds:.0f}s")
+
+    def stats(self):
+        with self._lock:
+            self._maybe_half_open()
+            calls = len(self._outcomes)
+            return {
+                'name': self.name,
+                'state': self._state,
+                'window_calls': calls,
+                'error_rate': round(sum(1 for failed, _ in self._outcomes if failed) / calls, 3) if calls else 0.0,
+                'slow_call_rate': round(sum(1 for _, slow in self._outcomes if slow) / calls, 3) if calls else 0.0
+            }
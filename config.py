@@ -6,6 +6,7 @@ load_dotenv()
 # Google Sheets Configuration
 GOOGLE_SHEETS_CREDENTIALS_FILE = os.getenv('GOOGLE_SHEETS_CREDENTIALS_FILE', 'credentials.json')
 GOOGLE_SHEET_ID = os.getenv('GOOGLE_SHEET_ID', '')
+GOOGLE_SHEETS_BACKEND = os.getenv('GOOGLE_SHEETS_BACKEND', 'google')  # 'google' or 'memory' (local benchmarks)
 GOOGLE_SHEET_QUIZ_QUESTIONS = 'Quiz Questions'
 GOOGLE_SHEET_STUDENT_DATA = 'Student Data'
 GOOGLE_SHEET_VOICE_SUBMISSIONS = 'Voice Submissions'
@@ -14,6 +15,93 @@ GOOGLE_SHEET_FINAL_RESULTS = 'Final Results'
 # OpenAI API Configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', '')  # Leave empty for api.openai.com; set to use mock_llm_server.py
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '10'))  # Shared HTTP pool size for all LLM calls
+LLM_REQUEST_TIMEOUT = float(os.getenv('LLM_REQUEST_TIMEOUT', '60'))  # Seconds
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))  # Retries for rate limits and transient API errors
+LLM_RETRY_BACKOFF_SECONDS = float(os.getenv('LLM_RETRY_BACKOFF_SECONDS', '1'))  # Doubles on each retry
+LLM_HEDGING_ENABLED = os.getenv('LLM_HEDGING_ENABLED', 'false').lower() == 'true'  # Duplicate slow calls after the observed latency percentile
+LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '90'))  # Per-stage latency percentile that triggers a hedge
+LLM_HEDGE_BUDGET = float(os.getenv('LLM_HEDGE_BUDGET', '0.1'))  # Max extra requests as a fraction of calls (0.1 = +10% spend)
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))  # Latencies observed per stage before hedging starts
+LLM_HEDGE_WINDOW = int(os.getenv('LLM_HEDGE_WINDOW', '200'))  # Recent latencies kept per stage
+OPENAI_FALLBACK_MODEL = os.getenv('OPENAI_FALLBACK_MODEL', '')  # Used while the primary model's circuit is open; empty = local heuristic scoring
+
+# Model Routing Configuration
+LLM_MODEL_ROUTING = os.getenv('LLM_MODEL_ROUTING', 'true').lower() == 'true'  # Pick the model per task instead of OPENAI_MODEL everywhere
+OPENAI_GENERATION_MODEL = os.getenv('OPENAI_GENERATION_MODEL', OPENAI_MODEL)  # Quiz question generation
+OPENAI_SCORING_MODEL = os.getenv('OPENAI_SCORING_MODEL', OPENAI_MODEL)  # First-pass voice scoring, e.g. a cheaper model such as gpt-4o-mini
+OPENAI_ESCALATION_MODEL = os.getenv('OPENAI_ESCALATION_MODEL', OPENAI_MODEL)  # Re-scores borderline or invalid first passes; same as the scoring model = no escalation
+VOICE_ESCALATION_MARGIN = int(os.getenv('VOICE_ESCALATION_MARGIN', '1'))  # Scores within this many marks of VOICE_PASSING_MARKS escalate
+
+# Circuit Breaker Configuration
+LLM_BREAKER_ENABLED = os.getenv('LLM_BREAKER_ENABLED', 'true').lower() == 'true'  # Fail fast when a model is degraded
+LLM_BREAKER_WINDOW = int(os.getenv('LLM_BREAKER_WINDOW', '20'))  # Recent calls per model considered
+LLM_BREAKER_MIN_CALLS = int(os.getenv('LLM_BREAKER_MIN_CALLS', '5'))  # Calls in the window before the breaker can trip
+LLM_BREAKER_ERROR_RATE = float(os.getenv('LLM_BREAKER_ERROR_RATE', '0.5'))  # Failed-call fraction that opens the circuit
+LLM_BREAKER_SLOW_CALL_SECONDS = float(os.getenv('LLM_BREAKER_SLOW_CALL_SECONDS', '30'))  # Calls at least this slow count as slow
+LLM_BREAKER_SLOW_CALL_RATE = float(os.getenv('LLM_BREAKER_SLOW_CALL_RATE', '0.8'))  # Slow-call fraction that opens the circuit
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv('LLM_BREAKER_OPEN_SECONDS', '30'))  # Time before a probe call is let through
+
+# LLM Pricing (USD per 1K prompt tokens, per 1K completion tokens) used for cost accounting
+LLM_PRICING_PER_1K_TOKENS = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-4o': (0.0025, 0.01),
+    'gpt-4-turbo': (0.01, 0.03),
+    'gpt-4': (0.03, 0.06)
+}
+LLM_METRICS_MAX_CALLS = int(os.getenv('LLM_METRICS_MAX_CALLS', '5000'))  # Recent call records kept for export; totals cover every call
+
+# Structured Output Configuration
+LLM_STRUCTURED_OUTPUT = os.getenv('LLM_STRUCTURED_OUTPUT', 'true').lower() == 'true'  # JSON responses instead of text parsing
+LLM_MAX_REPAIR_ATTEMPTS = int(os.getenv('LLM_MAX_REPAIR_ATTEMPTS', '2'))  # Re-asks for invalid items only
+OPENAI_JSON_SCHEMA_STRICT = os.getenv('OPENAI_JSON_SCHEMA_STRICT', 'false').lower() == 'true'  # Needs a model with structured outputs
+
+# Prompt Budget Configuration
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '3000'))  # Max tokens for an analysis prompt, instructions included
+TRANSCRIPT_TOKEN_BUDGET = int(os.getenv('TRANSCRIPT_TOKEN_BUDGET', '1500'))  # Max transcript tokens (a 1-minute intro is ~200)
+TRANSCRIPT_TRIM_MODE = os.getenv('TRANSCRIPT_TRIM_MODE', 'summarize')  # 'summarize' (extractive) or 'truncate' (head and tail)
+
+# Transcription Configuration
+TRANSCRIPTION_ENGINE = os.getenv('TRANSCRIPTION_ENGINE', 'simulated')  # 'simulated', 'whisper', 'vosk' or 'fake' (tests)
+TRANSCRIPTION_WORKERS = int(os.getenv('TRANSCRIPTION_WORKERS', '0'))  # Worker processes; 0 = one per available CPU core
+WHISPER_MODEL_SIZE = os.getenv('WHISPER_MODEL_SIZE', 'base.en')  # faster-whisper model name or path
+VOSK_MODEL_PATH = os.getenv('VOSK_MODEL_PATH', 'models/vosk-model-small-en-us-0.15')
+AUDIO_DIR = os.getenv('AUDIO_DIR', 'data/audio')  # Local recordings named <Drive file ID>.<extension>
+AUDIO_CACHE_DIR = os.getenv('AUDIO_CACHE_DIR', 'data/audio_cache')  # Downloaded recordings, stored by content hash
+AUDIO_MAX_DOWNLOAD_MB = float(os.getenv('AUDIO_MAX_DOWNLOAD_MB', '50'))  # Larger recordings are rejected while streaming
+AUDIO_FETCH_CHUNK_BYTES = int(os.getenv('AUDIO_FETCH_CHUNK_BYTES', str(256 * 1024)))
+AUDIO_FETCH_TIMEOUT = float(os.getenv('AUDIO_FETCH_TIMEOUT', '60'))  # Seconds without data before a download fails
+AUDIO_FETCH_WORKERS = int(os.getenv('AUDIO_FETCH_WORKERS', '4'))  # Concurrent downloads
+AUDIO_URL_ALLOW_PRIVATE_HOSTS = os.getenv('AUDIO_URL_ALLOW_PRIVATE_HOSTS', 'false').lower() == 'true'  # Let submitted links reach private/loopback addresses (local test servers only)
+DRIVE_DOWNLOAD_URL = os.getenv('DRIVE_DOWNLOAD_URL', 'https://drive.google.com/uc?export=download&id={file_id}')  # Point at mock_drive_server.py for tests
+CAPTIONS_DIR = os.getenv('CAPTIONS_DIR', 'data/captions')  # Local YouTube captions named <video ID>.txt, checked before the API
+YOUTUBE_CAPTIONS_ENABLED = os.getenv('YOUTUBE_CAPTIONS_ENABLED', 'true').lower() == 'true'  # Use existing captions before transcribing
+YOUTUBE_CAPTION_LANGUAGES = os.getenv('YOUTUBE_CAPTION_LANGUAGES', 'en,en-US,en-GB').split(',')
+AUDIO_PREPROCESS_ENABLED = os.getenv('AUDIO_PREPROCESS_ENABLED', 'true').lower() == 'true'  # Decode, resample and VAD-trim before transcribing
+AUDIO_PREPROCESSED_DIR = os.getenv('AUDIO_PREPROCESSED_DIR', 'data/audio_preprocessed')
+AUDIO_SAMPLE_RATE = int(os.getenv('AUDIO_SAMPLE_RATE', '16000'))  # Mono PCM rate handed to the transcription engine
+AUDIO_MAX_DURATION_SECONDS = float(os.getenv('AUDIO_MAX_DURATION_SECONDS', '90'))  # Introductions are meant to be 1 minute
+AUDIO_OVERLONG_POLICY = os.getenv('AUDIO_OVERLONG_POLICY', 'truncate')  # 'truncate' to the limit or 'reject'
+AUDIO_VAD_AGGRESSIVENESS = int(os.getenv('AUDIO_VAD_AGGRESSIVENESS', '2'))  # 0-3, higher trims more; webrtcvad is used when installed
+AUDIO_MAX_PAUSE_SECONDS = float(os.getenv('AUDIO_MAX_PAUSE_SECONDS', '1.0'))  # Longer silences inside the speech are shortened
+
+# Voice Pre-scoring Configuration
+VOICE_PRESCREEN_ENABLED = os.getenv('VOICE_PRESCREEN_ENABLED', 'true').lower() == 'true'  # Fail clearly unusable submissions without an LLM call
+VOICE_MIN_WORDS = int(os.getenv('VOICE_MIN_WORDS', '15'))  # Fewer transcribed words is a confident reject
+VOICE_MIN_SPEECH_SECONDS = float(os.getenv('VOICE_MIN_SPEECH_SECONDS', '5'))  # Less detected speech is a confident reject
+VOICE_FEATURES_IN_PROMPT = os.getenv('VOICE_FEATURES_IN_PROMPT', 'true').lower() == 'true'  # Add delivery signals to the scoring prompt
+
+# Voice Pipeline Configuration
+VOICE_PIPELINE_ENABLED = os.getenv('VOICE_PIPELINE_ENABLED', 'true').lower() == 'true'  # Overlap fetching, transcription and scoring
+VOICE_PIPELINE_QUEUE_SIZE = int(os.getenv('VOICE_PIPELINE_QUEUE_SIZE', '8'))  # Items waiting between two stages before the earlier one blocks
+VOICE_PIPELINE_PREPROCESS_WORKERS = int(os.getenv('VOICE_PIPELINE_PREPROCESS_WORKERS', '2'))
+VOICE_PIPELINE_SCORE_WORKERS = int(os.getenv('VOICE_PIPELINE_SCORE_WORKERS', '4'))  # Concurrent LLM scoring calls
+
+# Analysis Memo Configuration
+ANALYSIS_MEMO_ENABLED = os.getenv('ANALYSIS_MEMO_ENABLED', 'true').lower() == 'true'  # Reuse transcripts and analyses per recording
+ANALYSIS_MEMO_PATH = os.getenv('ANALYSIS_MEMO_PATH', 'data/analysis_memo.db')
 
 # Email Configuration
 EMAIL_SMTP_SERVER = os.getenv('EMAIL_SMTP_SERVER', 'smtp.gmail.com')
@@ -21,11 +109,51 @@ EMAIL_SMTP_PORT = int(os.getenv('EMAIL_SMTP_PORT', '587'))
 EMAIL_USERNAME = os.getenv('EMAIL_USERNAME', '')
 EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD', '')
 FROM_EMAIL = os.getenv('FROM_EMAIL', '')
+EMAIL_SMTP_USE_TLS = os.getenv('EMAIL_SMTP_USE_TLS', 'true').lower() == 'true'  # STARTTLS; port 465 always uses implicit TLS
+EMAIL_SMTP_POOL_SIZE = int(os.getenv('EMAIL_SMTP_POOL_SIZE', '0'))  # Long-lived SMTP sessions (and send workers); 0 = provider default
+EMAIL_SMTP_TIMEOUT = float(os.getenv('EMAIL_SMTP_TIMEOUT', '30'))
+EMAIL_SMTP_NOOP_AFTER_SECONDS = float(os.getenv('EMAIL_SMTP_NOOP_AFTER_SECONDS', '30'))  # Health-check sessions idle longer than this
+EMAIL_SMTP_MAX_IDLE_SECONDS = float(os.getenv('EMAIL_SMTP_MAX_IDLE_SECONDS', '240'))  # Drop sessions the server has likely timed out
+EMAIL_SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv('EMAIL_SMTP_MAX_MESSAGES_PER_CONNECTION', '100'))
+EMAIL_RATE_PER_MINUTE = int(os.getenv('EMAIL_RATE_PER_MINUTE', '0'))  # 0 = provider default
+EMAIL_RATE_PER_DAY = int(os.getenv('EMAIL_RATE_PER_DAY', '0'))  # 0 = provider default
+EMAIL_QUOTA_PATH = os.getenv('EMAIL_QUOTA_PATH', 'data/email_quota.json')  # Messages sent today per provider, kept across restarts
+EMAIL_OUTBOX_ENABLED = os.getenv('EMAIL_OUTBOX_ENABLED', 'true').lower() == 'true'  # Queue emails durably and deliver in the background
+EMAIL_OUTBOX_PATH = os.getenv('EMAIL_OUTBOX_PATH', 'data/email_outbox.db')
+EMAIL_COHORT = os.getenv('EMAIL_COHORT', '')  # Part of each email's idempotency key; set one per intake, empty = the quiz link for invitations, else one cohort for every run
+EMAIL_SEND_WAIT_SECONDS = float(os.getenv('EMAIL_SEND_WAIT_SECONDS', '0'))  # How long a single send waits for the outbox to deliver; 0 = return once queued
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = float(os.getenv('EMAIL_OUTBOX_RETRY_BASE_SECONDS', '30'))  # Doubles after each failed attempt
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv('EMAIL_OUTBOX_POLL_SECONDS', '2'))
+EMAIL_OUTBOX_FLUSH_SECONDS = float(os.getenv('EMAIL_OUTBOX_FLUSH_SECONDS', '30'))  # How long a script waits at exit for queued emails
+
+# Sessions, messages per minute and messages per day by SMTP host suffix
+# (Gmail: 2,000/day on Google Workspace, 500/day on personal accounts)
+EMAIL_PROVIDER_LIMITS = {
+    'gmail.com': (3, 60, 2000),
+    'office365.com': (3, 30, 10000),
+    'outlook.com': (2, 30, 300),
+    'sendgrid.net': (8, 600, 100000),
+    'amazonaws.com': (8, 600, 50000),
+    'mailgun.org': (8, 300, 100000)
+}
+EMAIL_DEFAULT_PROVIDER_LIMITS = (2, 30, 1000)
 
 # Application Configuration
 TOP_STUDENTS_COUNT = 10
 FINAL_SELECTION_COUNT = 5
 QUIZ_QUESTIONS_COUNT = 10
+QUIZ_STREAM_FLUSH_SIZE = int(os.getenv('QUIZ_STREAM_FLUSH_SIZE', '3'))  # Questions per Sheets write while streaming
+QUIZ_GENERATION_MODE = os.getenv('QUIZ_GENERATION_MODE', 'single')  # 'single' prompt or 'sharded' (one parallel call per topic)
+QUIZ_SHARD_WORKERS = int(os.getenv('QUIZ_SHARD_WORKERS', '4'))  # Concurrent shard requests
+QUIZ_TOPUP_MAX_ATTEMPTS = int(os.getenv('QUIZ_TOPUP_MAX_ATTEMPTS', '2'))  # Follow-up requests for missing questions when a quiz comes back short
+QUIZ_TOPUP_MAX_EXCLUSIONS = int(os.getenv('QUIZ_TOPUP_MAX_EXCLUSIONS', '50'))  # Accepted questions listed in a top-up prompt as exclusions
+
+# Question Bank Configuration
+QUESTION_BANK_ENABLED = os.getenv('QUESTION_BANK_ENABLED', 'true').lower() == 'true'  # Reuse stored questions per topic
+QUESTION_BANK_PATH = os.getenv('QUESTION_BANK_PATH', 'data/question_bank.db')
+QUESTION_BANK_TOPUP_SIZE = int(os.getenv('QUESTION_BANK_TOPUP_SIZE', '10'))  # Questions generated when a topic runs short
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.6'))  # Estimated Jaccard similarity treated as a duplicate
 
 # Passing Criteria
 QUIZ_PASSING_MARKS = 7  # Out of 10 questions (70%)
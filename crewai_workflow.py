@@ -5,6 +5,7 @@ from agents.top10_extractor_agent import Top10ExtractorAgent
 from agents.voice_checker_agent import VoiceCheckerAgent
 from agents.finalizer_agent import FinalizerAgent
 from google_sheets_manager import GoogleSheetsManager
+from llm_metrics import metrics
 import time
 
 class AISBOnboardingWorkflow:
@@ -18,6 +19,7 @@ class AISBOnboardingWorkflow:
     
     def run_complete_workflow(self, topics, student_responses=None, voice_submissions=None):
         """Run the complete AISB onboarding workflow"""
+        run_id = metrics.start_run('run_complete_workflow')
         try:
             print("🚀 Starting AISB Onboarding Workflow...")
             
@@ -77,20 +79,29 @@ class AISBOnboardingWorkflow:
         except Exception as e:
             print(f"❌ Error in workflow: {e}")
             return {"status": "error", "message": str(e)}
+        finally:
+            metrics.end_run(run_id)
     
-    def run_quiz_generation_only(self, topics):
-        """Run only the quiz generation step"""
+    def run_quiz_generation_only(self, topics, on_question=None):
+        """Run only the quiz generation step, streaming questions to on_question when given"""
+        run_id = metrics.start_run('run_quiz_generation_only')
         try:
             print("📝 Generating Quiz Questions...")
             self.sheets_manager.create_sheets_if_not_exist()
-            quiz_questions = self.quiz_generator.generate_quiz_questions(topics)
+            if on_question:
+                quiz_questions = self.quiz_generator.generate_quiz_questions_stream(topics, on_question)
+            else:
+                quiz_questions = self.quiz_generator.generate_quiz_questions(topics)
             return {"status": "completed", "quiz_questions": quiz_questions}
         except Exception as e:
             print(f"❌ Error generating quiz: {e}")
             return {"status": "error", "message": str(e)}
+        finally:
+            metrics.end_run(run_id)
     
     def run_quiz_checking_only(self, student_responses):
         """Run only the quiz checking step"""
+        run_id = metrics.start_run('run_quiz_checking_only')
         try:
             print("📊 Checking Quiz Responses...")
             quiz_results = self.quiz_checker.check_quiz_responses(student_responses)
@@ -98,9 +109,12 @@ class AISBOnboardingWorkflow:
         except Exception as e:
             print(f"❌ Error checking quiz: {e}")
             return {"status": "error", "message": str(e)}
+        finally:
+            metrics.end_run(run_id)
     
     def run_top10_extraction_only(self):
         """Run only the top 10 extraction step"""
+        run_id = metrics.start_run('run_top10_extraction_only')
         try:
             print("🏆 Extracting Top 10 Students...")
             top_students = self.top10_extractor.extract_top_students()
@@ -108,9 +122,12 @@ class AISBOnboardingWorkflow:
         except Exception as e:
             print(f"❌ Error extracting top students: {e}")
             return {"status": "error", "message": str(e)}
+        finally:
+            metrics.end_run(run_id)
     
     def run_video_processing_only(self, voice_submissions):
         """Run only the voice processing step (keeping method name for compatibility)"""
+        run_id = metrics.start_run('run_video_processing_only')
         try:
             print("🎵 Processing Voice Submissions...")
             voice_results = self.voice_checker.process_voice_submissions(voice_submissions)
@@ -118,9 +135,12 @@ class AISBOnboardingWorkflow:
         except Exception as e:
             print(f"❌ Error processing voices: {e}")
             return {"status": "error", "message": str(e)}
+        finally:
+            metrics.end_run(run_id)
     
     def run_finalization_only(self):
         """Run only the finalization step"""
+        run_id = metrics.start_run('run_finalization_only')
         try:
             print("🎯 Finalizing Selection...")
             final_selection = self.finalizer.finalize_selection()
@@ -128,6 +148,8 @@ class AISBOnboardingWorkflow:
         except Exception as e:
             print(f"❌ Error finalizing selection: {e}")
             return {"status": "error", "message": str(e)}
+        finally:
+            metrics.end_run(run_id)
     
     def get_workflow_status(self):
         """Get current workflow status from Google Sheets"""
@@ -0,0 +1,187 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from config import EMAIL_RATE_PER_MINUTE, EMAIL_RATE_PER_DAY, EMAIL_QUOTA_PATH
+from smtp_pool import provider_limits
+
+# The day's count is written at most this often while sending, and again at exit
+QUOTA_SAVE_INTERVAL_SECONDS = 1.0
+
+class DailyLimitReached(RuntimeError):
+    """Raised when today's sending quota for a provider is used up"""
+
+class RateLimiter:
+    """Sliding one-minute window plus a per-day quota that is kept on disk so restarts do not reset it"""
+
+    def __init__(self, name, per_minute, per_day, quota_path=EMAIL_QUOTA_PATH):
+        self.name = name
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.quota_path = quota_path
+        self._lock = threading.Lock()
+        self._window = deque()
+        self._day, self._sent_today = self._load_quota()
+        self._saved_count = self._sent_today
+        self._saved_at = time.monotonic()
+
+    def _load_quota(self):
+        today = date.today().isoformat()
+        try:
+            with open(self.quota_path, encoding='utf-8') as f:
+                entry = json.load(f).get(self.name, {})
+            if entry.get('date') == today:
+                return today, int(entry.get('sent', 0))
+        except (OSError, ValueError):
+            pass
+        return today, 0
+
+    def _save_quota(self):
+        try:
+            with open(self.quota_path, encoding='utf-8') as f:
+                quotas = json.load(f)
+        except (OSError, ValueError):
+            quotas = {}
+        quotas[self.name] = {'date': self._day, 'sent': self._sent_today}
+        directory = os.path.dirname(self.quota_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.quota_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(quotas, f)
+        os.replace(self.quota_path + '.tmp', self.quota_path)
+        self._saved_count = self._sent_today
+        self._saved_at = time.monotonic()
+
+    def flush(self):
+        """Write the day's count if it changed since the last save"""
+        with self._lock:
+            if self._sent_today != self._saved_count:
+                self._save_quota()
+
+    @property
+    def remaining_today(self):
+        with self._lock:
+            self._roll_day()
+            return max(0, self.per_day - self._sent_today)
+
+    def _roll_day(self):
+        today = date.today().isoformat()
+        if today != self._day:
+            self._day, self._sent_today = today, 0
+
+    def reserve(self):
+        """Take a send slot and return 0, or return the seconds until one frees up without taking it;
+        raise DailyLimitReached when today's quota is spent"""
+        with self._lock:
+            self._roll_day()
+            if self._sent_today >= self.per_day:
+                raise DailyLimitReached(f"Daily limit of {self.per_day} emails reached for {self.name}")
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= 60:
+                self._window.popleft()
+            if len(self._window) < self.per_minute:
+                self._window.append(now)
+                self._sent_today += 1
+                # A file write per message would cost more than rendering it
+                if now - self._saved_at >= QUOTA_SAVE_INTERVAL_SECONDS or self._sent_today >= self.per_day:
+                    self._save_quota()
+                return 0
+            return 60 - (now - self._window[0])
+
+    def release(self):
+        """Give back a reserved slot whose message was not delivered, so it does not use up today's quota.
+        The per-minute window keeps the slot, which only paces the next attempts."""
+        with self._lock:
+            self._roll_day()
+            if self._sent_today > 0:
+                self._sent_today -= 1
+
+    def acquire(self):
+        """Block until a send fits in the per-minute window; raise DailyLimitReached when today's quota is spent"""
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(host):
+    """Process-wide limiter for an SMTP host, so every sender shares its quota"""
+    _, per_minute, per_day = provider_limits(host)
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = RateLimiter(host, EMAIL_RATE_PER_MINUTE or per_minute, EMAIL_RATE_PER_DAY or per_day)
+        return _limiters[host]
+
+def flush_rate_limiters():
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    for limiter in limiters:
+        try:
+            limiter.flush()
+        except OSError as e:
+            print(f"Error saving email quota for {limiter.name}: {e}")
+
+atexit.register(flush_rate_limiters)
+
+def bulk_result(recipient):
+    """Result of one bulk send, failed until marked otherwise"""
+    return {'email': recipient['email'], 'name': recipient['name'], 'success': False, 'status': 'failed', 'error': '', 'deferred': False}
+
+def mark_outcome(result, error=None):
+    if error is None:
+        result.update(success=True, status='sent')
+    elif isinstance(error, DailyLimitReached):
+        # Left for a later run rather than failed
+        result.update(error=str(error), deferred=True, status='deferred')
+    else:
+        result['error'] = str(error)
+        print(f"Error sending email to {result['email']}: {error}")
+    return result
+
+def report_bulk(results, email_type, elapsed, workers):
+    sent = sum(1 for result in results if result['success'])
+    deferred = sum(1 for result in results if result['deferred'])
+    print(f"📧 Sent {sent}/{len(results)} '{email_type}' emails in {elapsed:.1f}s "
+          f"with {workers} workers" + (f", {deferred} deferred by the daily limit" if deferred else ""))
+
+class EmailDispatcher:
+    """Send a batch of emails from a worker pool sized to the provider's SMTP sessions, within its rate limits"""
+
+    def __init__(self, email_service, workers=None):
+        self.email_service = email_service
+        self.workers = workers or email_service.smtp_pool.size
+
+    def _send_one(self, recipient, message):
+        try:
+            self.email_service.deliver_message(recipient['email'], message)
+        except Exception as e:
+            return mark_outcome(bulk_result(recipient), e)
+        return mark_outcome(bulk_result(recipient))
+
+    def send_bulk(self, recipients, email_type, on_result=None, **kwargs):
+        """Send one email per recipient and return per-recipient results in input order.
+        on_result(result) is called on the calling thread as each send finishes."""
+        results = [None] * len(recipients)
+        started = time.perf_counter()
+        # Every message is rendered up front from the precompiled template; the workers only send
+        messages = self.email_service.render_messages(recipients, email_type, **kwargs)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='email') as executor:
+            futures = {
+                executor.submit(self._send_one, recipient, message): index
+                for index, (recipient, (_, message)) in enumerate(zip(recipients, messages))
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                if on_result:
+                    on_result(result)
+
+        report_bulk(results, email_type, time.perf_counter() - started, self.workers)
+        return results
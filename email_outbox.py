@@ -0,0 +1,325 @@
+import atexit
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from config import (
+    EMAIL_OUTBOX_PATH,
+    EMAIL_OUTBOX_MAX_ATTEMPTS,
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS,
+    EMAIL_OUTBOX_POLL_SECONDS,
+    EMAIL_OUTBOX_FLUSH_SECONDS
+)
+from email_dispatcher import DailyLimitReached
+
+# A message still marked as sending after this long belongs to a process that died mid-send
+CLAIM_LEASE_SECONDS = 600
+# Messages a drainer worker claims at a time
+CLAIM_BATCH_SIZE = 4
+MAX_RETRY_DELAY_SECONDS = 3600
+
+def idempotency_key(email, email_type, cohort):
+    """One message of a type per student and cohort, however many times it is requested"""
+    return f"{cohort}:{email_type}:{email.strip().lower()}"
+
+def is_permanent_error(error):
+    """Errors that retrying cannot fix: refused recipients and other 5xx replies"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+class EmailOutbox:
+    """Persistent SQLite outbox of rendered emails with their delivery status, keyed by idempotency key"""
+
+    def __init__(self, db_path=EMAIL_OUTBOX_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        """Open the database on first use and create the schema"""
+        if self._connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            self._connection.row_factory = sqlite3.Row
+            # Every claim and status change is its own commit; WAL keeps those cheap and lets readers run alongside
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    key TEXT PRIMARY KEY,
+                    email TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    email_type TEXT NOT NULL,
+                    cohort TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    is_html INTEGER NOT NULL DEFAULT 0,
+                    html_body TEXT,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    claim_token TEXT,
+                    claimed_at REAL,
+                    last_error TEXT NOT NULL DEFAULT '',
+                    created_at TEXT NOT NULL,
+                    sent_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_outbox_ready ON outbox (status, next_attempt_at);
+            """)
+            columns = {row['name'] for row in self._connection.execute("PRAGMA table_info(outbox)")}
+            if 'html_body' not in columns:
+                # Outboxes created before messages carried an HTML alternative
+                self._connection.execute("ALTER TABLE outbox ADD COLUMN html_body TEXT")
+                self._connection.commit()
+        return self._connection
+
+    def enqueue(self, email, name, email_type, cohort, subject, body, is_html=False, html_body=None):
+        """Queue a message unless one with the same key already exists; returns the stored record"""
+        key = idempotency_key(email, email_type, cohort)
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                """INSERT OR IGNORE INTO outbox
+                   (key, email, name, email_type, cohort, subject, body, is_html, html_body, next_attempt_at, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (key, email.strip(), name, email_type, cohort, subject, body, int(is_html), html_body, time.time(),
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+            connection.commit()
+            return self._get(connection, key)
+
+    def _get(self, connection, key):
+        row = connection.execute(
+            """SELECT key, email, name, email_type, cohort, status, attempts, last_error, created_at, sent_at
+               FROM outbox WHERE key = ?""",
+            (key,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get(self, key):
+        """Delivery record for an idempotency key, or None"""
+        with self._lock:
+            return self._get(self._connect(), key)
+
+    def wait_for_delivery(self, key, timeout, poll_seconds=0.05):
+        """Wait until a message is sent or failed, or the timeout passes; returns its record"""
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self.get(key)
+            if record is None or record['status'] in ('sent', 'failed') or time.monotonic() >= deadline:
+                return record
+            time.sleep(poll_seconds)
+
+    def claim(self, limit=1):
+        """Mark up to `limit` messages that are due as sending and return them with their content"""
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            # One UPDATE, so two processes draining the same outbox never claim the same message
+            connection.execute(
+                """UPDATE outbox SET status = 'sending', claim_token = ?, claimed_at = ?
+                   WHERE key IN (
+                       SELECT key FROM outbox
+                       WHERE (status = 'queued' AND next_attempt_at <= ?)
+                          OR (status = 'sending' AND claimed_at < ?)
+                       ORDER BY next_attempt_at LIMIT ?
+                   )""",
+                (token, now, now, now - CLAIM_LEASE_SECONDS, limit)
+            )
+            connection.commit()
+            rows = connection.execute("SELECT * FROM outbox WHERE claim_token = ? AND status = 'sending'", (token,))
+            return [dict(row) for row in rows]
+
+    def _update(self, key, token, **fields):
+        """Update a claimed message; False if its claim has lapsed and another worker has taken it over"""
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._lock:
+            connection = self._connect()
+            updated = connection.execute(
+                f"UPDATE outbox SET {assignments} WHERE key = ? AND claim_token = ?",
+                (*fields.values(), key, token)
+            ).rowcount
+            connection.commit()
+            return updated > 0
+
+    def mark_sent(self, key, claim_token, attempts):
+        return self._update(key, claim_token, status='sent', attempts=attempts, last_error='', claim_token=None,
+                            sent_at=datetime.now().isoformat(timespec='seconds'))
+
+    def mark_failed(self, key, claim_token, attempts, error):
+        return self._update(key, claim_token, status='failed', attempts=attempts, last_error=error, claim_token=None)
+
+    def reschedule(self, key, claim_token, attempts, error, delay_seconds):
+        """Put a message back in the queue to be tried again after a delay"""
+        return self._update(key, claim_token, status='queued', attempts=attempts, last_error=error, claim_token=None,
+                            next_attempt_at=time.time() + delay_seconds)
+
+    def retry_failed(self, cohort=None):
+        """Queue failed messages again; returns the number requeued"""
+        query = "UPDATE outbox SET status = 'queued', attempts = 0, next_attempt_at = ? WHERE status = 'failed'"
+        params = [time.time()]
+        if cohort is not None:
+            query += " AND cohort = ?"
+            params.append(cohort)
+        with self._lock:
+            connection = self._connect()
+            requeued = connection.execute(query, params).rowcount
+            connection.commit()
+            return requeued
+
+    def records(self, cohort=None, email_type=None, status=None):
+        """Delivery records, newest first, optionally filtered"""
+        conditions, params = [], []
+        for column, value in (('cohort', cohort), ('email_type', email_type), ('status', status)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._connect().execute(
+                f"""SELECT key, email, name, email_type, cohort, status, attempts, last_error, created_at, sent_at
+                    FROM outbox {where} ORDER BY created_at DESC, key""",
+                params
+            )
+            return [dict(row) for row in rows]
+
+    def counts(self, cohort=None):
+        """Number of messages per status"""
+        query = "SELECT status, COUNT(*) AS count FROM outbox"
+        params = ()
+        if cohort is not None:
+            query += " WHERE cohort = ?"
+            params = (cohort,)
+        with self._lock:
+            rows = self._connect().execute(query + " GROUP BY status", params)
+            return {row['status']: row['count'] for row in rows}
+
+    def ready_count(self, due_by=None):
+        """Messages being sent or due by a time (default now)"""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM outbox WHERE status = 'sending' OR (status = 'queued' AND next_attempt_at <= ?)",
+                (due_by or time.time(),)
+            ).fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+class OutboxDrainer:
+    """Background workers that deliver queued messages, retrying transient failures with exponential backoff"""
+
+    def __init__(self, outbox, email_service, workers=None, poll_seconds=EMAIL_OUTBOX_POLL_SECONDS,
+                 max_attempts=EMAIL_OUTBOX_MAX_ATTEMPTS, retry_base_seconds=EMAIL_OUTBOX_RETRY_BASE_SECONDS):
+        self.outbox = outbox
+        self.email_service = email_service
+        self.workers = workers or email_service.smtp_pool.size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"email-outbox-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        print(f"📬 Email outbox drainer started with {self.workers} workers")
+
+    def wake(self):
+        """Check for new messages now rather than at the next poll"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                messages = self.outbox.claim(CLAIM_BATCH_SIZE)
+            except Exception as e:
+                print(f"Error reading email outbox: {e}")
+                messages = []
+            if not messages:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+            for message in messages:
+                self._deliver(message)
+
+    def _deliver(self, message):
+        key, token = message['key'], message['claim_token']
+        attempts = message['attempts'] + 1
+        try:
+            self.email_service.deliver(message['email'], message['subject'], message['body'], bool(message['is_html']),
+                                       message['html_body'])
+        except DailyLimitReached as e:
+            # Not the message's fault: hold it until the quota resets, without using up an attempt
+            tomorrow = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
+            self.outbox.reschedule(key, token, message['attempts'], str(e),
+                                   (tomorrow - datetime.now()).total_seconds())
+            print(f"⏳ {message['key']} deferred until the daily limit resets")
+            return
+        except Exception as e:
+            if is_permanent_error(e) or attempts >= self.max_attempts:
+                self.outbox.mark_failed(key, token, attempts, str(e))
+                print(f"Error sending email to {message['email']} after {attempts} attempts: {e}")
+            else:
+                delay = min(MAX_RETRY_DELAY_SECONDS, self.retry_base_seconds * 2 ** (attempts - 1))
+                self.outbox.reschedule(key, token, attempts, str(e), delay)
+                print(f"🔁 Email to {message['email']} failed ({e}), retrying in {delay:.0f}s")
+            return
+        if not self.outbox.mark_sent(key, token, attempts):
+            print(f"⚠️ Claim on {key} lapsed before it was marked sent; another worker has taken it over")
+
+    def flush(self, timeout=EMAIL_OUTBOX_FLUSH_SECONDS):
+        """Wait for messages due within the timeout, retries included; returns True if none are left"""
+        deadline = time.monotonic() + timeout
+        due_by = time.time() + timeout
+        self.wake()
+        while self.outbox.ready_count(due_by):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+_drainers = {}
+_drainers_lock = threading.Lock()
+
+def get_outbox_drainer(email_service, db_path=EMAIL_OUTBOX_PATH):
+    """Process-wide outbox and running drainer for a database path"""
+    with _drainers_lock:
+        if db_path not in _drainers:
+            _drainers[db_path] = OutboxDrainer(EmailOutbox(db_path), email_service)
+        drainer = _drainers[db_path]
+    drainer.start()
+    return drainer
+
+def flush_outboxes():
+    """Give queued messages a chance to go out before a script exits; anything left is sent on the next run"""
+    with _drainers_lock:
+        drainers = list(_drainers.values())
+    for drainer in drainers:
+        if not drainer.flush():
+            counts = drainer.outbox.counts()
+            print(f"📬 {counts.get('queued', 0) + counts.get('sending', 0)} emails still queued in {drainer.outbox.db_path}; they will be sent on the next run")
+        drainer.stop()
+
+atexit.register(flush_outboxes)
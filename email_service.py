@@ -1,13 +1,26 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import asyncio
+import time
 from config import (
     EMAIL_SMTP_SERVER,
     EMAIL_SMTP_PORT,
     EMAIL_USERNAME,
     EMAIL_PASSWORD,
-    FROM_EMAIL
+    FROM_EMAIL,
+    EMAIL_OUTBOX_ENABLED,
+    EMAIL_OUTBOX_PATH,
+    EMAIL_COHORT,
+    EMAIL_SEND_WAIT_SECONDS
 )
+from async_smtp import AsyncSMTPPool
+from email_dispatcher import EmailDispatcher, get_rate_limiter, bulk_result, mark_outcome, report_bulk
+from email_outbox import get_outbox_drainer
+from email_templates import MessageRenderer, get_template
+from smtp_pool import get_smtp_pool
+
+def email_cohort(run_id=None):
+    """Cohort for an email's idempotency key: EMAIL_COHORT, else the quiz or run id passed by the caller.
+    Never the calendar date, so a rerun on a later day is still recognised as a duplicate"""
+    return EMAIL_COHORT or run_id or 'default'
 
 class EmailService:
     def __init__(self):
@@ -16,156 +29,226 @@ class EmailService:
         self.username = EMAIL_USERNAME
         self.password = EMAIL_PASSWORD
         self.from_email = FROM_EMAIL
+        self.renderer = MessageRenderer(self.from_email)
+        self.smtp_pool = get_smtp_pool(self.smtp_server, self.smtp_port, self.username, self.password)
+        self.rate_limiter = get_rate_limiter(self.smtp_server)
+        self.use_outbox = EMAIL_OUTBOX_ENABLED
+        self._drainer = None
+    
+    @property
+    def outbox_drainer(self):
+        """Background drainer of the outbox, started on first use"""
+        if self._drainer is None:
+            self._drainer = get_outbox_drainer(self, EMAIL_OUTBOX_PATH)
+        return self._drainer
+    
+    @property
+    def outbox(self):
+        return self.outbox_drainer.outbox
     
-    def send_email(self, to_email, subject, body, is_html=False):
+    def deliver(self, to_email, subject, body, is_html=False, html_body=None):
+        """Send an email, raising on failure; waits for the provider's per-minute limit and
+        raises DailyLimitReached once today's quota is spent.
+        With html_body the message carries both the plain-text body and its HTML alternative."""
+        if is_html:
+            message = self.renderer.render(to_email, subject, None, body)
+        else:
+            message = self.renderer.render(to_email, subject, body, html_body)
+        self.deliver_message(to_email, message)
+    
+    def deliver_message(self, to_email, message):
+        """Send an already rendered message, raising on failure"""
+        self.rate_limiter.acquire()
+        try:
+            # Send over a pooled session instead of a new TLS handshake and login per message
+            self.smtp_pool.send(self.from_email, to_email, message)
+        except Exception:
+            # Not delivered, so it does not count against the daily quota
+            self.rate_limiter.release()
+            raise
+    
+    def send_email(self, to_email, subject, body, is_html=False, html_body=None):
         """Send an email to a recipient"""
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-            msg['Subject'] = subject
-            
-            # Add body
-            if is_html:
-                msg.attach(MIMEText(body, 'html'))
-            else:
-                msg.attach(MIMEText(body, 'plain'))
-            
-            # Connect to server and send email
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.username, self.password)
-            text = msg.as_string()
-            server.sendmail(self.from_email, to_email, text)
-            server.quit()
-            
+            self.deliver(to_email, subject, body, is_html, html_body)
             print(f"Email sent successfully to {to_email}")
             return True
         except Exception as e:
             print(f"Error sending email to {to_email}: {e}")
             return False
     
-    def send_quiz_invitation(self, student_email, student_name, quiz_link):
+    def build_message(self, email_type, student_name, **kwargs):
+        """Subject, plain-text body and HTML body of an email type for one student"""
+        return get_template(email_type).render(student_name=student_name, **kwargs)
+    
+    def render_messages(self, email_list, email_type, **kwargs):
+        """(email, rendered message) per recipient from the precompiled template; timing is in renderer.last_batch_stats"""
+        return self.renderer.render_batch(get_template(email_type), email_list, **kwargs)
+    
+    def queue_email(self, student_email, student_name, email_type, cohort=None, **kwargs):
+        """Add an email to the outbox for background delivery and return its delivery record.
+        A message already queued or sent to the student for this type and cohort is not queued again."""
+        if not cohort:
+            raise ValueError("Queued emails need a cohort, e.g. email_cohort()")
+        subject, text, html_body = self.build_message(email_type, student_name, **kwargs)
+        record = self.outbox.enqueue(student_email, student_name, email_type, cohort, subject, text,
+                                     html_body=html_body)
+        self.outbox_drainer.wake()
+        return record
+    
+    def _send_typed(self, student_email, student_name, email_type, cohort=None, **kwargs):
+        """Send one typed email; True only once it has actually been sent.
+        Through the outbox this returns as soon as the email is queued, so it is False until delivered
+        (see delivery_status); EMAIL_SEND_WAIT_SECONDS opts in to waiting that long for delivery."""
+        if not self.use_outbox:
+            subject, text, html_body = self.build_message(email_type, student_name, **kwargs)
+            return self.send_email(student_email, subject, text, html_body=html_body)
+        try:
+            cohort = cohort or email_cohort(kwargs.get('quiz_link'))
+            record = self.queue_email(student_email, student_name, email_type, cohort, **kwargs)
+            if EMAIL_SEND_WAIT_SECONDS > 0:
+                record = self.outbox.wait_for_delivery(record['key'], EMAIL_SEND_WAIT_SECONDS) or record
+        except Exception as e:
+            print(f"Error queueing email to {student_email}: {e}")
+            return False
+        print(f"📬 {email_type} email to {student_email}: {record['status']}")
+        return record['status'] == 'sent'
+    
+    def delivery_status(self, cohort=None, email_type=None, status=None):
+        """Outbox delivery records, newest first"""
+        return self.outbox.records(cohort, email_type, status)
+    
+    def send_quiz_invitation(self, student_email, student_name, quiz_link, cohort=None):
         """Send quiz invitation email to student"""
-        subject = "Quiz Invitation - AISB Onboarding Process"
-        
-        body = f"""
-Dear {student_name},
-
-Congratulations! You have been selected to participate in the AISB Onboarding Process quiz.
-
-Please click the following link to take the quiz:
-{quiz_link}
-
-Instructions:
-- You have 30 minutes to complete the quiz
-- The quiz consists of multiple-choice questions
-- Answer all questions to the best of your ability
-- Your responses will be automatically saved
-
-Good luck!
-
-Best regards,
-AISB Team
-        """
-        
-        return self.send_email(student_email, subject, body)
+        return self._send_typed(student_email, student_name, 'quiz_invitation', cohort, quiz_link=quiz_link)
     
-    def send_voice_submission_invitation(self, student_email, student_name):
+    def send_voice_submission_invitation(self, student_email, student_name, cohort=None):
         """Send voice submission invitation to students who passed the quiz"""
-        subject = "🎵 Voice Submission Required - AISB Onboarding Process"
-        
-        body = f"""
-Dear {student_name},
-
-🎉 Congratulations! You have successfully passed the quiz with 7+ marks and are now invited to submit a voice recording for the next stage of the AISB Onboarding Process.
-
-🎙️ Voice Recording Instructions:
-1. Record a 1-minute audio introduction of yourself
-2. Explain your background and passion for AI/Data Science
-3. Share your career goals and why you want to join this bootcamp
-4. Save as MP3, M4A, or WAV format
-5. Upload the audio file to Google Drive
-6. Share the file with "Anyone with link can view" permissions
-7. Submit the Google Drive link through our system
-
-📱 Recording Tips:
-- Use your phone's voice recorder app
-- Find a quiet location with minimal background noise
-- Speak clearly and at a moderate pace
-- Keep it to exactly 1 minute
-- Show enthusiasm and professionalism
-
-⏰ Deadline: Submit within 3 days of receiving this email
-
-Your audio will be automatically transcribed and analyzed by our AI system for final selection.
-
-Best regards,
-AISB Team
-        """
-        
-        return self.send_email(student_email, subject, body)
+        return self._send_typed(student_email, student_name, 'voice_submission', cohort)
     
-    def send_final_selection_email(self, student_email, student_name):
+    def send_final_selection_email(self, student_email, student_name, cohort=None):
         """Send final selection email to selected students"""
-        subject = "🎉 Congratulations! You've been selected for AI Bootcamp at AI Skillbridge"
-        
-        body = f"""
-Dear {student_name},
-
-🎉 CONGRATULATIONS! 🎉
-
-You have been successfully selected to join the AI Bootcamp at AI Skillbridge!
-
-Your outstanding performance in both the quiz and video submission has earned you a place in our prestigious program. We were particularly impressed by:
-- Your excellent quiz performance
-- The quality and clarity of your video submission
-- Your overall presentation and communication skills
-- Your passion for AI and Data Science
-
-🏆 What's Next:
-- You will receive detailed instructions about the AI Bootcamp program
-- Please check your email regularly for updates and next steps
-- Welcome to the AI Skillbridge community!
-
-We are excited to have you join us and look forward to your contributions to the AI Bootcamp.
-
-Best regards,
-AI Skillbridge Team
-aisb-onboarding-service@aisb-onboarding-process.iam.gserviceaccount.com
-        """
-        
-        return self.send_email(student_email, subject, body)
+        return self._send_typed(student_email, student_name, 'final_selection', cohort)
     
-    def send_bulk_emails(self, email_list, email_type, **kwargs):
-        """Send bulk emails to a list of recipients"""
-        results = []
+    def send_bulk_emails(self, email_list, email_type, on_result=None, cohort=None, **kwargs):
+        """Send bulk emails to a list of recipients, within the provider's rate limits.
+        Returns one result per recipient, in order, with 'success', 'status', 'error' and 'deferred' (daily limit reached).
+        With the outbox enabled this only queues the emails, so it returns at once and 'status' is the
+        outbox status ('queued', 'sending', 'sent' or 'failed'); 'success' is only True for 'sent', so a
+        queued email is not reported as delivered. Students already emailed in the cohort are not emailed again."""
+        if not self.use_outbox:
+            return EmailDispatcher(self).send_bulk(email_list, email_type, on_result=on_result, **kwargs)
         
-        for email_data in email_list:
-            if email_type == 'quiz_invitation':
-                result = self.send_quiz_invitation(
-                    email_data['email'], 
-                    email_data['name'], 
-                    kwargs.get('quiz_link', '')
-                )
-            elif email_type == 'voice_submission':
-                result = self.send_voice_submission_invitation(
-                    email_data['email'], 
-                    email_data['name']
-                )
-            elif email_type == 'final_selection':
-                result = self.send_final_selection_email(
-                    email_data['email'], 
-                    email_data['name']
-                )
-            else:
-                result = False
-            
-            results.append({
-                'email': email_data['email'],
-                'name': email_data['name'],
-                'success': result
-            })
+        # Quiz invitations are deduplicated per quiz unless a cohort is given or configured
+        cohort = cohort or email_cohort(kwargs.get('quiz_link'))
+        results = []
+        for recipient in email_list:
+            result = {'email': recipient['email'], 'name': recipient['name'], 'success': False,
+                      'status': 'failed', 'error': '', 'deferred': False}
+            try:
+                record = self.queue_email(recipient['email'], recipient['name'], email_type, cohort, **kwargs)
+                result.update(status=record['status'], error=record['last_error'], success=record['status'] == 'sent')
+            except Exception as e:
+                result['error'] = str(e)
+            results.append(result)
+            if on_result:
+                on_result(result)
         
+        statuses = [result['status'] for result in results]
+        print(f"📬 '{email_type}' emails for {len(results)} recipients: "
+              + ", ".join(f"{statuses.count(status)} {status}" for status in sorted(set(statuses))))
+        return results
+
+class AsyncEmailService:
+    """EmailService for asyncio code: the same templates and rate limits, delivered over pooled
+    asyncio SMTP sessions with pipelined commands so sends share the event loop with other async work.
+    Sends go straight to the server; use EmailService for the durable outbox."""
+    
+    def __init__(self):
+        self.smtp_server = EMAIL_SMTP_SERVER
+        self.smtp_port = EMAIL_SMTP_PORT
+        self.username = EMAIL_USERNAME
+        self.password = EMAIL_PASSWORD
+        self.from_email = FROM_EMAIL
+        self.renderer = MessageRenderer(self.from_email)
+        self.smtp_pool = AsyncSMTPPool(self.smtp_server, self.smtp_port, self.username, self.password)
+        self.rate_limiter = get_rate_limiter(self.smtp_server)
+    
+    async def deliver(self, to_email, subject, body, is_html=False, html_body=None):
+        """Send an email, raising on failure; see EmailService.deliver"""
+        if is_html:
+            message = self.renderer.render(to_email, subject, None, body)
+        else:
+            message = self.renderer.render(to_email, subject, body, html_body)
+        await self.deliver_message(to_email, message)
+    
+    async def deliver_message(self, to_email, message):
+        """Send an already rendered message, raising on failure"""
+        # Wait for the per-minute window without blocking the event loop
+        while True:
+            wait = self.rate_limiter.reserve()
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+        try:
+            await self.smtp_pool.send(self.from_email, [to_email], message)
+        except Exception:
+            # Not delivered, so it does not count against the daily quota
+            self.rate_limiter.release()
+            raise
+    
+    async def send_email(self, to_email, subject, body, is_html=False, html_body=None):
+        """Send an email to a recipient"""
+        try:
+            await self.deliver(to_email, subject, body, is_html, html_body)
+            print(f"Email sent successfully to {to_email}")
+            return True
+        except Exception as e:
+            print(f"Error sending email to {to_email}: {e}")
+            return False
+    
+    def build_message(self, email_type, student_name, **kwargs):
+        """Subject, plain-text body and HTML body of an email type for one student"""
+        return get_template(email_type).render(student_name=student_name, **kwargs)
+    
+    def render_messages(self, email_list, email_type, **kwargs):
+        return self.renderer.render_batch(get_template(email_type), email_list, **kwargs)
+    
+    async def send_quiz_invitation(self, student_email, student_name, quiz_link):
+        subject, text, html_body = self.build_message('quiz_invitation', student_name, quiz_link=quiz_link)
+        return await self.send_email(student_email, subject, text, html_body=html_body)
+    
+    async def send_voice_submission_invitation(self, student_email, student_name):
+        subject, text, html_body = self.build_message('voice_submission', student_name)
+        return await self.send_email(student_email, subject, text, html_body=html_body)
+    
+    async def send_final_selection_email(self, student_email, student_name):
+        subject, text, html_body = self.build_message('final_selection', student_name)
+        return await self.send_email(student_email, subject, text, html_body=html_body)
+    
+    async def _send_one(self, recipient, message):
+        try:
+            await self.deliver_message(recipient['email'], message)
+        except Exception as e:
+            return mark_outcome(bulk_result(recipient), e)
+        return mark_outcome(bulk_result(recipient))
+    
+    async def send_bulk_emails(self, email_list, email_type, on_result=None, **kwargs):
+        """Send one email per recipient over the pooled sessions and return results in input order,
+        shaped like EmailService.send_bulk_emails without the outbox; on_result(result) is called as each send finishes"""
+        started = time.perf_counter()
+        messages = self.render_messages(email_list, email_type, **kwargs)
+        tasks = [
+            asyncio.ensure_future(self._send_one(recipient, message))
+            for recipient, (_, message) in zip(email_list, messages)
+        ]
+        if on_result:
+            for task in asyncio.as_completed(tasks):
+                on_result(await task)
+        results = await asyncio.gather(*tasks)
+        report_bulk(results, email_type, time.perf_counter() - started, self.smtp_pool.size)
         return results
+    
+    async def close(self):
+        """Quit the pooled SMTP sessions"""
+        await self.smtp_pool.close()
@@ -0,0 +1,202 @@
+import base64
+import html
+import time
+import uuid
+from email.header import Header
+from string import Formatter
+
+QUIZ_INVITATION_TEXT = """
+Dear {student_name},
+
+Congratulations! You have been selected to participate in the AISB Onboarding Process quiz.
+
+Please click the following link to take the quiz:
+{quiz_link}
+
+Instructions:
+- You have 30 minutes to complete the quiz
+- The quiz consists of multiple-choice questions
+- Answer all questions to the best of your ability
+- Your responses will be automatically saved
+
+Good luck!
+
+Best regards,
+AISB Team
+"""
+
+VOICE_SUBMISSION_TEXT = """
+Dear {student_name},
+
+🎉 Congratulations! You have successfully passed the quiz with 7+ marks and are now invited to submit a voice recording for the next stage of the AISB Onboarding Process.
+
+🎙️ Voice Recording Instructions:
+1. Record a 1-minute audio introduction of yourself
+2. Explain your background and passion for AI/Data Science
+3. Share your career goals and why you want to join this bootcamp
+4. Save as MP3, M4A, or WAV format
+5. Upload the audio file to Google Drive
+6. Share the file with "Anyone with link can view" permissions
+7. Submit the Google Drive link through our system
+
+📱 Recording Tips:
+- Use your phone's voice recorder app
+- Find a quiet location with minimal background noise
+- Speak clearly and at a moderate pace
+- Keep it to exactly 1 minute
+- Show enthusiasm and professionalism
+
+⏰ Deadline: Submit within 3 days of receiving this email
+
+Your audio will be automatically transcribed and analyzed by our AI system for final selection.
+
+Best regards,
+AISB Team
+"""
+
+FINAL_SELECTION_TEXT = """
+Dear {student_name},
+
+🎉 CONGRATULATIONS! 🎉
+
+You have been successfully selected to join the AI Bootcamp at AI Skillbridge!
+
+Your outstanding performance in both the quiz and video submission has earned you a place in our prestigious program. We were particularly impressed by:
+- Your excellent quiz performance
+- The quality and clarity of your video submission
+- Your overall presentation and communication skills
+- Your passion for AI and Data Science
+
+🏆 What's Next:
+- You will receive detailed instructions about the AI Bootcamp program
+- Please check your email regularly for updates and next steps
+- Welcome to the AI Skillbridge community!
+
+We are excited to have you join us and look forward to your contributions to the AI Bootcamp.
+
+Best regards,
+AI Skillbridge Team
+aisb-onboarding-service@aisb-onboarding-process.iam.gserviceaccount.com
+"""
+
+def compile_template(source):
+    """Split a str.format template once into (literal, field) pairs so rendering is a single join"""
+    parts = []
+    for literal, field, format_spec, conversion in Formatter().parse(source):
+        if format_spec or conversion:
+            raise ValueError(f"Template fields take no format spec or conversion: {field}")
+        parts.append((literal, field))
+    return parts
+
+def text_to_html(text):
+    """HTML version of a plain-text template: escaped, blank lines as paragraphs, line breaks kept"""
+    paragraphs = html.escape(text, quote=False).split('\n\n')
+    return ''.join(f"<p>{paragraph.replace(chr(10), '<br>' + chr(10))}</p>\n" for paragraph in paragraphs)
+
+class EmailTemplate:
+    """Subject, plain-text and HTML bodies compiled once; rendering only substitutes the recipient's fields"""
+
+    def __init__(self, name, subject, text, html_body=None):
+        self.name = name
+        text = text.strip()
+        self._subject = compile_template(subject)
+        self._text = compile_template(text)
+        self._html = compile_template(html_body if html_body is not None else text_to_html(text))
+        self.fields = sorted({field for _, field in self._subject + self._text + self._html if field})
+
+    def _render(self, parts, fields, escape=False):
+        out = []
+        for literal, field in parts:
+            out.append(literal)
+            if field is not None:
+                value = str(fields[field])
+                out.append(html.escape(value) if escape else value)
+        return ''.join(out)
+
+    def render(self, **fields):
+        """(subject, text, html) for one recipient"""
+        missing = [field for field in self.fields if field not in fields]
+        if missing:
+            raise KeyError(f"Template {self.name} needs {', '.join(missing)}")
+        return self._render(self._subject, fields), self._render(self._text, fields), self._render(self._html, fields, escape=True)
+
+TEMPLATES = {
+    'quiz_invitation': EmailTemplate('quiz_invitation', "Quiz Invitation - AISB Onboarding Process", QUIZ_INVITATION_TEXT),
+    'voice_submission': EmailTemplate('voice_submission', "🎵 Voice Submission Required - AISB Onboarding Process", VOICE_SUBMISSION_TEXT),
+    'final_selection': EmailTemplate('final_selection', "🎉 Congratulations! You've been selected for AI Bootcamp at AI Skillbridge", FINAL_SELECTION_TEXT)
+}
+
+def get_template(email_type):
+    if email_type not in TEMPLATES:
+        raise ValueError(f"Unknown email type: {email_type}")
+    return TEMPLATES[email_type]
+
+def _encode_header(value):
+    """RFC 2047 encoding for non-ASCII header values, as email.mime would produce"""
+    if value.isascii():
+        return value
+    return Header(value, 'utf-8').encode()
+
+def _base64(body):
+    return base64.encodebytes(body.encode('utf-8')).decode('ascii')
+
+def _clean_address(address):
+    # A newline in an address would let it inject headers
+    return address.replace('\r', '').replace('\n', '').strip()
+
+class MessageRenderer:
+    """Build MIME messages as strings from pre-rendered header and part skeletons.
+    Boundaries, part headers and encoded subjects are shared across a batch; each recipient
+    only adds the To header and the base64 of their bodies."""
+
+    def __init__(self, from_email):
+        self.from_email = _clean_address(from_email)
+        # base64 lines never start with "--", so one boundary is safe for every message
+        self.boundary = f"==============={uuid.uuid4().hex}=="
+        self._alternative_head = (
+            f'Content-Type: multipart/alternative; boundary="{self.boundary}"\n'
+            f"MIME-Version: 1.0\n"
+            f"From: {self.from_email}\n"
+        )
+        self._text_part = f'--{self.boundary}\n{self._part_headers("plain")}\n'
+        self._html_part = f'--{self.boundary}\n{self._part_headers("html")}\n'
+        self._subjects = {}
+        self.last_batch_stats = None
+
+    def _part_headers(self, subtype):
+        return (f'Content-Type: text/{subtype}; charset="utf-8"\n'
+                f"MIME-Version: 1.0\n"
+                f"Content-Transfer-Encoding: base64\n")
+
+    def _subject_header(self, subject):
+        encoded = self._subjects.get(subject)
+        if encoded is None:
+            encoded = _encode_header(subject)
+            if len(self._subjects) < 1024:
+                self._subjects[subject] = encoded
+        return encoded
+
+    def render(self, to_email, subject, text, html_body=None):
+        """The full message; multipart/alternative when an HTML body is given, a single HTML or text part otherwise"""
+        headers = f"To: {_clean_address(to_email)}\nSubject: {self._subject_header(subject)}\n\n"
+        if text is None or html_body is None:
+            subtype, body = ('plain', text) if text is not None else ('html', html_body)
+            return f"{self._part_headers(subtype)}From: {self.from_email}\n{headers}{_base64(body)}"
+        return (f"{self._alternative_head}{headers}"
+                f"{self._text_part}\n{_base64(text)}{self._html_part}\n{_base64(html_body)}--{self.boundary}--\n")
+
+    def render_batch(self, template, recipients, **shared_fields):
+        """(email, message) per recipient dict with 'email' and 'name'; times the batch into last_batch_stats"""
+        started = time.perf_counter()
+        messages = []
+        for recipient in recipients:
+            subject, text, html_body = template.render(student_name=recipient['name'], **shared_fields)
+            messages.append((recipient['email'], self.render(recipient['email'], subject, text, html_body)))
+        elapsed = time.perf_counter() - started
+        self.last_batch_stats = {
+            'template': template.name,
+            'messages': len(messages),
+            'seconds': round(elapsed, 4),
+            'per_message_us': round(elapsed / len(messages) * 1e6, 1) if messages else 0.0
+        }
+        return messages
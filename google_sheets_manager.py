@@ -5,6 +5,7 @@ import json
 from config import (
     GOOGLE_SHEETS_CREDENTIALS_FILE,
     GOOGLE_SHEET_ID,
+    GOOGLE_SHEETS_BACKEND,
     GOOGLE_SHEET_QUIZ_QUESTIONS,
     GOOGLE_SHEET_STUDENT_DATA,
     GOOGLE_SHEET_VOICE_SUBMISSIONS,
@@ -20,6 +21,12 @@ class GoogleSheetsManager:
     
     def _authenticate(self):
         """Authenticate with Google Sheets API"""
+        if GOOGLE_SHEETS_BACKEND == 'memory':
+            # Local benchmarks and tests keep all sheets in process memory
+            from local_sheets_service import InMemorySheetsService
+            self.service = InMemorySheetsService.shared()
+            return
+        
         try:
             # Define the scope
             scope = ['https://www.googleapis.com/auth/spreadsheets']
@@ -215,3 +222,36 @@ class GoogleSheetsManager:
         except Exception as e:
             print(f"❌ Error clearing sheet {sheet_name}: {e}")
             return False
+
+
+class BufferedSheetWriter:
+    """Buffer rows and write them to a sheet in small batches"""
+    
+    def __init__(self, sheets_manager, sheet_name, start_row=2, flush_size=3):
+        self.sheets_manager = sheets_manager
+        self.sheet_name = sheet_name
+        self.next_row = start_row
+        self.flush_size = max(1, flush_size)
+        self.rows_written = 0
+        self._buffer = []
+    
+    def add(self, row):
+        """Queue a row and flush once the buffer is full"""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+    
+    def flush(self):
+        """Write all buffered rows below the previously written ones"""
+        if not self._buffer:
+            return
+        
+        rows = self._buffer
+        self._buffer = []
+        self.sheets_manager.write_data(self.sheet_name, rows, f"A{self.next_row}")
+        self.next_row += len(rows)
+        self.rows_written += len(rows)
+    
+    def close(self):
+        """Flush any remaining rows"""
+        self.flush()
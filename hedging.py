@@ -0,0 +1,79 @@
+import math
+import threading
+from collections import defaultdict, deque
+from config import (
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_BUDGET,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_WINDOW
+)
+
+class LatencyTracker:
+    """Rolling window of observed call latencies per agent.stage tag"""
+
+    def __init__(self, window=LLM_HEDGE_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+
+    def observe(self, tag, latency_seconds):
+        """Add one completed call latency"""
+        with self._lock:
+            self._samples[tag or 'untagged'].append(latency_seconds)
+
+    def sample_count(self, tag):
+        with self._lock:
+            return len(self._samples.get(tag or 'untagged', ()))
+
+    def percentile(self, tag, percentile):
+        """Nearest-rank percentile of the window, or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(tag or 'untagged', ()))
+        if not samples:
+            return None
+        rank = max(1, math.ceil(percentile / 100 * len(samples)))
+        return samples[rank - 1]
+
+class HedgingPolicy:
+    """Decide when a slow call gets a duplicate request, within an extra-spend budget"""
+
+    def __init__(self, percentile=LLM_HEDGE_PERCENTILE, budget=LLM_HEDGE_BUDGET, min_samples=LLM_HEDGE_MIN_SAMPLES):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker()
+        self._lock = threading.Lock()
+        self.primary_calls = 0
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self, tag):
+        """Seconds to wait before hedging a new call, or None to never hedge it"""
+        with self._lock:
+            self.primary_calls += 1
+        # Until the window has enough samples the percentile is noise
+        if self.latencies.sample_count(tag) < self.min_samples:
+            return None
+        return self.latencies.percentile(tag, self.percentile)
+
+    def try_acquire(self):
+        """Reserve a hedge if the extra requests stay within the budget fraction of primary calls"""
+        with self._lock:
+            if self.hedged_calls + 1 > self.budget * self.primary_calls:
+                return False
+            self.hedged_calls += 1
+            return True
+
+    def record_win(self):
+        """Count a call whose hedge returned first"""
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'primary_calls': self.primary_calls,
+                'hedged_calls': self.hedged_calls,
+                'hedge_wins': self.hedge_wins,
+                'extra_spend_ratio': round(self.hedged_calls / self.primary_calls, 4) if self.primary_calls else 0.0
+            }
@@ -0,0 +1,215 @@
+import glob
+import hashlib
+import os
+import re
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+from config import CAPTIONS_DIR, YOUTUBE_CAPTIONS_ENABLED, YOUTUBE_CAPTION_LANGUAGES
+
+YOUTUBE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+def drive_file_id(link):
+    """File ID of a Google Drive link, or None"""
+    if 'drive.google.com' not in link:
+        return None
+    if '/file/d/' in link:
+        # Format: https://drive.google.com/file/d/FILE_ID/view
+        return link.split('/file/d/')[1].split('/')[0] or None
+    if 'id=' in link:
+        # Format: https://drive.google.com/open?id=FILE_ID
+        return parse_qs(urlparse(link).query).get('id', [None])[0]
+    return None
+
+def youtube_video_id(link):
+    """Video ID of a YouTube watch, short, embed or youtu.be link, or None"""
+    parsed = urlparse(link)
+    host = parsed.netloc.lower().split(':')[0]
+    if host == 'youtu.be':
+        candidate = parsed.path.lstrip('/').split('/')[0]
+    elif host.endswith('youtube.com'):
+        parts = parsed.path.strip('/').split('/')
+        if parts[0] in ('shorts', 'embed', 'live', 'v') and len(parts) > 1:
+            candidate = parts[1]
+        else:
+            candidate = parse_qs(parsed.query).get('v', [''])[0]
+    else:
+        return None
+    return candidate if YOUTUBE_ID_PATTERN.match(candidate) else None
+
+class LinkProvider:
+    """How submissions from one kind of host are identified, captioned and downloaded"""
+
+    name = 'base'
+    hosts = ()
+
+    def handles(self, link):
+        host = urlparse(link).netloc.lower().split(':')[0]
+        return any(host == suffix or host.endswith('.' + suffix) for suffix in self.hosts)
+
+    def key_for(self, link):
+        """Stable, filename-safe recording key, or None if the link is malformed"""
+        raise NotImplementedError
+
+    def captions(self, link, key):
+        """Existing captions for the recording, or None when it has to be transcribed"""
+        return None
+
+    def fetch_audio(self, link, key):
+        """Local path of the recording"""
+        raise NotImplementedError
+
+class DriveProvider(LinkProvider):
+    """Public Google Drive files, downloaded through the audio cache"""
+
+    name = 'drive'
+    hosts = ('drive.google.com',)
+
+    def __init__(self, audio_fetcher):
+        self.audio_fetcher = audio_fetcher
+
+    def key_for(self, link):
+        # Bare file IDs keep keys made before other hosts were supported
+        return drive_file_id(link)
+
+    def fetch_audio(self, link, key):
+        return self.audio_fetcher.fetch(key)
+
+class YouTubeProvider(LinkProvider):
+    """Public YouTube videos: existing captions first, downloaded audio only when there are none"""
+
+    name = 'youtube'
+    hosts = ('youtube.com', 'youtu.be')
+
+    def __init__(self, audio_fetcher, captions_dir=CAPTIONS_DIR, use_api=YOUTUBE_CAPTIONS_ENABLED,
+                 languages=YOUTUBE_CAPTION_LANGUAGES):
+        self.audio_fetcher = audio_fetcher
+        self.captions_dir = captions_dir
+        self.use_api = use_api
+        self.languages = languages
+
+    def key_for(self, link):
+        video_id = youtube_video_id(link)
+        return f"yt_{video_id}" if video_id else None
+
+    def captions(self, link, key):
+        video_id = key[len('yt_'):]
+        # Local caption files (<video ID>.txt) stand in for the API in tests and offline runs
+        local_path = os.path.join(self.captions_dir, f"{video_id}.txt")
+        if os.path.exists(local_path):
+            with open(local_path, encoding='utf-8') as f:
+                return f.read().strip() or None
+        if not self.use_api:
+            return None
+
+        try:
+            from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound
+        except ImportError:
+            return None
+        try:
+            transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
+            try:
+                transcript = transcripts.find_manually_created_transcript(self.languages)
+            except NoTranscriptFound:
+                transcript = transcripts.find_generated_transcript(self.languages)
+            segments = transcript.fetch()
+        except Exception as e:
+            print(f"ℹ️ No captions for YouTube video {video_id} ({type(e).__name__}), transcribing the audio")
+            return None
+
+        # Drop cue annotations such as [Music] or [Applause]
+        text = re.sub(r'\[[^\]]*\]', ' ', ' '.join(segment['text'] for segment in segments))
+        return re.sub(r'\s+', ' ', text).strip() or None
+
+    def fetch_audio(self, link, key):
+        directory = os.path.join(self.audio_fetcher.cache_dir, 'youtube')
+        for path in sorted(glob.glob(os.path.join(directory, f"{glob.escape(key)}.*"))):
+            if not path.endswith('.part'):
+                return path
+        try:
+            import yt_dlp
+        except ImportError:
+            raise RuntimeError("YouTube videos without captions need yt-dlp to download audio: pip install yt-dlp")
+
+        os.makedirs(directory, exist_ok=True)
+        options = {
+            'format': 'bestaudio/best',
+            'outtmpl': os.path.join(directory, f"{key}.%(ext)s"),
+            'max_filesize': self.audio_fetcher.max_bytes,
+            'quiet': True,
+            'noprogress': True,
+            'noplaylist': True
+        }
+        with yt_dlp.YoutubeDL(options) as downloader:
+            downloader.download([link])
+        for path in sorted(glob.glob(os.path.join(directory, f"{glob.escape(key)}.*"))):
+            if not path.endswith('.part'):
+                return path
+        raise IOError(f"No audio downloaded for {link}; it may be over the {self.audio_fetcher.max_bytes / 1048576:.0f} MB limit")
+
+class DirectURLProvider(LinkProvider):
+    """Any other http(s) link that serves an audio or video file directly"""
+
+    name = 'url'
+
+    def __init__(self, audio_fetcher):
+        self.audio_fetcher = audio_fetcher
+
+    def handles(self, link):
+        # Where the host resolves is checked by the fetcher before each request, redirects included
+        parsed = urlparse(link)
+        return parsed.scheme in ('http', 'https') and bool(parsed.hostname)
+
+    def key_for(self, link):
+        return 'url_' + hashlib.sha256(link.encode('utf-8')).hexdigest()[:16]
+
+    def _download_url(self, link):
+        parsed = urlparse(link)
+        if parsed.netloc.lower().endswith('dropbox.com'):
+            # Shared Dropbox links open a preview page unless dl=1
+            query = parse_qs(parsed.query)
+            query['dl'] = ['1']
+            return urlunparse(parsed._replace(query=urlencode(query, doseq=True)))
+        return link
+
+    def fetch_audio(self, link, key):
+        return self.audio_fetcher.fetch(key, url=self._download_url(link))
+
+class LinkResolver:
+    """Dispatch submission links to the provider for their host; the first provider that handles a link wins"""
+
+    def __init__(self, audio_fetcher, providers=None):
+        self.providers = providers if providers is not None else [
+            DriveProvider(audio_fetcher),
+            YouTubeProvider(audio_fetcher),
+            DirectURLProvider(audio_fetcher)
+        ]
+
+    def register(self, provider):
+        """Add a provider ahead of the built-in ones, e.g. a local stub for a host"""
+        self.providers.insert(0, provider)
+
+    def resolve(self, link):
+        """(provider, recording key) for a link; the key is None when the link is malformed,
+        and both are None for links no provider handles"""
+        link = (link or '').strip()
+        for provider in self.providers:
+            if provider.handles(link):
+                return provider, provider.key_for(link)
+        return None, None
+
+    def key_for(self, link):
+        return self.resolve(link)[1]
+
+    def captions(self, link):
+        provider, key = self.resolve(link)
+        if not key:
+            return None
+        text = provider.captions(link.strip(), key)
+        if text:
+            print(f"📝 Using existing {provider.name} captions for {key}")
+        return text
+
+    def fetch_audio(self, link):
+        provider, key = self.resolve(link)
+        if not key:
+            raise ValueError(f"Unsupported or malformed link: {link}")
+        return provider.fetch_audio(link.strip(), key)
@@ -0,0 +1,131 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from circuit_breaker import CircuitBreaker
+from config import (
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    OPENAI_BASE_URL,
+    LLM_MAX_CONNECTIONS,
+    LLM_REQUEST_TIMEOUT
+)
+
+class LLMGateway:
+    """Lazily built, process-wide owner of the pooled HTTP client used for every LLM call"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._openai_client = None
+        self._crewai_llms = {}
+        self._executor = None
+        self._breakers = {}
+    
+    def _require_api_key(self):
+        """Fail on first use rather than at import time when the key is missing"""
+        if not OPENAI_API_KEY and OPENAI_BASE_URL:
+            # Local OpenAI-compatible servers do not check the key
+            return 'local-no-key'
+        if not OPENAI_API_KEY:
+            raise RuntimeError("Missing OPENAI_API_KEY in .env")
+        return OPENAI_API_KEY
+    
+    def get_http_client(self):
+        """Get the shared keep-alive HTTP connection pool"""
+        if self._http_client is None:
+            with self._lock:
+                if self._http_client is None:
+                    import httpx
+                    self._http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=LLM_MAX_CONNECTIONS,
+                            max_keepalive_connections=LLM_MAX_CONNECTIONS
+                        ),
+                        timeout=httpx.Timeout(LLM_REQUEST_TIMEOUT, connect=10.0)
+                    )
+        return self._http_client
+    
+    def get_openai_client(self):
+        """Get the OpenAI client bound to the shared HTTP pool"""
+        if self._openai_client is None:
+            api_key = self._require_api_key()
+            http_client = self.get_http_client()
+            with self._lock:
+                if self._openai_client is None:
+                    import openai
+                    # Retries are handled by OpenAIModel so they show up in the metrics
+                    self._openai_client = openai.OpenAI(
+                        api_key=api_key,
+                        base_url=OPENAI_BASE_URL or None,
+                        http_client=http_client,
+                        max_retries=0
+                    )
+        return self._openai_client
+    
+    def get_executor(self):
+        """Get the worker pool that runs hedged requests (two per call at most)"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONNECTIONS * 2, thread_name_prefix='llm-hedge')
+        return self._executor
+    
+    def get_breaker(self, model_id):
+        """Get the circuit breaker guarding calls to a model"""
+        with self._lock:
+            if model_id not in self._breakers:
+                self._breakers[model_id] = CircuitBreaker(model_id)
+            return self._breakers[model_id]
+    
+    def breaker_stats(self):
+        """State and recent error/slow-call rates of every model's circuit"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return [breaker.stats() for breaker in breakers]
+    
+    def get_crewai_llm(self, model_id=None):
+        """Get a CrewAI LLM for the model, routed through the shared HTTP pool"""
+        model_id = model_id or OPENAI_MODEL
+        if model_id not in self._crewai_llms:
+            api_key = self._require_api_key()
+            http_client = self.get_http_client()
+            with self._lock:
+                if model_id not in self._crewai_llms:
+                    try:
+                        from crewai import LLM
+                        try:
+                            # CrewAI calls OpenAI through litellm, which accepts a shared sync session
+                            import litellm
+                            litellm.client_session = http_client
+                        except ImportError:
+                            pass
+                        
+                        # Use CrewAI LLM format with OpenAI provider
+                        self._crewai_llms[model_id] = LLM(
+                            model=f"openai/{model_id}",   # e.g., openai/gpt-3.5-turbo
+                            api_key=api_key,
+                            base_url=OPENAI_BASE_URL or None,
+                            temperature=0.2
+                        )
+                        print(f"✅ Successfully initialized OpenAI {model_id} with CrewAI LLM")
+                        
+                    except Exception as e:
+                        print(f"❌ Error initializing OpenAI: {e}")
+                        print("💡 Make sure your OPENAI_API_KEY is correct and has access to OpenAI models")
+                        print("💡 Try checking your API key at: https://platform.openai.com/api-keys")
+                        raise
+        return self._crewai_llms[model_id]
+    
+    def close(self):
+        """Close the shared HTTP pool; clients are rebuilt on next use"""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._http_client = None
+            self._openai_client = None
+            self._crewai_llms = {}
+            self._executor = None
+
+# Global gateway instance (no clients are created until first use)
+gateway = LLMGateway()
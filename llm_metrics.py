@@ -0,0 +1,229 @@
+import csv
+import io
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from config import LLM_PRICING_PER_1K_TOKENS, LLM_METRICS_MAX_CALLS
+
+CALL_FIELDS = [
+    'run_id', 'run_name', 'tag', 'agent', 'stage', 'model', 'prompt_tokens', 'completion_tokens',
+    'total_tokens', 'latency_seconds', 'retries', 'hedged', 'cache_hit', 'cost_usd', 'error', 'timestamp'
+]
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimate the USD cost of a call from the configured per-1K-token prices"""
+    # Versioned model names (e.g. gpt-4o-mini-2024-07-18) use the longest matching price prefix
+    matches = [name for name in LLM_PRICING_PER_1K_TOKENS if model and model.startswith(name)]
+    if not matches:
+        return 0.0
+    prompt_price, completion_price = LLM_PRICING_PER_1K_TOKENS[max(matches, key=len)]
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+# The run the current thread or task is working for; worker threads inherit it through contextvars.copy_context()
+_current_run_id = ContextVar('llm_metrics_run_id', default=None)
+
+TOTAL_FIELDS = ['calls', 'prompt_tokens', 'completion_tokens', 'total_tokens', 'latency_seconds',
+                'retries', 'hedges', 'cache_hits', 'errors', 'cost_usd']
+SAVINGS_FIELDS = ['prompts', 'trimmed', 'original_tokens', 'final_tokens', 'tokens_saved']
+
+def _merge(entries, key_fields, sum_fields):
+    """Sum totals entries grouped by the given fields"""
+    merged = {}
+    for entry in entries:
+        key = tuple(entry[field] for field in key_fields)
+        target = merged.setdefault(key, dict(zip(key_fields, key), **{field: 0 for field in sum_fields}))
+        for field in sum_fields:
+            target[field] += entry[field]
+    for target in merged.values():
+        for field in ('latency_seconds', 'cost_usd'):
+            if field in target:
+                target[field] = round(target[field], 6 if field == 'cost_usd' else 4)
+    return list(merged.values())
+
+class LLMMetricsRegistry:
+    """In-process registry of LLM call records grouped into workflow runs. Totals are kept per run and tag
+    as calls arrive; only the most recent call records are kept for export."""
+
+    def __init__(self, max_calls=LLM_METRICS_MAX_CALLS):
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=max_calls)
+        self._totals = {}  # (run_id, tag) -> call totals
+        self._prompt_savings = {}  # (run_id, tag) -> prompt savings totals
+        self._runs = {}
+
+    def start_run(self, name):
+        """Start a workflow run; calls recorded from now on are attributed to it"""
+        run_id = uuid.uuid4().hex[:8]
+        with self._lock:
+            self._runs[run_id] = {
+                'run_id': run_id,
+                'run_name': name,
+                'started_at': datetime.now().isoformat(timespec='seconds'),
+                'finished_at': '',
+                'wall_seconds': 0.0,
+                '_started': time.perf_counter(),
+                '_token': _current_run_id.set(run_id)
+            }
+        return run_id
+
+    def end_run(self, run_id):
+        """Mark a workflow run as finished"""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run:
+                run['finished_at'] = datetime.now().isoformat(timespec='seconds')
+                run['wall_seconds'] = round(time.perf_counter() - run['_started'], 3)
+                token = run.pop('_token', None)
+            else:
+                token = None
+        if token is not None and _current_run_id.get() == run_id:
+            try:
+                _current_run_id.reset(token)
+            except ValueError:
+                # Ended from a different context than it started in
+                _current_run_id.set(None)
+
+    def current_run_id(self):
+        """The run calls made here are attributed to, or None"""
+        return _current_run_id.get()
+
+    @contextmanager
+    def run(self, name):
+        """Attribute every LLM call inside the block to a named workflow run"""
+        run_id = self.start_run(name)
+        try:
+            yield run_id
+        finally:
+            self.end_run(run_id)
+
+    def record_call(self, tag, model, prompt_tokens=0, completion_tokens=0, latency_seconds=0.0,
+                    retries=0, cache_hit=False, error=None, hedged=False):
+        """Record a single LLM call (or cache hit) under its agent.stage tag"""
+        tag = tag or 'untagged'
+        agent, _, stage = tag.partition('.')
+        prompt_tokens = prompt_tokens or 0
+        completion_tokens = completion_tokens or 0
+
+        with self._lock:
+            run = self._runs.get(_current_run_id.get(), {})
+            call = {
+                'run_id': run.get('run_id', ''),
+                'run_name': run.get('run_name', ''),
+                'tag': tag,
+                'agent': agent,
+                'stage': stage or agent,
+                'model': model or '',
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+                'latency_seconds': round(latency_seconds, 4),
+                'retries': retries,
+                'hedged': hedged,
+                'cache_hit': cache_hit,
+                'cost_usd': 0.0 if cache_hit else round(estimate_cost(model, prompt_tokens, completion_tokens), 6),
+                'error': str(error) if error else '',
+                'timestamp': datetime.now().isoformat(timespec='seconds')
+            }
+            self._calls.append(call)
+            self._add_to_totals(call)
+
+    def _add_to_totals(self, call):
+        """Add a call record to its run and tag totals"""
+        entry = self._totals.setdefault((call['run_id'], call['tag']), dict(
+            run_id=call['run_id'], tag=call['tag'], **{field: 0 for field in TOTAL_FIELDS}
+        ))
+        entry['calls'] += 0 if call['cache_hit'] else 1
+        entry['prompt_tokens'] += call['prompt_tokens']
+        entry['completion_tokens'] += call['completion_tokens']
+        entry['total_tokens'] += call['total_tokens']
+        entry['latency_seconds'] = round(entry['latency_seconds'] + call['latency_seconds'], 4)
+        entry['retries'] += call['retries']
+        entry['hedges'] += 1 if call['hedged'] else 0
+        entry['cache_hits'] += 1 if call['cache_hit'] else 0
+        entry['errors'] += 1 if call['error'] else 0
+        entry['cost_usd'] = round(entry['cost_usd'] + call['cost_usd'], 6)
+
+    def record_cache_hit(self, tag, model=None):
+        """Record a request that was served from a local cache instead of the LLM"""
+        self.record_call(tag, model, cache_hit=True)
+
+    def record_prompt_savings(self, tag, original_tokens, final_tokens):
+        """Record how many tokens budgeting removed from a prompt section before it was sent"""
+        tokens_saved = max(0, original_tokens - final_tokens)
+        run_id = _current_run_id.get() or ''
+        tag = tag or 'untagged'
+        with self._lock:
+            entry = self._prompt_savings.setdefault((run_id, tag), dict(
+                run_id=run_id, tag=tag, **{field: 0 for field in SAVINGS_FIELDS}
+            ))
+            entry['prompts'] += 1
+            entry['trimmed'] += 1 if tokens_saved else 0
+            entry['original_tokens'] += original_tokens
+            entry['final_tokens'] += final_tokens
+            entry['tokens_saved'] += tokens_saved
+
+    def prompt_savings_totals(self, run_id=None):
+        """Prompts built, prompts trimmed and tokens saved per tag, optionally for a single run"""
+        with self._lock:
+            entries = [dict(e) for e in self._prompt_savings.values() if run_id is None or e['run_id'] == run_id]
+        return _merge(entries, ['tag'], SAVINGS_FIELDS)
+
+    def get_calls(self, run_id=None):
+        """Get the most recent call records, optionally for a single run"""
+        with self._lock:
+            return [dict(call) for call in self._calls if run_id is None or call['run_id'] == run_id]
+
+    def _total_entries(self, run_id=None):
+        with self._lock:
+            return [dict(e) for e in self._totals.values() if run_id is None or e['run_id'] == run_id]
+
+    def stage_totals(self, run_id=None):
+        """Totals per agent.stage tag, optionally for a single run"""
+        return _merge(self._total_entries(run_id), ['tag'], TOTAL_FIELDS)
+
+    def run_totals(self):
+        """Totals per workflow run, newest first"""
+        with self._lock:
+            runs = {run_id: dict(run) for run_id, run in self._runs.items()}
+        totals = {entry['run_id']: entry for entry in _merge(self._total_entries(), ['run_id'], TOTAL_FIELDS)}
+
+        results = []
+        for run_id, run in runs.items():
+            run.pop('_started', None)
+            run.pop('_token', None)
+            run.update({key: value for key, value in totals.get(run_id, {}).items() if key != 'run_id'})
+            results.append(run)
+        return sorted(results, key=lambda run: run['started_at'], reverse=True)
+
+    def export_csv(self, run_id=None):
+        """Export call records as CSV text"""
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=CALL_FIELDS)
+        writer.writeheader()
+        writer.writerows(self.get_calls(run_id))
+        return output.getvalue()
+
+    def export_json(self, run_id=None):
+        """Export run totals, stage totals and call records as JSON text"""
+        return json.dumps({
+            'runs': self.run_totals() if run_id is None else [r for r in self.run_totals() if r['run_id'] == run_id],
+            'stages': self.stage_totals(run_id),
+            'prompt_savings': self.prompt_savings_totals(run_id),
+            'calls': self.get_calls(run_id)
+        }, indent=2)
+
+    def reset(self):
+        """Drop all recorded runs and calls"""
+        with self._lock:
+            self._calls.clear()
+            self._totals = {}
+            self._prompt_savings = {}
+            self._runs = {}
+
+# Global metrics registry
+metrics = LLMMetricsRegistry()
@@ -1,33 +1,260 @@
-import os
-from dotenv import load_dotenv
-import openai
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from config import (
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+    OPENAI_JSON_SCHEMA_STRICT,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BACKOFF_SECONDS,
+    LLM_HEDGING_ENABLED,
+    LLM_BREAKER_ENABLED,
+    OPENAI_FALLBACK_MODEL
+)
+from circuit_breaker import CircuitOpenError
+from hedging import HedgingPolicy
+from llm_gateway import gateway
+from llm_metrics import metrics
 
-load_dotenv()
-API_KEY = os.environ.get("OPENAI_API_KEY")
-if not API_KEY:
-    raise RuntimeError("Missing OPENAI_API_KEY in .env")
-
-# Configure OpenAI
-openai.api_key = API_KEY
+API_KEY = OPENAI_API_KEY
 
 # OpenAI model (use GPT-4 or GPT-3.5-turbo)
-MODEL_ID = os.environ.get("OPENAI_MODEL", "gpt-3.5-turbo")
+MODEL_ID = OPENAI_MODEL
+
+# Shared by every model so latency percentiles and the hedge budget are tracked process-wide
+hedging_policy = HedgingPolicy()
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+def is_retryable_error(error):
+    """Check whether an OpenAI error is transient and worth retrying"""
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    return type(error).__name__ in ('APIConnectionError', 'APITimeoutError')
 
 class OpenAIModel:
-    def __init__(self, model_id):
+    def __init__(self, model_id, fallback_model_id=None):
         self.model_id = model_id
-        self.client = openai.OpenAI(api_key=API_KEY)
+        self.fallback_model_id = fallback_model_id
+        self._local = threading.local()
+    
+    @property
+    def client(self):
+        """Shared OpenAI client, created by the gateway on first use"""
+        return gateway.get_openai_client()
+    
+    @property
+    def used_fallback(self):
+        """Whether the last call made from this thread was served by the fallback model"""
+        return getattr(self._local, 'used_fallback', False)
+    
+    def _select_model(self):
+        """Pick the primary model, or the fallback while the primary's circuit is open"""
+        if not LLM_BREAKER_ENABLED or gateway.get_breaker(self.model_id).allow_request():
+            return self.model_id
+        if self.fallback_model_id and self.fallback_model_id != self.model_id:
+            if gateway.get_breaker(self.fallback_model_id).allow_request():
+                return self.fallback_model_id
+        raise CircuitOpenError(f"Circuit open for {self.model_id} and no fallback model is available")
+    
+    def _send(self, client, prompt, options, model_id, started=None):
+        """Send one chat completion request, returning (response, error, latency) rather than raising"""
+        if started is not None:
+            started.set()
+        started_at = time.perf_counter()
+        try:
+            response = client.chat.completions.create(
+                model=model_id,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.2,
+                **options
+            )
+        except Exception as e:
+            return None, e, time.perf_counter() - started_at
+        return response, None, time.perf_counter() - started_at
+    
+    def _settle(self, outcome, tag, model_id):
+        """Feed a request's outcome to the circuit breaker and hedging policy, then return its response or raise its error"""
+        response, error, latency = outcome
+        breaker = gateway.get_breaker(model_id)
+        if error is None:
+            breaker.record_success(latency)
+            hedging_policy.latencies.observe(tag, latency)
+            return response
+        # Only outages count against the circuit; a rejected request still means the API answered
+        if is_retryable_error(error):
+            breaker.record_failure()
+        else:
+            breaker.record_rejected()
+        raise error
+    
+    def _create(self, client, prompt, tag, options, model_id=None):
+        """Send one chat completion request, feeding its outcome to the hedging policy and circuit breaker"""
+        model_id = model_id or self.model_id
+        return self._settle(self._send(client, prompt, options, model_id), tag, model_id)
+    
+    def _create_hedged(self, client, prompt, tag, options, model_id=None):
+        """Send a request and, if it outlives the stage's latency percentile, race a duplicate against it.
+        Only the request whose result is used reports to the circuit breaker, so a half-open probe counts once."""
+        model_id = model_id or self.model_id
+        delay = hedging_policy.hedge_delay(tag)
+        if delay is None:
+            return self._create(client, prompt, tag, options, model_id), False
+        
+        executor = gateway.get_executor()
+        started = threading.Event()
+        primary = executor.submit(self._send, client, prompt, options, model_id, started)
+        # The delay runs from when the request actually goes out. One still queued after a whole delay
+        # means the pool is saturated, and a hedge would only queue behind it.
+        hedge = None
+        if started.wait(delay):
+            done, _ = wait([primary], timeout=delay)
+            if not done and hedging_policy.try_acquire():
+                hedge = executor.submit(self._send, client, prompt, options, model_id)
+        if hedge is None:
+            return self._settle(primary.result(), tag, model_id), False
+        
+        pending = {primary, hedge}
+        failure = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcome = future.result()
+                if outcome[1] is not None:
+                    failure = outcome
+                    continue
+                for loser in pending:
+                    # A request still queued is cancelled; one already sent cannot be recalled on the
+                    # sync client, so its response is discarded and only its tokens are recorded
+                    if not loser.cancel():
+                        context = contextvars.copy_context()
+                        loser.add_done_callback(lambda f: context.run(self._record_discarded, f, tag, model_id))
+                if future is hedge:
+                    hedging_policy.record_win()
+                return self._settle(outcome, tag, model_id), True
+        # Both requests failed: the circuit sees one failure, not two
+        return self._settle(failure, tag, model_id), True
     
-    def generate_content(self, prompt):
+    def _record_discarded(self, future, tag, model_id=None):
+        """Account for the tokens of a hedged request whose response lost the race"""
+        if future.cancelled():
+            return
+        response, error, _ = future.result()
+        if error is not None:
+            return
+        usage = response.usage
+        metrics.record_call(
+            f"{tag or 'untagged'}:hedge",
+            model_id or self.model_id,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0
+        )
+    
+    def _complete(self, prompt, tag, **options):
+        """Run a chat completion with retries, recording tokens, latency and retries under the tag"""
+        client = self.client
+        retries = 0
+        model_id = self.model_id
+        started_at = time.perf_counter()
+        while True:
+            try:
+                # Re-selected on every attempt so a retry can move to the fallback once the circuit opens
+                model_id = self._select_model()
+                self._local.used_fallback = model_id != self.model_id
+                if LLM_HEDGING_ENABLED:
+                    response, hedged = self._create_hedged(client, prompt, tag, options, model_id)
+                else:
+                    response, hedged = self._create(client, prompt, tag, options, model_id), False
+                usage = response.usage
+                metrics.record_call(
+                    tag,
+                    model_id,
+                    prompt_tokens=usage.prompt_tokens if usage else 0,
+                    completion_tokens=usage.completion_tokens if usage else 0,
+                    latency_seconds=time.perf_counter() - started_at,
+                    retries=retries,
+                    hedged=hedged
+                )
+                return type('Response', (), {'text': response.choices[0].message.content})()
+            except Exception as e:
+                if retries < LLM_MAX_RETRIES and is_retryable_error(e):
+                    retries += 1
+                    time.sleep(LLM_RETRY_BACKOFF_SECONDS * 2 ** (retries - 1))
+                    continue
+                metrics.record_call(
+                    tag,
+                    model_id,
+                    latency_seconds=time.perf_counter() - started_at,
+                    retries=retries,
+                    error=e
+                )
+                print(f"Error with OpenAI API: {e}")
+                raise
+    
+    def generate_content(self, prompt, tag=None):
+        """Generate a plain-text completion, recorded under the agent.stage tag"""
+        return self._complete(prompt, tag)
+    
+    def generate_json(self, prompt, schema_name=None, schema=None, tag=None):
+        """Generate a response constrained to a JSON object, or to the schema in strict mode"""
+        if schema and OPENAI_JSON_SCHEMA_STRICT:
+            response_format = {
+                "type": "json_schema",
+                "json_schema": {"name": schema_name or "response", "schema": schema, "strict": True}
+            }
+        else:
+            response_format = {"type": "json_object"}
+        
+        return self._complete(prompt, tag, response_format=response_format)
+    
+    def generate_content_stream(self, prompt, tag=None):
+        """Yield the completion text in chunks as the tokens arrive"""
+        client = self.client
+        model_id = self._select_model()
+        self._local.used_fallback = model_id != self.model_id
+        breaker = gateway.get_breaker(model_id)
+        started_at = time.perf_counter()
+        usage = None
+        reported = False
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_id,
+            stream = client.chat.completions.create(
+                model=model_id,
                 messages=[{"role": "user", "content": prompt}],
-                temperature=0.2
+                temperature=0.2,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            for chunk in stream:
+                # The final chunk carries the token usage and no choices
+                if getattr(chunk, 'usage', None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
+            reported = True
+            breaker.record_success(time.perf_counter() - started_at)
+            metrics.record_call(
+                tag,
+                model_id,
+                prompt_tokens=usage.prompt_tokens if usage else 0,
+                completion_tokens=usage.completion_tokens if usage else 0,
+                latency_seconds=time.perf_counter() - started_at
             )
-            return type('Response', (), {'text': response.choices[0].message.content})()
         except Exception as e:
-            print(f"Error with OpenAI API: {e}")
+            reported = True
+            if is_retryable_error(e):
+                breaker.record_failure()
+            else:
+                breaker.record_rejected()
+            metrics.record_call(tag, model_id, latency_seconds=time.perf_counter() - started_at, error=e)
+            print(f"Error with OpenAI API stream: {e}")
             raise
+        finally:
+            if not reported:
+                # The consumer stopped reading (GeneratorExit) or the stream was interrupted:
+                # no outcome, but a half-open probe slot must not stay taken
+                breaker.release_probe()
 
-MODEL = OpenAIModel(MODEL_ID)
+MODEL = OpenAIModel(MODEL_ID, OPENAI_FALLBACK_MODEL or None)
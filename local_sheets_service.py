@@ -0,0 +1,138 @@
+import re
+import threading
+
+def _column_index(letters):
+    """Convert a column label such as 'A' or 'AB' to a zero-based index"""
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + (ord(letter) - ord('A') + 1)
+    return index - 1
+
+def _parse_range(range_name):
+    """Split 'Sheet!A2:E' into (sheet, first row, first column, last column)"""
+    sheet_name, _, cells = range_name.partition('!')
+    start, _, end = cells.partition(':')
+    start_match = re.match(r'([A-Z]+)(\d*)', start.upper())
+    end_match = re.match(r'([A-Z]+)(\d*)', end.upper()) if end else None
+
+    start_col = _column_index(start_match.group(1))
+    start_row = int(start_match.group(2)) - 1 if start_match.group(2) else 0
+    end_col = _column_index(end_match.group(1)) if end_match else None
+    return sheet_name, start_row, start_col, end_col
+
+class _Request:
+    """Mimic the googleapiclient request object, which runs on execute()"""
+
+    def __init__(self, func):
+        self._func = func
+
+    def execute(self):
+        return self._func()
+
+class _Values:
+    def __init__(self, service):
+        self._service = service
+
+    def get(self, spreadsheetId, range):
+        return _Request(lambda: self._service._get(range))
+
+    def update(self, spreadsheetId, range, valueInputOption, body):
+        return _Request(lambda: self._service._update(range, body.get('values', [])))
+
+    def append(self, spreadsheetId, range, valueInputOption, body, insertDataOption=None):
+        return _Request(lambda: self._service._append(range, body.get('values', [])))
+
+    def clear(self, spreadsheetId, range):
+        return _Request(lambda: self._service._clear(range))
+
+class _Spreadsheets:
+    def __init__(self, service):
+        self._service = service
+
+    def values(self):
+        return _Values(self._service)
+
+    def get(self, spreadsheetId):
+        return _Request(lambda: {
+            'sheets': [{'properties': {'title': title}} for title in self._service._sheets]
+        })
+
+    def batchUpdate(self, spreadsheetId, body):
+        return _Request(lambda: self._service._batch_update(body))
+
+class InMemorySheetsService:
+    """Process-local stand-in for the Google Sheets v4 service used by GoogleSheetsManager"""
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sheets = {}
+
+    @classmethod
+    def shared(cls):
+        """Get the instance shared by every GoogleSheetsManager in this process"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def spreadsheets(self):
+        return _Spreadsheets(self)
+
+    def _rows(self, sheet_name):
+        return self._sheets.setdefault(sheet_name, [])
+
+    def _get(self, range_name):
+        sheet_name, start_row, start_col, end_col = _parse_range(range_name)
+        with self._lock:
+            rows = self._rows(sheet_name)[start_row:]
+            values = [list(row[start_col:None if end_col is None else end_col + 1]) for row in rows]
+        # Like the real API, trailing empty cells and rows are omitted
+        values = [self._trim(row) for row in values]
+        while values and not values[-1]:
+            values.pop()
+        return {'range': range_name, 'values': values} if values else {'range': range_name}
+
+    def _trim(self, row):
+        while row and row[-1] in ('', None):
+            row = row[:-1]
+        return row
+
+    def _update(self, range_name, values):
+        sheet_name, start_row, start_col, _ = _parse_range(range_name)
+        with self._lock:
+            rows = self._rows(sheet_name)
+            for offset, value_row in enumerate(values):
+                row_index = start_row + offset
+                while len(rows) <= row_index:
+                    rows.append([])
+                row = rows[row_index]
+                while len(row) < start_col + len(value_row):
+                    row.append('')
+                # The real API with valueInputOption RAW stores numbers as numbers but returns strings
+                row[start_col:start_col + len(value_row)] = [str(value) for value in value_row]
+        return {'updatedRows': len(values)}
+
+    def _append(self, range_name, values):
+        sheet_name, _, _, _ = _parse_range(range_name)
+        with self._lock:
+            rows = self._rows(sheet_name)
+            last_row = len(rows)
+            while last_row > 0 and not any(rows[last_row - 1]):
+                last_row -= 1
+            return self._update(f"{sheet_name}!A{last_row + 1}", values)
+
+    def _clear(self, range_name):
+        sheet_name, _, _, _ = _parse_range(range_name)
+        with self._lock:
+            self._sheets[sheet_name] = []
+        return {}
+
+    def _batch_update(self, body):
+        with self._lock:
+            for request in body.get('requests', []):
+                if 'addSheet' in request:
+                    self._sheets.setdefault(request['addSheet']['properties']['title'], [])
+        return {}
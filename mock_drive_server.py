@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Google Drive downloads, serving recordings from a directory.
+Point the app at it with DRIVE_DOWNLOAD_URL=http://127.0.0.1:<port>/uc?export=download&id={file_id}
+"""
+
+import argparse
+import mimetypes
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+class MockDriveServer:
+    """Threaded HTTP server with Range support and optional throttling and dropped connections"""
+
+    def __init__(self, root_dir, host='127.0.0.1', port=0, rate_kbps=None, drop_after_bytes=None):
+        self.root_dir = root_dir
+        self.rate_kbps = rate_kbps
+        self.drop_after_bytes = drop_after_bytes
+        self.request_count = 0
+        self.bytes_sent = 0
+        self._dropped = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server._handle_download(self)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        # Dropped connections are deliberate here, so do not print their tracebacks
+        self.httpd.handle_error = lambda request, client_address: None
+
+    @property
+    def url_template(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/uc?export=download&id={{file_id}}"
+
+    def _find_file(self, file_id):
+        for name in sorted(os.listdir(self.root_dir)):
+            if os.path.splitext(name)[0] == file_id and not name.endswith('.txt'):
+                return os.path.join(self.root_dir, name)
+        return None
+
+    def _handle_download(self, handler):
+        with self._lock:
+            self.request_count += 1
+
+        file_id = parse_qs(urlparse(handler.path).query).get('id', [''])[0]
+        path = self._find_file(file_id) if file_id else None
+        if not path:
+            body = b"Not found"
+            handler.send_response(404)
+            handler.send_header('Content-Type', 'text/plain')
+            handler.send_header('Content-Length', str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+            return
+
+        size = os.path.getsize(path)
+        start = 0
+        range_header = handler.headers.get('Range', '')
+        if range_header.startswith('bytes='):
+            start = int(range_header[6:].split('-')[0] or 0)
+            if start >= size:
+                handler.send_response(416)
+                handler.send_header('Content-Range', f"bytes */{size}")
+                handler.send_header('Content-Length', '0')
+                handler.end_headers()
+                return
+
+        handler.send_response(206 if start else 200)
+        handler.send_header('Content-Type', mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        handler.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(path)}"')
+        handler.send_header('Content-Length', str(size - start))
+        handler.send_header('Accept-Ranges', 'bytes')
+        if start:
+            handler.send_header('Content-Range', f"bytes {start}-{size - 1}/{size}")
+        handler.end_headers()
+
+        # The first full download of each file can be cut short to exercise resuming
+        with self._lock:
+            drop = self.drop_after_bytes is not None and not start and file_id not in self._dropped
+            if drop:
+                self._dropped.add(file_id)
+
+        sent = 0
+        with open(path, 'rb') as f:
+            f.seek(start)
+            for block in iter(lambda: f.read(16384), b''):
+                if drop and sent + len(block) > self.drop_after_bytes:
+                    handler.wfile.write(block[:self.drop_after_bytes - sent])
+                    handler.close_connection = True
+                    return
+                handler.wfile.write(block)
+                sent += len(block)
+                with self._lock:
+                    self.bytes_sent += len(block)
+                if self.rate_kbps:
+                    time.sleep(len(block) / (self.rate_kbps * 1024))
+
+    def start(self):
+        """Serve in a background thread and return the download URL template"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url_template
+
+    def stop(self):
+        """Stop serving"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recordings like Google Drive downloads")
+    parser.add_argument('root_dir', help="Directory of recordings named <file ID>.<extension>")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8012)
+    parser.add_argument('--rate-kbps', type=float, default=None, help="Throttle each download")
+    parser.add_argument('--drop-after-bytes', type=int, default=None, help="Cut the first download of each file short")
+    args = parser.parse_args()
+
+    server = MockDriveServer(args.root_dir, args.host, args.port, args.rate_kbps, args.drop_after_bytes)
+    print(f"🧪 Mock Drive server serving {args.root_dir}")
+    print(f"💡 Set DRIVE_DOWNLOAD_URL={server.url_template}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Mock Drive server stopped")
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
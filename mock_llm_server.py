@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Deterministic local stand-in for the OpenAI chat completions API.
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER_LETTERS = ['A', 'B', 'C', 'D']
+
+def _stable_int(text):
+    """Stable integer hash of a string (Python's hash() is salted per process)"""
+    return int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:12], 16)
+
+def _count_tokens(text):
+    """Rough token count used for the usage block"""
+    return max(1, len(text) // 4)
+
+class LatencyModel:
+    """Sample response latencies from a fixed, uniform or lognormal distribution"""
+
+    def __init__(self, spec='fixed:0', seed=42):
+        self.spec = spec
+        parts = spec.split(':')
+        self.kind = parts[0]
+        self.params = [float(p) for p in parts[1:]]
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        if self.kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self):
+        """Draw one latency in seconds"""
+        with self._lock:
+            if self.kind == 'fixed':
+                return self.params[0] if self.params else 0.0
+            if self.kind == 'uniform':
+                return self._random.uniform(self.params[0], self.params[1])
+            # lognormal:<mu>:<sigma> of the natural log of the latency in seconds
+            return self._random.lognormvariate(self.params[0], self.params[1])
+
+class MockLLMResponder:
+    """Build canned or templated completions for the prompts the app sends"""
+
+    def respond(self, prompt, json_mode):
+        """Return the completion text for a prompt"""
+        if 'items you returned are invalid' in prompt:
+            return self._repair_response(prompt)
+        if 'multiple-choice quiz questions' in prompt:
+            return self._quiz_response(prompt, json_mode)
+        if 'Transcript:' in prompt:
+            return self._score_response(prompt, json_mode)
+        if json_mode:
+            return json.dumps({"response": "ready"})
+        return "ready"
+
+    def _topics(self, prompt):
+        match = re.search(r'(?:topics|questions on):\s*(.+)', prompt)
+        topics = [t.strip() for t in match.group(1).split(',')] if match else []
+        return [t for t in topics if t] or ['Artificial Intelligence']
+
+    def _make_question(self, topic, number, salt=''):
+        seed = _stable_int(f"{topic}|{number}|{salt}")
+        correct = ANSWER_LETTERS[seed % 4]
+        aspects = ['core definition', 'typical use case', 'main limitation', 'key assumption',
+                   'evaluation metric', 'common pitfall', 'training procedure', 'historical origin']
+        aspect = aspects[(seed // 4) % len(aspects)]
+        options = {letter: f"{topic} {aspect} option {letter}{seed % 997}" for letter in ANSWER_LETTERS}
+        options[correct] = f"The accepted {aspect} of {topic} (variant {seed % 997})"
+        return {
+            "question": f"Which statement best describes the {aspect} of {topic} (item {number}-{seed % 9973})?",
+            "options": options,
+            "correct_answer": correct,
+            "difficulty": ['easy', 'medium', 'hard'][seed % 3]
+        }
+
+    def _quiz_response(self, prompt, json_mode):
+        match = re.search(r'Generate (\d+)', prompt)
+        count = int(match.group(1)) if match else 10
+        topics = self._topics(prompt)
+        salt = str(_stable_int(prompt) % 100000)
+        questions = [self._make_question(topics[i % len(topics)], i + 1, salt) for i in range(count)]
+
+        if json_mode:
+            return json.dumps({"questions": questions})
+
+        blocks = []
+        for question in questions:
+            lines = [f"Question: {question['question']}"]
+            lines += [f"{letter}) {question['options'][letter]}" for letter in ANSWER_LETTERS]
+            lines.append(f"Correct Answer: {question['correct_answer']}")
+            blocks.append('\n'.join(lines))
+        return '\n\n'.join(blocks)
+
+    def _score_response(self, prompt, json_mode):
+        transcript = prompt.split('Transcript:', 1)[1]
+        keywords = ['machine learning', 'data', 'python', 'ai', 'artificial intelligence', 'project', 'model', 'goal']
+        words = re.findall(r"[a-z']+", transcript.lower())
+        coverage = sum(1 for keyword in keywords if keyword in transcript.lower())
+        # Longer, on-topic introductions score higher; the hash adds a stable spread
+        score = 3 + min(4, coverage) + min(2, len(words) // 60) + _stable_int(transcript) % 2
+        score = max(1, min(10, score))
+        feedback = {
+            "score": score,
+            "strengths": "Clear structure and relevant AI/Data Science background.",
+            "improvements": "Add concrete project outcomes and speak more concisely.",
+            "assessment": "Suitable candidate." if score >= 7 else "Below the selection bar."
+        }
+        if json_mode:
+            return json.dumps(feedback)
+        return (
+            f"Score: {score}\nStrengths: {feedback['strengths']}\n"
+            f"Improvements: {feedback['improvements']}\nAssessment: {feedback['assessment']}"
+        )
+
+    def _repair_response(self, prompt):
+        match = re.search(r'containing exactly (\d+)', prompt)
+        count = int(match.group(1)) if match else 1
+        if 'score items' in prompt:
+            items = [json.loads(self._score_response(prompt, True)) for _ in range(count)]
+        else:
+            topics = self._topics(prompt)
+            items = [self._make_question(topics[i % len(topics)], i + 1, 'repair') for i in range(count)]
+        return json.dumps({"items": items})
+
+class MockLLMServer:
+    """Threaded HTTP server speaking the OpenAI chat completions protocol"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency='fixed:0', error_rate=0.0, error_status=500, seed=42):
+        self.latency = LatencyModel(latency, seed)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.responder = MockLLMResponder()
+        self.request_count = 0
+        self._random = random.Random(seed + 1)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out as separate writes; without this, Nagle plus delayed ACKs add ~40ms per call
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip('/').endswith('/models'):
+                    self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": "Not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+                    return
+
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self._send_json(404, {"error": {"message": "Not found"}})
+                    return
+
+                server._handle_completion(self, body)
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _should_fail(self):
+        with self._lock:
+            self.request_count += 1
+            return self.error_rate > 0 and self._random.random() < self.error_rate
+
+    def _handle_completion(self, handler, body):
+        time.sleep(self.latency.sample())
+
+        if self._should_fail():
+            handler._send_json(self.error_status, {
+                "error": {"message": "Injected mock failure", "type": "server_error", "code": None}
+            })
+            return
+
+        prompt = '\n'.join(str(m.get('content', '')) for m in body.get('messages', []))
+        json_mode = (body.get('response_format') or {}).get('type') in ('json_object', 'json_schema')
+        text = self.responder.respond(prompt, json_mode)
+        model = body.get('model', 'mock')
+        usage = {
+            "prompt_tokens": _count_tokens(prompt),
+            "completion_tokens": _count_tokens(text),
+            "total_tokens": _count_tokens(prompt) + _count_tokens(text)
+        }
+        completion_id = f"chatcmpl-mock{_stable_int(prompt) % 10 ** 8}"
+
+        if body.get('stream'):
+            self._stream(handler, completion_id, model, text, usage, (body.get('stream_options') or {}).get('include_usage'))
+            return
+
+        handler._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+    def _stream(self, handler, completion_id, model, text, usage, include_usage):
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.send_header('Connection', 'close')
+        handler.end_headers()
+        handler.close_connection = True
+
+        def send(payload):
+            handler.wfile.write(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+            handler.wfile.flush()
+
+        base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        # Split into ~8-character chunks to mimic token-by-token delivery
+        pieces = [text[i:i + 8] for i in range(0, len(text), 8)] or ['']
+        per_piece_delay = min(0.01, 1.0 / max(1, len(pieces)))
+        for piece in pieces:
+            send(dict(base, choices=[{"index": 0, "delta": {"content": piece}, "finish_reason": None}]))
+            time.sleep(per_piece_delay)
+        send(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        if include_usage:
+            send(dict(base, choices=[], usage=usage))
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.wfile.flush()
+
+    def start(self):
+        """Serve in a background thread and return the base URL"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """Stop serving"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a deterministic mock OpenAI server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8011)
+    parser.add_argument('--latency', default='fixed:0',
+                        help="fixed:<s>, uniform:<min>:<max> or lognormal:<mu>:<sigma>")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument('--error-status', type=int, default=500, help="HTTP status for injected failures")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency, args.error_rate, args.error_status, args.seed)
+    print(f"🧪 Mock LLM server listening on {server.base_url}")
+    print(f"💡 Set OPENAI_BASE_URL={server.base_url} to use it")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Mock LLM server stopped")
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import threading
+from config import (
+    OPENAI_MODEL,
+    OPENAI_FALLBACK_MODEL,
+    LLM_MODEL_ROUTING,
+    OPENAI_GENERATION_MODEL,
+    OPENAI_SCORING_MODEL,
+    OPENAI_ESCALATION_MODEL,
+    VOICE_PASSING_MARKS,
+    VOICE_ESCALATION_MARGIN
+)
+from llm_provider import MODEL, OpenAIModel
+
+# Model per task; tasks not listed use OPENAI_MODEL
+TASK_MODELS = {
+    'quiz_generation': OPENAI_GENERATION_MODEL,
+    'voice_scoring': OPENAI_SCORING_MODEL,
+    'voice_escalation': OPENAI_ESCALATION_MODEL
+}
+
+class ModelRouter:
+    """Pick a model per task: cheap first passes, a stronger model only where the decision is close"""
+
+    def __init__(self, task_models=None, enabled=LLM_MODEL_ROUTING):
+        self.task_models = dict(TASK_MODELS if task_models is None else task_models)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._models = {MODEL.model_id: MODEL}
+
+    def model_for(self, task):
+        """Get the OpenAIModel that serves a task"""
+        model_id = self.task_models.get(task, OPENAI_MODEL) if self.enabled else OPENAI_MODEL
+        with self._lock:
+            if model_id not in self._models:
+                self._models[model_id] = OpenAIModel(model_id, OPENAI_FALLBACK_MODEL or None)
+            return self._models[model_id]
+
+    def should_escalate(self, score, passing_marks=VOICE_PASSING_MARKS, margin=VOICE_ESCALATION_MARGIN):
+        """Escalate a first-pass score that is missing or lands within the margin of the passing mark"""
+        if not self.enabled or self.task_models.get('voice_escalation') == self.task_models.get('voice_scoring'):
+            return False
+        return score is None or abs(score - passing_marks) <= margin
+
+# Global router instance
+model_router = ModelRouter()
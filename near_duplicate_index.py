@@ -0,0 +1,100 @@
+import hashlib
+import random
+import re
+import threading
+from collections import defaultdict
+import numpy as np
+
+# Mersenne prime 2^61 - 1, the modulus for the universal hash family
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+def question_index_text(question):
+    """Text indexed for a quiz question: the question followed by its options"""
+    return ' '.join([
+        question.get('question', ''),
+        question.get('option1', ''),
+        question.get('option2', ''),
+        question.get('option3', ''),
+        question.get('option4', '')
+    ])
+
+class MinHashLSHIndex:
+    """Word-shingle MinHash signatures banded into an LSH table for sublinear near-duplicate lookup"""
+
+    def __init__(self, num_perm=128, bands=32, threshold=0.6, shingle_size=2, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        # Coefficients below 2^32 keep a * shingle + b inside uint64 for 32-bit shingle hashes
+        rng = random.Random(seed)
+        self._a = np.array([rng.randrange(1, MAX_HASH) for _ in range(num_perm)], dtype=np.uint64)
+        self._b = np.array([rng.randrange(0, MAX_HASH) for _ in range(num_perm)], dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._buckets = [defaultdict(set) for _ in range(bands)]
+        self._signatures = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, key):
+        return key in self._signatures
+
+    def _shingles(self, text):
+        """Hashed word n-grams of the normalized text"""
+        words = re.sub(r'[^a-z0-9]+', ' ', text.lower()).split()
+        if len(words) < self.shingle_size:
+            grams = [' '.join(words)] if words else ['']
+        else:
+            grams = [' '.join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+        return np.array(sorted({
+            int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=4).digest(), 'big')
+            for gram in grams
+        }), dtype=np.uint64)
+
+    def signature(self, text):
+        """MinHash signature of a text, one permutation per column computed in a single pass"""
+        shingles = self._shingles(text)
+        hashed = (np.outer(shingles, self._a) + self._b) % np.uint64(MERSENNE_PRIME) & np.uint64(MAX_HASH)
+        return tuple(int(value) for value in hashed.min(axis=0))
+
+    def _band_keys(self, signature):
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def similarity(self, signature_a, signature_b):
+        """Estimated Jaccard similarity of two signatures"""
+        matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+        return matches / self.num_perm
+
+    def add(self, key, text=None, signature=None):
+        """Index a text (or a precomputed signature) under a key"""
+        signature = signature or self.signature(text)
+        with self._lock:
+            if key in self._signatures:
+                return
+            self._signatures[key] = signature
+            for band, band_key in self._band_keys(signature):
+                self._buckets[band][band_key].add(key)
+
+    def query(self, text=None, signature=None, threshold=None):
+        """Keys whose estimated similarity meets the threshold, most similar first"""
+        signature = signature or self.signature(text)
+        threshold = self.threshold if threshold is None else threshold
+
+        with self._lock:
+            # Only keys sharing at least one band bucket are compared
+            candidates = set()
+            for band, band_key in self._band_keys(signature):
+                candidates.update(self._buckets[band].get(band_key, ()))
+            scored = [(key, self.similarity(signature, self._signatures[key])) for key in candidates]
+
+        matches = [(key, score) for key, score in scored if score >= threshold]
+        return sorted(matches, key=lambda match: match[1], reverse=True)
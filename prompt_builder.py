@@ -0,0 +1,133 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+from config import OPENAI_MODEL, PROMPT_TOKEN_BUDGET, TRANSCRIPT_TOKEN_BUDGET, TRANSCRIPT_TRIM_MODE
+from llm_metrics import metrics
+
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+def _get_encoder(model):
+    """Get the tiktoken encoder for a model, or None when tiktoken is not installed"""
+    with _encoders_lock:
+        if model not in _encoders:
+            try:
+                import tiktoken
+            except ImportError:
+                _encoders[model] = None
+            else:
+                try:
+                    _encoders[model] = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    _encoders[model] = tiktoken.get_encoding('cl100k_base')
+        return _encoders[model]
+
+def count_tokens(text, model=OPENAI_MODEL):
+    """Count prompt tokens locally, exactly with tiktoken or with a ~4 characters per token estimate"""
+    if not text:
+        return 0
+    encoder = _get_encoder(model)
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return max(len(text.split()), math.ceil(len(text) / 4))
+
+def _split_words(text):
+    """Split text into words that keep their trailing whitespace, so joins are lossless"""
+    return re.findall(r'\S+\s*', text)
+
+def _take_words(words, max_tokens, model):
+    """Longest run of words from the start whose token count fits the budget"""
+    taken = []
+    used = 0
+    for word in words:
+        tokens = count_tokens(word, model)
+        if used + tokens > max_tokens:
+            break
+        taken.append(word)
+        used += tokens
+    return taken
+
+def truncate_to_tokens(text, max_tokens, model=OPENAI_MODEL):
+    """Keep the head and tail of an overlong text, marking the omitted middle"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    marker = ' [... transcript trimmed ...] '
+    budget = max(0, max_tokens - count_tokens(marker, model))
+    words = _split_words(text)
+    # Introductions front-load who the speaker is and close with their goals, so keep both ends
+    head = _take_words(words, math.ceil(budget * 0.7), model)
+    tail = _take_words(list(reversed(words[len(head):])), budget - sum(count_tokens(w, model) for w in head), model)
+    return ''.join(head).rstrip() + marker + ''.join(reversed(tail)).strip()
+
+def summarize_to_tokens(text, max_tokens, model=OPENAI_MODEL):
+    """Extractive summary: the highest-scoring sentences that fit the budget, in their original order"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+    if len(sentences) < 2:
+        return truncate_to_tokens(text, max_tokens, model)
+
+    # Score sentences by the average document frequency of their content words
+    sentence_words = [re.findall(r'[a-z]{4,}', sentence.lower()) for sentence in sentences]
+    frequencies = Counter(word for words in sentence_words for word in words)
+    scores = [
+        sum(frequencies[word] for word in words) / max(1, len(words))
+        for words in sentence_words
+    ]
+
+    # The opening sentence usually introduces the speaker, so it is always kept first
+    ranked = [0] + sorted(range(1, len(sentences)), key=lambda i: (-scores[i], i))
+    chosen = []
+    used = 0
+    for index in ranked:
+        tokens = count_tokens(sentences[index], model) + 1
+        if used + tokens <= max_tokens:
+            chosen.append(index)
+            used += tokens
+
+    if not chosen:
+        return truncate_to_tokens(text, max_tokens, model)
+    return ' '.join(sentences[index] for index in sorted(chosen))
+
+class PromptBuilder:
+    """Build prompts as a stable instruction prefix followed by a token-budgeted variable section"""
+
+    def __init__(self, prefix, model=OPENAI_MODEL, prompt_budget=PROMPT_TOKEN_BUDGET,
+                 section_budget=TRANSCRIPT_TOKEN_BUDGET, trim_mode=TRANSCRIPT_TRIM_MODE):
+        self.prefix = prefix
+        self.model = model
+        self.prompt_budget = prompt_budget
+        self.section_budget = section_budget
+        self.trim_mode = trim_mode
+        self.prefix_tokens = count_tokens(prefix, model)
+
+    @property
+    def prefix_hash(self):
+        """Short hash of the instruction prefix; changes whenever the prompt wording changes"""
+        return hashlib.sha256(self.prefix.encode('utf-8')).hexdigest()[:12]
+
+    def fit(self, text, reserved_tokens=0):
+        """Trim a variable section to whatever budget is left after the prefix"""
+        budget = max(0, min(self.section_budget, self.prompt_budget - self.prefix_tokens - reserved_tokens))
+        if self.trim_mode == 'truncate':
+            return truncate_to_tokens(text, budget, self.model)
+        return summarize_to_tokens(text, budget, self.model)
+
+    def build(self, text, label='Transcript', tag=None, context=None):
+        """Build the prompt with the variable section last, recording the tokens trimming saved.
+        A short context block goes untrimmed between the prefix and the variable section."""
+        original_tokens = count_tokens(text, self.model)
+        fitted = self.fit(text, count_tokens(context, self.model) if context else 0)
+        fitted_tokens = original_tokens if fitted == text else count_tokens(fitted, self.model)
+
+        metrics.record_prompt_savings(tag, original_tokens, fitted_tokens)
+        if fitted_tokens < original_tokens:
+            print(f"✂️ Trimmed {label.lower()} from {original_tokens} to {fitted_tokens} tokens")
+
+        if context:
+            return f"{self.prefix}\n{context}\n{label}:\n{fitted}\n"
+        return f"{self.prefix}\n{label}:\n{fitted}\n"
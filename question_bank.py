@@ -0,0 +1,163 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from config import QUESTION_BANK_PATH
+from structured_output import DIFFICULTY_LEVELS
+
+def normalize_topic(topic):
+    """Normalize a topic so 'Machine Learning', 'machine-learning ' and 'MACHINE LEARNING' share a key"""
+    topic = topic.lower().replace('&', ' and ')
+    topic = re.sub(r'[^a-z0-9+#]+', ' ', topic)
+    return ' '.join(topic.split())
+
+def question_fingerprint(question):
+    """Exact-duplicate fingerprint over the normalized question text"""
+    text = ' '.join(re.sub(r'[^a-z0-9]+', ' ', question.get('question', '').lower()).split())
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+class QuestionBank:
+    """Persistent SQLite store of generated quiz questions keyed by normalized topic"""
+
+    def __init__(self, db_path=QUESTION_BANK_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        """Open the database on first use and create the schema"""
+        if self._connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS questions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    topic_key TEXT NOT NULL,
+                    topic TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    option1 TEXT NOT NULL,
+                    option2 TEXT NOT NULL,
+                    option3 TEXT NOT NULL,
+                    option4 TEXT NOT NULL,
+                    correct_answer TEXT NOT NULL,
+                    difficulty TEXT NOT NULL DEFAULT 'medium',
+                    usage_count INTEGER NOT NULL DEFAULT 0,
+                    last_used_at TEXT,
+                    created_at TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL UNIQUE
+                );
+                CREATE INDEX IF NOT EXISTS idx_questions_topic_usage ON questions (topic_key, usage_count, id);
+            """)
+        return self._connection
+
+    def _row_to_question(self, row):
+        return {
+            'id': row['id'],
+            'topic': row['topic'],
+            'question': row['question'],
+            'option1': row['option1'],
+            'option2': row['option2'],
+            'option3': row['option3'],
+            'option4': row['option4'],
+            'correct_answer': row['correct_answer'],
+            'difficulty': row['difficulty'],
+            'usage_count': row['usage_count']
+        }
+
+    def add_questions(self, topic, questions, used=False):
+        """Add questions under a topic, skipping exact duplicates; returns the number added.
+        With used=True they are counted as already put in a quiz."""
+        now = datetime.now().isoformat(timespec='seconds')
+        rows = [
+            (
+                normalize_topic(topic), topic,
+                q['question'], q['option1'], q['option2'], q['option3'], q['option4'], q['correct_answer'],
+                q.get('difficulty') if q.get('difficulty') in DIFFICULTY_LEVELS else 'medium',
+                int(used), now if used else None, now, question_fingerprint(q)
+            )
+            for q in questions
+        ]
+        with self._lock:
+            connection = self._connect()
+            before = connection.total_changes
+            connection.executemany("""
+                INSERT OR IGNORE INTO questions (
+                    topic_key, topic, question, option1, option2, option3, option4,
+                    correct_answer, difficulty, usage_count, last_used_at, created_at, fingerprint
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            connection.commit()
+            return connection.total_changes - before
+
+    def unused_count(self, topic):
+        """Number of questions for the topic that have never been put in a quiz"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT COUNT(*) FROM questions WHERE topic_key = ? AND usage_count = 0",
+                (normalize_topic(topic),)
+            ).fetchone()
+            return row[0]
+
+    def take_questions(self, topic, count):
+        """Take the least-used questions for a topic and count them as used"""
+        if count <= 0:
+            return []
+
+        with self._lock:
+            connection = self._connect()
+            rows = connection.execute("""
+                SELECT * FROM questions
+                WHERE topic_key = ?
+                ORDER BY usage_count ASC, id ASC
+                LIMIT ?
+            """, (normalize_topic(topic), count)).fetchall()
+
+            connection.executemany(
+                "UPDATE questions SET usage_count = usage_count + 1, last_used_at = ? WHERE id = ?",
+                [(datetime.now().isoformat(timespec='seconds'), row['id']) for row in rows]
+            )
+            connection.commit()
+            return [self._row_to_question(row) for row in rows]
+
+    def get_questions(self, topic=None):
+        """Get all stored questions, optionally for one topic"""
+        with self._lock:
+            connection = self._connect()
+            if topic is None:
+                rows = connection.execute("SELECT * FROM questions ORDER BY id").fetchall()
+            else:
+                rows = connection.execute(
+                    "SELECT * FROM questions WHERE topic_key = ? ORDER BY id",
+                    (normalize_topic(topic),)
+                ).fetchall()
+            return [self._row_to_question(row) for row in rows]
+
+    def topic_stats(self):
+        """Question, unused and difficulty counts per topic"""
+        with self._lock:
+            rows = self._connect().execute("""
+                SELECT topic_key,
+                       MIN(topic) AS topic,
+                       COUNT(*) AS questions,
+                       SUM(CASE WHEN usage_count = 0 THEN 1 ELSE 0 END) AS unused,
+                       SUM(CASE WHEN difficulty = 'easy' THEN 1 ELSE 0 END) AS easy,
+                       SUM(CASE WHEN difficulty = 'medium' THEN 1 ELSE 0 END) AS medium,
+                       SUM(CASE WHEN difficulty = 'hard' THEN 1 ELSE 0 END) AS hard,
+                       SUM(usage_count) AS total_uses
+                FROM questions
+                GROUP BY topic_key
+                ORDER BY topic_key
+            """).fetchall()
+            return [dict(row) for row in rows]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,197 @@
+import atexit
+import smtplib
+import threading
+import time
+from collections import deque
+from config import (
+    EMAIL_SMTP_SERVER,
+    EMAIL_SMTP_PORT,
+    EMAIL_USERNAME,
+    EMAIL_PASSWORD,
+    EMAIL_SMTP_USE_TLS,
+    EMAIL_SMTP_POOL_SIZE,
+    EMAIL_SMTP_TIMEOUT,
+    EMAIL_SMTP_NOOP_AFTER_SECONDS,
+    EMAIL_SMTP_MAX_IDLE_SECONDS,
+    EMAIL_SMTP_MAX_MESSAGES_PER_CONNECTION,
+    EMAIL_PROVIDER_LIMITS,
+    EMAIL_DEFAULT_PROVIDER_LIMITS
+)
+
+# The session is gone; the message is retried once on a fresh connection
+RECONNECT_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    smtplib.SMTPHeloError,
+    ConnectionError,
+    TimeoutError
+)
+
+def provider_limits(host):
+    """(sessions, messages per minute, messages per day) for an SMTP host"""
+    host = (host or '').lower()
+    for suffix, limits in EMAIL_PROVIDER_LIMITS.items():
+        if host == suffix or host.endswith('.' + suffix):
+            return limits
+    return EMAIL_DEFAULT_PROVIDER_LIMITS
+
+class PooledConnection:
+    """An authenticated SMTP session with its age and message count"""
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages = 0
+
+class SMTPConnectionPool:
+    """Keep-alive SMTP sessions shared by every sender: one TLS handshake and login per connection,
+    NOOP checks on idle sessions, and a transparent reconnect when the server drops one"""
+
+    def __init__(self, host=EMAIL_SMTP_SERVER, port=EMAIL_SMTP_PORT, username=EMAIL_USERNAME, password=EMAIL_PASSWORD,
+                 use_tls=EMAIL_SMTP_USE_TLS, size=EMAIL_SMTP_POOL_SIZE, timeout=EMAIL_SMTP_TIMEOUT,
+                 noop_after=EMAIL_SMTP_NOOP_AFTER_SECONDS, max_idle=EMAIL_SMTP_MAX_IDLE_SECONDS,
+                 max_messages=EMAIL_SMTP_MAX_MESSAGES_PER_CONNECTION):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = max(1, size or provider_limits(host)[0])
+        self.timeout = timeout
+        self.noop_after = noop_after
+        self.max_idle = max_idle
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle = deque()
+        self.connections_opened = 0
+        self.reconnects = 0
+        self.noop_checks = 0
+        self.messages_sent = 0
+
+    def _connect(self):
+        if self.port == 465:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                smtp.starttls()
+        try:
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return PooledConnection(smtp)
+
+    def _discard(self, connection):
+        try:
+            connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    def _checkout(self):
+        """Most recently used healthy session, or a new one"""
+        while True:
+            with self._lock:
+                # LIFO keeps traffic on the warmest sessions and lets spare ones idle out
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect()
+
+            idle_for = time.monotonic() - connection.last_used
+            if idle_for > self.max_idle:
+                self._discard(connection)
+                continue
+            if idle_for > self.noop_after:
+                with self._lock:
+                    self.noop_checks += 1
+                try:
+                    healthy = connection.smtp.noop()[0] == 250
+                except Exception:
+                    healthy = False
+                if not healthy:
+                    connection.smtp.close()
+                    continue
+            return connection
+
+    def _checkin(self, connection):
+        if connection.messages >= self.max_messages:
+            # Providers cap messages per session; start the next batch on a fresh one
+            self._discard(connection)
+            return
+        connection.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(connection)
+
+    def _should_reconnect(self, error):
+        # 421 is the server closing the session (e.g. too many messages or idle too long)
+        return isinstance(error, RECONNECT_ERRORS) or getattr(error, 'smtp_code', None) == 421
+
+    def send(self, from_addr, to_addrs, message):
+        """Send a message over a pooled session, returning the refused recipients like smtplib.sendmail"""
+        with self._slots:
+            for attempt in range(2):
+                connection = self._checkout()
+                try:
+                    refused = connection.smtp.sendmail(from_addr, to_addrs, message)
+                except Exception as e:
+                    if self._should_reconnect(e):
+                        connection.smtp.close()
+                        if attempt == 0:
+                            with self._lock:
+                                self.reconnects += 1
+                            print(f"🔌 SMTP session to {self.host} dropped ({e}), reconnecting")
+                            continue
+                    elif isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException)):
+                        # A refused message leaves the session usable (smtplib has already sent RSET)
+                        self._checkin(connection)
+                    else:
+                        self._discard(connection)
+                    raise
+
+                connection.messages += 1
+                with self._lock:
+                    self.messages_sent += 1
+                self._checkin(connection)
+                return refused
+
+    def stats(self):
+        with self._lock:
+            return {
+                'host': self.host,
+                'idle_connections': len(self._idle),
+                'connections_opened': self.connections_opened,
+                'reconnects': self.reconnects,
+                'noop_checks': self.noop_checks,
+                'messages_sent': self.messages_sent
+            }
+
+    def close(self):
+        """Quit every idle session"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            self._discard(connection)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_smtp_pool(host=EMAIL_SMTP_SERVER, port=EMAIL_SMTP_PORT, username=EMAIL_USERNAME, password=EMAIL_PASSWORD):
+    """Process-wide pool for an SMTP account, shared by every EmailService"""
+    key = (host, port, username)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SMTPConnectionPool(host, port, username, password)
+        return _pools[key]
+
+def close_smtp_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+atexit.register(close_smtp_pools)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Local SMTP stand-in that accepts and counts mail without delivering it.
+Point the app at it with EMAIL_SMTP_SERVER=127.0.0.1 EMAIL_SMTP_PORT=<port> EMAIL_SMTP_USE_TLS=false
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import threading
+import time
+
+class SMTPSink:
+    """asyncio SMTP server advertising PIPELINING and AUTH, with optional per-message latency,
+    dropped sessions and rejected messages, and optionally saving each message as a .eml file"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, drop_after=None, reject_rate=0.0,
+                 save_dir=None, seed=42):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.drop_after = drop_after
+        self.reject_rate = reject_rate
+        self.save_dir = save_dir
+        self.connection_count = 0
+        self.message_count = 0
+        self.rejected_count = 0
+        self.bytes_received = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._server = None
+        self._stopping = None
+        self._sessions = set()
+        self._thread = None
+        self._ready = threading.Event()
+
+    async def _handle(self, reader, writer):
+        self._sessions.add(asyncio.current_task())
+        with self._lock:
+            self.connection_count += 1
+        messages = 0
+        sender, recipients = None, []
+
+        def reply(line):
+            writer.write(line.encode('ascii') + b"\r\n")
+
+        reply("220 smtp-sink ESMTP ready")
+        try:
+            while True:
+                await writer.drain()
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.decode('utf-8', 'replace').strip()
+                verb = command[:4].upper()
+                if verb in ('EHLO', 'HELO'):
+                    reply("250-smtp-sink")
+                    reply("250-PIPELINING")
+                    reply("250-8BITMIME")
+                    reply("250-SIZE 52428800")
+                    reply("250 AUTH PLAIN LOGIN")
+                elif verb == 'AUTH':
+                    # Any credentials are accepted; prompt for whatever was not sent with the command
+                    parts = command.split()
+                    mechanism = parts[1].upper() if len(parts) > 1 else 'PLAIN'
+                    if mechanism == 'LOGIN':
+                        prompts = ["334 UGFzc3dvcmQ6"] if len(parts) > 2 else ["334 VXNlcm5hbWU6", "334 UGFzc3dvcmQ6"]
+                    else:
+                        prompts = [] if len(parts) > 2 else ["334 "]
+                    for prompt in prompts:
+                        reply(prompt)
+                        await writer.drain()
+                        await reader.readline()
+                    reply("235 2.7.0 Authentication successful")
+                elif verb == 'MAIL':
+                    sender, recipients = command[10:].strip(), []
+                    reply("250 2.1.0 OK")
+                elif verb == 'RCPT':
+                    recipients.append(command[8:].strip())
+                    reply("250 2.1.5 OK")
+                elif verb == 'DATA':
+                    if not sender or not recipients:
+                        reply("503 5.5.1 Need MAIL and RCPT first")
+                        continue
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    lines = []
+                    while True:
+                        data_line = await reader.readline()
+                        if not data_line or data_line in (b".\r\n", b".\n"):
+                            break
+                        lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                    if not data_line:
+                        return
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    messages += 1
+                    if self.reject_rate and self._rng.random() < self.reject_rate:
+                        with self._lock:
+                            self.rejected_count += 1
+                        reply("451 4.3.0 Temporary failure, try again later")
+                    else:
+                        self._accept(b"".join(lines))
+                        reply("250 2.0.0 Queued")
+                    sender, recipients = None, []
+                    if self.drop_after and messages >= self.drop_after:
+                        # Providers close long sessions with a 421
+                        reply("421 4.7.0 Too many messages in this session, closing")
+                        await writer.drain()
+                        return
+                elif verb == 'RSET':
+                    sender, recipients = None, []
+                    reply("250 2.0.0 OK")
+                elif verb == 'NOOP':
+                    reply("250 2.0.0 OK")
+                elif verb == 'QUIT':
+                    reply("221 2.0.0 Bye")
+                    await writer.drain()
+                    return
+                else:
+                    reply("502 5.5.2 Command not recognized")
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            self._sessions.discard(asyncio.current_task())
+
+    def _accept(self, message):
+        with self._lock:
+            self.message_count += 1
+            self.bytes_received += len(message)
+            number = self.message_count
+        if self.save_dir:
+            os.makedirs(self.save_dir, exist_ok=True)
+            with open(os.path.join(self.save_dir, f"{number:06d}.eml"), 'wb') as f:
+                f.write(message)
+
+    async def _serve(self):
+        self._stopping = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        await self._stopping.wait()
+        self._server.close()
+        # Open sessions are closed too, so clients see the disconnect instead of waiting for a reply
+        sessions = list(self._sessions)
+        for session in sessions:
+            session.cancel()
+        await asyncio.gather(*sessions, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._loop.close()
+
+    def start(self):
+        """Serve from a background thread and return (host, port)"""
+        self._thread = threading.Thread(target=self._run, name='smtp-sink', daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        return self.host, self.port
+
+    def stop(self):
+        """Stop serving"""
+        if self._loop and self._server:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread:
+            self._thread.join(5)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'connections': self.connection_count,
+                'messages': self.message_count,
+                'rejected': self.rejected_count,
+                'bytes_received': self.bytes_received
+            }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local SMTP sink that accepts and counts mail")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds spent accepting each message")
+    parser.add_argument('--drop-after', type=int, default=None, help="Close each session with a 421 after this many messages")
+    parser.add_argument('--reject-rate', type=float, default=0.0, help="Fraction of messages answered with a 451")
+    parser.add_argument('--save-dir', default=None, help="Write each accepted message to <dir>/<n>.eml")
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, args.latency, args.drop_after, args.reject_rate, args.save_dir)
+    host, port = sink.start()
+    print(f"🧪 SMTP sink listening on {host}:{port}")
+    print(f"💡 Set EMAIL_SMTP_SERVER={host} EMAIL_SMTP_PORT={port} EMAIL_SMTP_USE_TLS=false to use it")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"📬 {sink.stats()}")
+    except KeyboardInterrupt:
+        print("\n👋 SMTP sink stopped")
+    finally:
+        sink.stop()
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from datetime import datetime
 from crewai_workflow import AISBOnboardingWorkflow
 from google_sheets_manager import GoogleSheetsManager
 from email_service import EmailService
+from llm_gateway import gateway
+from llm_metrics import metrics
 import time
 
 def calculate_student_score(responses):
@@ -128,6 +130,73 @@ def show_dashboard():
             
     except Exception as e:
         st.error(f"Error loading dashboard: {e}")
+    
+    show_llm_usage()
+
+def show_llm_usage():
+    """Show LLM token, latency and cost totals per workflow run and stage"""
+    st.subheader("📈 LLM Usage")
+    
+    run_totals = metrics.run_totals()
+    if not run_totals:
+        st.info("No LLM usage recorded yet. Run a workflow step first!")
+        return
+    
+    latest_run = run_totals[0]
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("LLM Calls (last run)", latest_run.get('calls', 0))
+    
+    with col2:
+        st.metric("Tokens (last run)", latest_run.get('total_tokens', 0))
+    
+    with col3:
+        st.metric("Wall Time (last run)", f"{latest_run.get('wall_seconds', 0):.1f}s")
+    
+    with col4:
+        st.metric("Cost (last run)", f"${latest_run.get('cost_usd', 0):.4f}")
+    
+    st.write("**Totals per workflow run:**")
+    st.dataframe(pd.DataFrame(run_totals), use_container_width=True)
+    
+    st.write(f"**Totals per stage ({latest_run['run_name']}):**")
+    stage_totals = metrics.stage_totals(latest_run['run_id'])
+    if stage_totals:
+        st.dataframe(pd.DataFrame(stage_totals), use_container_width=True)
+    else:
+        st.write("No LLM calls in this run")
+    
+    breakers = gateway.breaker_stats()
+    if breakers:
+        open_circuits = [b['name'] for b in breakers if b['state'] != 'closed']
+        if open_circuits:
+            st.warning(f"⚡ LLM circuit not closed for: {', '.join(open_circuits)}. Voice scores are provisional until it recovers.")
+        st.write("**LLM circuit breakers:**")
+        st.dataframe(pd.DataFrame(breakers), use_container_width=True)
+    
+    prompt_savings = metrics.prompt_savings_totals(latest_run['run_id'])
+    if prompt_savings:
+        st.write("**Prompt tokens saved by budgeting:**")
+        st.dataframe(pd.DataFrame(prompt_savings), use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.download_button(
+            label="📥 Download LLM Calls as CSV",
+            data=metrics.export_csv(),
+            file_name=f"aisb_llm_usage_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv"
+        )
+    
+    with col2:
+        st.download_button(
+            label="📥 Download LLM Usage as JSON",
+            data=metrics.export_json(),
+            file_name=f"aisb_llm_usage_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json"
+        )
 
 def show_quiz_management():
     st.header("📝 Quiz Management")
@@ -143,10 +212,22 @@ def show_quiz_management():
         height=100
     )
     
+    stream_questions = st.checkbox("Show questions as they are generated", value=True)
+    
     if st.button("Generate Quiz Questions", type="primary"):
         with st.spinner("Generating quiz questions..."):
             topics = [topic.strip() for topic in topics_input.split('\n') if topic.strip()]
-            result = workflow.run_quiz_generation_only(topics)
+            
+            if stream_questions:
+                live_questions = st.container()
+                
+                def show_streamed_question(number, question):
+                    with live_questions.expander(f"Question {number}: {question.get('question', '')[:50]}...", expanded=True):
+                        show_question_details(question)
+                
+                result = workflow.run_quiz_generation_only(topics, on_question=show_streamed_question)
+            else:
+                result = workflow.run_quiz_generation_only(topics)
             
             if result["status"] == "completed":
                 st.success(f"✅ Generated {len(result['quiz_questions'])} quiz questions!")
@@ -154,6 +235,17 @@ def show_quiz_management():
             else:
                 st.error(f"❌ Error: {result.get('message', 'Unknown error')}")
     
+    # Question bank overview
+    with st.expander("📚 Question Bank"):
+        try:
+            topic_stats = workflow.quiz_generator.question_bank.topic_stats()
+            if topic_stats:
+                st.dataframe(pd.DataFrame(topic_stats), use_container_width=True)
+            else:
+                st.info("The question bank is empty. Generated questions are banked automatically.")
+        except Exception as e:
+            st.error(f"Error loading question bank: {e}")
+    
     # Display quiz questions
     if st.session_state.get("quiz_generated", False):
         st.subheader("📋 Generated Quiz Questions")
@@ -165,18 +257,22 @@ def show_quiz_management():
             if questions:
                 for i, question in enumerate(questions, 1):
                     with st.expander(f"Question {i}: {question['question'][:50]}..."):
-                        st.write(f"**Question:** {question['question']}")
-                        st.write(f"**A)** {question['option1']}")
-                        st.write(f"**B)** {question['option2']}")
-                        st.write(f"**C)** {question['option3']}")
-                        st.write(f"**D)** {question['option4']}")
-                        st.write(f"**Correct Answer:** {question['correct_answer']}")
+                        show_question_details(question)
             else:
                 st.info("No quiz questions found. Generate some first!")
                 
         except Exception as e:
             st.error(f"Error loading quiz questions: {e}")
 
+def show_question_details(question):
+    """Render a single quiz question with its options and answer"""
+    st.write(f"**Question:** {question.get('question', '')}")
+    st.write(f"**A)** {question.get('option1', '')}")
+    st.write(f"**B)** {question.get('option2', '')}")
+    st.write(f"**C)** {question.get('option3', '')}")
+    st.write(f"**D)** {question.get('option4', '')}")
+    st.write(f"**Correct Answer:** {question.get('correct_answer', '')}")
+
 def show_student_management():
     st.header("📊 Student Management")
     
@@ -272,25 +368,32 @@ def show_student_management():
                 if pending_students:
                     # Send quiz invitations
                     email_service = get_email_service()
-                    sent_count = 0
                     
-                    for student in pending_students:
-                        try:
-                            success = email_service.send_quiz_invitation(
-                                student['email'],
-                                student['name'],
-                                "https://your-quiz-link.com"  # Replace with actual quiz link
-                            )
-                            if success:
-                                sent_count += 1
-                                st.write(f"✅ Sent to {student['name']} ({student['email']})")
-                            else:
-                                st.write(f"❌ Failed to send to {student['name']} ({student['email']})")
-                        except Exception as e:
-                            st.write(f"❌ Error sending to {student['name']}: {str(e)}")
+                    def show_result(result):
+                        if result['status'] == 'sent':
+                            st.write(f"✅ Sent to {result['name']} ({result['email']})")
+                        elif result['status'] in ('queued', 'sending'):
+                            st.write(f"📬 Queued for {result['name']} ({result['email']})")
+                        elif result['deferred']:
+                            st.write(f"⏳ Deferred {result['name']} ({result['email']}): {result['error']}")
+                        else:
+                            st.write(f"❌ Failed to send to {result['name']} ({result['email']}): {result['error']}")
+                    
+                    # Queued in the outbox and delivered in the background, so reruns neither block nor resend
+                    results = email_service.send_bulk_emails(
+                        [{'email': s['email'], 'name': s['name']} for s in pending_students],
+                        'quiz_invitation',
+                        on_result=show_result,
+                        quiz_link="https://your-quiz-link.com"  # Replace with actual quiz link
+                    )
+                    sent_count = sum(1 for result in results if result['success'])
+                    queued_count = sum(1 for result in results if result['status'] in ('queued', 'sending'))
+                    deferred_count = sum(1 for result in results if result['deferred'])
+                    if deferred_count:
+                        st.warning(f"⏳ {deferred_count} invitations were held back by today's sending limit; send again tomorrow.")
                     
-                    if sent_count > 0:
-                        st.success(f"✅ Successfully sent quiz invitations to {sent_count} students!")
+                    if sent_count or queued_count:
+                        st.success(f"✅ Quiz invitations: {sent_count} sent, {queued_count} queued for delivery (see 📬 Email Outbox)")
                     else:
                         st.error("❌ Failed to send any quiz invitations. Please check your email configuration.")
                         st.info("💡 **Email Issue**: Check your Gmail settings, app password, and network connection.")
@@ -300,6 +403,25 @@ def show_student_management():
             except Exception as e:
                 st.error(f"❌ Error sending invitations: {e}")
     
+    # Email delivery status
+    email_service = get_email_service()
+    if email_service.use_outbox:
+        with st.expander("📬 Email Outbox"):
+            try:
+                counts = email_service.outbox.counts()
+                if counts:
+                    cols = st.columns(4)
+                    for col, status in zip(cols, ['queued', 'sending', 'sent', 'failed']):
+                        col.metric(status.title(), counts.get(status, 0))
+                    st.dataframe(pd.DataFrame(email_service.delivery_status()), use_container_width=True)
+                    if counts.get('failed') and st.button("Retry Failed Emails"):
+                        st.success(f"Requeued {email_service.outbox.retry_failed()} emails")
+                        email_service.outbox_drainer.wake()
+                else:
+                    st.info("No emails have been queued yet.")
+            except Exception as e:
+                st.error(f"Error loading email outbox: {e}")
+    
     # Display student data
     st.subheader("Student Data")
     
@@ -0,0 +1,239 @@
+import json
+import re
+
+ANSWER_LETTERS = ['A', 'B', 'C', 'D']
+DIFFICULTY_LEVELS = ['easy', 'medium', 'hard']
+
+# JSON schemas sent to the model when strict schema mode is enabled
+QUIZ_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "options": {
+            "type": "object",
+            "properties": {letter: {"type": "string"} for letter in ANSWER_LETTERS},
+            "required": ANSWER_LETTERS,
+            "additionalProperties": False
+        },
+        "correct_answer": {"type": "string", "enum": ANSWER_LETTERS},
+        "difficulty": {"type": "string", "enum": DIFFICULTY_LEVELS}
+    },
+    "required": ["question", "options", "correct_answer", "difficulty"],
+    "additionalProperties": False
+}
+
+QUIZ_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "questions": {"type": "array", "items": QUIZ_ITEM_SCHEMA}
+    },
+    "required": ["questions"],
+    "additionalProperties": False
+}
+
+SCORE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer"},
+        "strengths": {"type": "string"},
+        "improvements": {"type": "string"},
+        "assessment": {"type": "string"}
+    },
+    "required": ["score", "strengths", "improvements", "assessment"],
+    "additionalProperties": False
+}
+
+def items_schema(item_schema):
+    """Wrap an item schema in the {"items": [...]} envelope used by repair prompts"""
+    return {
+        "type": "object",
+        "properties": {
+            "items": {"type": "array", "items": item_schema}
+        },
+        "required": ["items"],
+        "additionalProperties": False
+    }
+
+QUIZ_ITEM_EXAMPLE = """{"question": "...", "options": {"A": "...", "B": "...", "C": "...", "D": "..."}, "correct_answer": "A", "difficulty": "medium"}"""
+
+SCORE_EXAMPLE = """{"score": 7, "strengths": "...", "improvements": "...", "assessment": "..."}"""
+
+def parse_json_object(text):
+    """Parse a JSON object from model output, tolerating code fences and surrounding prose"""
+    if not text:
+        return None
+
+    cleaned = re.sub(r'^```(?:json)?\s*|\s*```$', '', text.strip())
+    try:
+        parsed = json.loads(cleaned)
+        return parsed if isinstance(parsed, dict) else None
+    except ValueError:
+        pass
+
+    # Fall back to the outermost braces in the text
+    start, end = cleaned.find('{'), cleaned.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        parsed = json.loads(cleaned[start:end + 1])
+        return parsed if isinstance(parsed, dict) else None
+    except ValueError:
+        return None
+
+def validate_quiz_item(item):
+    """Validate a quiz item and return (question dict in sheet format or None, list of errors)"""
+    errors = []
+    if not isinstance(item, dict):
+        return None, ["item is not a JSON object"]
+
+    question_text = item.get('question')
+    if not isinstance(question_text, str) or not question_text.strip():
+        errors.append("'question' must be a non-empty string")
+
+    options = item.get('options')
+    # Accept a plain list of four options as well as the A-D object
+    if isinstance(options, list) and len(options) == 4:
+        options = dict(zip(ANSWER_LETTERS, options))
+    if not isinstance(options, dict):
+        errors.append("'options' must be an object with keys A, B, C and D")
+        options = {}
+    else:
+        for letter in ANSWER_LETTERS:
+            value = options.get(letter)
+            if not isinstance(value, str) or not value.strip():
+                errors.append(f"option {letter} must be a non-empty string")
+        normalized_options = [str(options.get(letter, '')).strip().lower() for letter in ANSWER_LETTERS]
+        if all(normalized_options) and len(set(normalized_options)) < 4:
+            errors.append("options A-D must all be different")
+
+    correct_answer = str(item.get('correct_answer', '')).strip().upper().rstrip(')')
+    if correct_answer not in ANSWER_LETTERS:
+        errors.append("'correct_answer' must be one of A, B, C or D")
+
+    if errors:
+        return None, errors
+
+    # Difficulty only informs question bank selection, so an unknown value is not worth a re-ask
+    difficulty = str(item.get('difficulty', '')).strip().lower()
+
+    return {
+        'question': question_text.strip(),
+        'option1': options['A'].strip(),
+        'option2': options['B'].strip(),
+        'option3': options['C'].strip(),
+        'option4': options['D'].strip(),
+        'correct_answer': correct_answer,
+        'difficulty': difficulty if difficulty in DIFFICULTY_LEVELS else 'medium'
+    }, []
+
+def validate_score(payload, min_score=1, max_score=10):
+    """Validate a score object and return (normalized score dict or None, list of errors)"""
+    if not isinstance(payload, dict):
+        return None, ["response is not a JSON object"]
+
+    errors = []
+    score = payload.get('score')
+    # Integers encoded as strings or whole floats are accepted, anything else is rejected
+    if isinstance(score, str) and score.strip().isdigit():
+        score = int(score.strip())
+    elif isinstance(score, float) and score.is_integer():
+        score = int(score)
+    if isinstance(score, bool) or not isinstance(score, int):
+        errors.append("'score' must be an integer")
+    elif not min_score <= score <= max_score:
+        errors.append(f"'score' must be between {min_score} and {max_score}")
+
+    for field in ('strengths', 'improvements', 'assessment'):
+        if not isinstance(payload.get(field), str):
+            errors.append(f"'{field}' must be a string")
+
+    if errors:
+        return None, errors
+
+    return {
+        'score': score,
+        'strengths': payload['strengths'].strip(),
+        'improvements': payload['improvements'].strip(),
+        'assessment': payload['assessment'].strip()
+    }, []
+
+def format_score_analysis(score_data):
+    """Render a validated score object in the plain-text analysis format stored in Sheets"""
+    return (
+        f"Score: {score_data['score']}\n"
+        f"Strengths: {score_data['strengths']}\n"
+        f"Improvements: {score_data['improvements']}\n"
+        f"Assessment: {score_data['assessment']}"
+    )
+
+def build_repair_prompt(kind, example, invalid_entries, context=''):
+    """Build a re-ask prompt that covers only the invalid entries and their errors"""
+    problems = []
+    for number, (raw_item, errors) in enumerate(invalid_entries, 1):
+        problems.append(
+            f"Item {number}: {json.dumps(raw_item, ensure_ascii=False)}\n"
+            f"Problems: {'; '.join(errors)}"
+        )
+
+    return f"""
+            {context}
+
+            The following {kind} items you returned are invalid:
+
+            {chr(10).join(problems)}
+
+            Return a JSON object of the form {{"items": [...]}} containing exactly {len(invalid_entries)} corrected items, in the same order.
+            Each item must match this format: {example}
+            Return only the JSON object.
+            """
+
+def validate_with_repairs(model, raw_items, validator, kind, example, item_schema, max_attempts, context='', tag=None):
+    """Validate raw items, re-asking the model only for the invalid ones
+
+    Returns a list aligned with raw_items holding the validated items, with None
+    for any item that was still invalid after max_attempts re-asks.
+    """
+    validated = []
+    invalid = []  # (position, raw item, errors)
+    for position, raw_item in enumerate(raw_items):
+        item, errors = validator(raw_item)
+        validated.append(item)
+        if errors:
+            invalid.append((position, raw_item, errors))
+
+    attempt = 0
+    while invalid and attempt < max_attempts:
+        attempt += 1
+        print(f"Re-asking for {len(invalid)} invalid {kind} item(s) (attempt {attempt}/{max_attempts})")
+
+        prompt = build_repair_prompt(kind, example, [(raw, errors) for _, raw, errors in invalid], context)
+        try:
+            response = model.generate_json(
+                prompt,
+                f"{kind.replace(' ', '_')}_repair",
+                items_schema(item_schema),
+                tag=f"{tag}:repair" if tag else None
+            )
+            payload = parse_json_object(response.text) or {}
+            repaired_items = payload.get('items') if isinstance(payload.get('items'), list) else []
+        except Exception as e:
+            print(f"Error re-asking for invalid {kind} items: {e}")
+            repaired_items = []
+
+        still_invalid = []
+        for index, (position, raw_item, errors) in enumerate(invalid):
+            if index >= len(repaired_items):
+                # Missing from the corrected response, so ask for it again unchanged
+                still_invalid.append((position, raw_item, errors))
+                continue
+            item, new_errors = validator(repaired_items[index])
+            if new_errors:
+                still_invalid.append((position, repaired_items[index], new_errors))
+            else:
+                validated[position] = item
+        invalid = still_invalid
+
+    if invalid:
+        print(f"⚠️ {len(invalid)} {kind} item(s) still invalid after {attempt} re-ask(s)")
+
+    return validated
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Reliability checks for AISB Onboarding Process System
+Exercises the circuit breaker, email outbox, download URL checks and the other
+building blocks that run without external services
+"""
+
+import email
+import os
+import sys
+import tempfile
+import time
+
+def test_circuit_breaker():
+    """Test circuit breaker state transitions"""
+    print("🔍 Testing circuit breaker...")
+    
+    try:
+        from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+        
+        breaker = CircuitBreaker('test', window=4, min_calls=4, error_rate=0.5, slow_call_seconds=10,
+                                 slow_call_rate=1.0, open_seconds=0.05)
+        closed = []
+        breaker.add_close_listener(closed.append)
+        
+        breaker.record_success(0.1)
+        breaker.record_failure()
+        breaker.record_success(0.1)
+        assert breaker.state == CLOSED, "tripped before the error rate was reached"
+        breaker.record_failure()
+        assert breaker.state == OPEN, "did not trip at the error rate"
+        assert not breaker.allow_request(), "let a call through while open"
+        print("✅ Trips on the error rate and fails fast while open")
+        
+        time.sleep(0.06)
+        assert breaker.state == HALF_OPEN, "did not half-open after open_seconds"
+        assert breaker.allow_request(), "refused the half-open probe"
+        assert not breaker.allow_request(), "let a second probe through"
+        breaker.record_rejected()
+        assert breaker.state == HALF_OPEN, "a rejected probe closed the circuit"
+        assert breaker.allow_request(), "a rejected probe did not free the probe slot"
+        breaker.release_probe()
+        assert breaker.allow_request(), "an abandoned probe did not free the probe slot"
+        print("✅ Rejected and abandoned probes free the slot without closing")
+        
+        breaker.record_failure()
+        assert breaker.state == OPEN, "a failed probe did not re-open the circuit"
+        time.sleep(0.06)
+        assert breaker.allow_request(), "refused the probe after re-opening"
+        breaker.record_success(0.1)
+        assert breaker.state == CLOSED, "a successful probe did not close the circuit"
+        assert closed == ['test'], f"close listeners called with {closed}"
+        print("✅ A failed probe re-opens and a successful probe closes the circuit")
+        
+        slow = CircuitBreaker('slow', window=4, min_calls=4, error_rate=1.0, slow_call_seconds=1,
+                              slow_call_rate=0.5, open_seconds=60)
+        for latency in (0.1, 2, 0.1, 2):
+            slow.record_success(latency)
+        assert slow.state == OPEN, "did not trip at the slow-call rate"
+        print("✅ Trips on the slow-call rate")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Circuit breaker test failed: {e!r}")
+        return False
+
+def test_email_outbox():
+    """Test email outbox idempotency, claims and retries"""
+    print("\n📬 Testing email outbox...")
+    
+    try:
+        import email_outbox
+        from email_outbox import EmailOutbox
+        
+        outbox = EmailOutbox(os.path.join(tempfile.mkdtemp(), 'outbox.db'))
+        first = outbox.enqueue('Ann@Example.com ', 'Ann', 'quiz_invitation', 'intake-1', 'Subject', 'Body')
+        again = outbox.enqueue('ann@example.com', 'Ann', 'quiz_invitation', 'intake-1', 'Subject', 'Body')
+        assert first['key'] == again['key'], "the same student and cohort got two keys"
+        outbox.enqueue('ann@example.com', 'Ann', 'quiz_invitation', 'intake-2', 'Subject', 'Body')
+        assert outbox.counts() == {'queued': 2}, f"unexpected counts {outbox.counts()}"
+        print("✅ One message per student, type and cohort")
+        
+        message, other = outbox.claim(limit=10)
+        assert outbox.get(message['key'])['status'] == 'sending', "claimed message is not sending"
+        assert not outbox.mark_sent(message['key'], 'stale-token', 1), "a wrong claim token settled the message"
+        assert outbox.mark_sent(message['key'], message['claim_token'], 1), "the claim token did not settle the message"
+        assert outbox.get(message['key'])['status'] == 'sent', "message not marked sent"
+        print("✅ Only the claiming worker settles a message")
+        
+        lease = email_outbox.CLAIM_LEASE_SECONDS
+        email_outbox.CLAIM_LEASE_SECONDS = -1
+        try:
+            [reclaimed] = outbox.claim()
+        finally:
+            email_outbox.CLAIM_LEASE_SECONDS = lease
+        assert reclaimed['key'] == other['key'], "a lapsed claim was not taken over"
+        assert not outbox.mark_sent(other['key'], other['claim_token'], 1), "a lapsed claim settled the message"
+        assert outbox.reschedule(reclaimed['key'], reclaimed['claim_token'], 1, 'timeout', 0.2), "reschedule failed"
+        assert outbox.claim() == [], "a rescheduled message was claimed before its delay"
+        time.sleep(0.25)
+        [retry] = outbox.claim()
+        assert retry['attempts'] == 1 and retry['last_error'] == 'timeout', "the retry lost its attempt count"
+        print("✅ Lapsed claims are taken over and retries wait for their delay")
+        
+        assert outbox.mark_failed(retry['key'], retry['claim_token'], 2, 'refused'), "mark_failed failed"
+        assert outbox.retry_failed() == 1, "failed message was not requeued"
+        assert outbox.get(retry['key'])['status'] == 'queued', "requeued message is not queued"
+        print("✅ Failed messages can be queued again")
+        outbox.close()
+        return True
+        
+    except Exception as e:
+        print(f"❌ Email outbox test failed: {e!r}")
+        return False
+
+def test_public_url_check():
+    """Test that submitted links cannot reach non-public addresses"""
+    print("\n🔒 Testing download URL checks...")
+    
+    try:
+        from audio_fetcher import UnsafeURLError, check_public_address, check_public_url
+        
+        check_public_url('http://8.8.8.8/recording.mp3')
+        check_public_url('https://[2001:4860:4860::8888]/recording.mp3')
+        print("✅ Public addresses are allowed")
+        
+        for url in ['http://127.0.0.1/', 'http://localhost:8080/', 'http://10.0.0.5/', 'http://192.168.1.1/',
+                    'http://169.254.169.254/latest/meta-data', 'http://[::1]/', 'http://[::ffff:127.0.0.1]/',
+                    'http://0.0.0.0/', 'ftp://8.8.8.8/recording.mp3', 'file:///etc/passwd']:
+            try:
+                check_public_url(url)
+            except UnsafeURLError:
+                continue
+            raise AssertionError(f"{url} was not refused")
+        print("✅ Loopback, private, link-local and non-http(s) links are refused")
+        
+        try:
+            check_public_address('https://example.com/a.mp3', '10.1.2.3')
+            raise AssertionError("a connection to a private peer was not refused")
+        except UnsafeURLError:
+            pass
+        print("✅ A connected peer is checked the same way")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Download URL test failed: {e!r}")
+        return False
+
+def test_rate_limiter():
+    """Test the per-minute window and the persisted daily quota"""
+    print("\n⏱️ Testing email rate limiter...")
+    
+    try:
+        from email_dispatcher import DailyLimitReached, RateLimiter
+        
+        quota_path = os.path.join(tempfile.mkdtemp(), 'quota.json')
+        limiter = RateLimiter('smtp.test', per_minute=2, per_day=3, quota_path=quota_path)
+        assert limiter.reserve() == 0 and limiter.reserve() == 0, "slots within the minute were refused"
+        assert limiter.reserve() > 0, "the per-minute window let a third send through"
+        limiter.release()
+        assert limiter.remaining_today == 2, "a released slot still counts against the day"
+        limiter.flush()
+        
+        restarted = RateLimiter('smtp.test', per_minute=10, per_day=3, quota_path=quota_path)
+        assert restarted.remaining_today == 2, "the daily count did not survive a restart"
+        restarted.reserve()
+        restarted.reserve()
+        try:
+            restarted.reserve()
+            raise AssertionError("the daily quota was exceeded")
+        except DailyLimitReached:
+            pass
+        print("✅ Per-minute window, released slots and the persisted daily quota hold")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Rate limiter test failed: {e!r}")
+        return False
+
+def test_hedging_policy():
+    """Test when slow LLM calls get a hedge"""
+    print("\n⚡ Testing hedging policy...")
+    
+    try:
+        from hedging import HedgingPolicy
+        
+        policy = HedgingPolicy(percentile=90, budget=0.1, min_samples=10)
+        assert policy.hedge_delay('stage') is None, "hedged without any samples"
+        for latency in range(1, 11):
+            policy.latencies.observe('stage', latency)
+        assert policy.hedge_delay('stage') == 9, "wrong hedge delay for the 90th percentile"
+        
+        for _ in range(18):
+            policy.hedge_delay('stage')
+        assert policy.try_acquire() and policy.try_acquire(), "hedges within the budget were refused"
+        assert not policy.try_acquire(), "hedged beyond the budget"
+        print("✅ Hedges after the latency percentile and within the budget")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Hedging policy test failed: {e!r}")
+        return False
+
+def test_near_duplicate_index():
+    """Test MinHash near-duplicate lookup"""
+    print("\n🧬 Testing near-duplicate index...")
+    
+    try:
+        from near_duplicate_index import MinHashLSHIndex
+        
+        index = MinHashLSHIndex()
+        index.add('q1', "What is the main goal of supervised learning in machine learning models?")
+        index.add('q2', "Which Python library is most commonly used for data frames?")
+        matches = index.query("What is the main goal of supervised learning in machine learning?")
+        assert [key for key, _ in matches] == ['q1'], f"unexpected matches {matches}"
+        assert index.query("How does gradient descent update neural network weights?") == [], "unrelated text matched"
+        print("✅ Near-duplicates are found and unrelated questions are not")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Near-duplicate index test failed: {e!r}")
+        return False
+
+def test_audio_preprocessing():
+    """Test the streaming resampler and silence trimming"""
+    print("\n🎙️ Testing audio preprocessing...")
+    
+    try:
+        import numpy as np
+        from audio_preprocessing import AudioPreprocessor, LinearResampler
+        
+        signal = np.sin(np.arange(48000) * 2 * np.pi * 440 / 48000).astype(np.float32)
+        whole = LinearResampler(48000, 16000).process(signal)
+        resampler = LinearResampler(48000, 16000)
+        chunked = np.concatenate([resampler.process(chunk) for chunk in np.array_split(signal, 7)])
+        assert abs(len(whole) - 16000) <= 1, f"resampled to {len(whole)} samples"
+        assert len(chunked) == len(whole) and np.allclose(chunked, whole, atol=1e-4), "chunked resampling differs"
+        print("✅ Resampling is the same in chunks as in one pass")
+        
+        preprocessor = AudioPreprocessor(output_dir=tempfile.mkdtemp(), sample_rate=16000, max_pause_seconds=0.3)
+        preprocessor._vad = None
+        rng = np.random.default_rng(0)
+        silence = (rng.normal(0, 30, 16000)).astype(np.int16)
+        speech = (np.sin(np.arange(16000) * 2 * np.pi * 200 / 16000) * 8000).astype(np.int16)
+        samples = np.concatenate([silence, speech, silence, silence, speech, silence])
+        trimmed = preprocessor.trim_silence(samples)
+        # 2s of speech, the 0.3s pause and 150 ms of hangover around each speech edge
+        assert 2 * 16000 <= len(trimmed) <= 3.2 * 16000, f"trimmed to {len(trimmed) / 16000:.2f}s"
+        print("✅ Leading and trailing silence is dropped and long pauses are shortened")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Audio preprocessing test failed: {e!r}")
+        return False
+
+def test_message_renderer():
+    """Test that rendered emails parse as the intended MIME messages"""
+    print("\n✉️ Testing message renderer...")
+    
+    try:
+        from email_templates import MessageRenderer, get_template
+        
+        renderer = MessageRenderer('bootcamp@example.com')
+        subject, text, html_body = get_template('quiz_invitation').render(student_name='Zoë <Ann>', quiz_link='https://q')
+        message = email.message_from_string(renderer.render('ann@example.com\r\nBcc: x@example.com', subject, text, html_body))
+        assert message['Bcc'] is None, "a newline in the address injected a header"
+        assert str(email.header.make_header(email.header.decode_header(message['Subject']))) == subject, "subject mangled"
+        plain, html = message.get_payload()
+        assert plain.get_content_type() == 'text/plain' and html.get_content_type() == 'text/html', "wrong parts"
+        assert 'Zoë <Ann>' in plain.get_payload(decode=True).decode('utf-8'), "text body mangled"
+        assert 'Zoë &lt;Ann&gt;' in html.get_payload(decode=True).decode('utf-8'), "HTML body not escaped"
+        print("✅ Multipart messages parse back to their subject and bodies")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Message renderer test failed: {e!r}")
+        return False
+
+def main():
+    """Main test function"""
+    print("🎓 AISB Onboarding Process - Reliability Test")
+    print("=" * 50)
+    
+    test_results = []
+    
+    # Run all tests
+    test_results.append(("Circuit Breaker", test_circuit_breaker()))
+    test_results.append(("Email Outbox", test_email_outbox()))
+    test_results.append(("Download URL Checks", test_public_url_check()))
+    test_results.append(("Rate Limiter", test_rate_limiter()))
+    test_results.append(("Hedging Policy", test_hedging_policy()))
+    test_results.append(("Near-Duplicate Index", test_near_duplicate_index()))
+    test_results.append(("Audio Preprocessing", test_audio_preprocessing()))
+    test_results.append(("Message Renderer", test_message_renderer()))
+    
+    # Summary
+    print("\n" + "=" * 50)
+    print("📊 Test Summary")
+    print("=" * 50)
+    
+    passed = 0
+    total = len(test_results)
+    
+    for test_name, result in test_results:
+        if result:
+            print(f"✅ {test_name}: PASSED")
+            passed += 1
+        else:
+            print(f"❌ {test_name}: FAILED")
+            
+    print(f"\n🎯 Overall Result: {passed}/{total} tests passed")
+    return passed == total
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
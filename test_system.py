@@ -192,6 +192,13 @@ def main():
     print("🎓 AISB Onboarding Process - System Test")
     print("=" * 50)
     
+    # Use the local mock LLM server instead of live OpenAI calls
+    if '--mock-llm' in sys.argv:
+        from mock_llm_server import MockLLMServer
+        mock_server = MockLLMServer()
+        os.environ['OPENAI_BASE_URL'] = mock_server.start()
+        print(f"🧪 Using mock LLM server at {os.environ['OPENAI_BASE_URL']}")
+    
     test_results = []
     
     # Run all tests
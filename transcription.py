@@ -0,0 +1,169 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from config import TRANSCRIPTION_WORKERS, WHISPER_MODEL_SIZE, VOSK_MODEL_PATH
+
+FAKE_SENTENCES = [
+    "Hello, my name is Alex and I'm excited to apply to this bootcamp.",
+    "I have two years of experience with Python and data analysis.",
+    "I recently built a machine learning model that predicts customer churn.",
+    "I'm passionate about artificial intelligence and how it can help people.",
+    "My goal is to become a data scientist working on real-world problems.",
+    "I enjoy learning new tools like scikit-learn, pandas and PyTorch.",
+    "In my last project I cleaned messy data and presented insights to my team.",
+    "I'd love to deepen my understanding of neural networks and deep learning.",
+    "Outside of work I take part in Kaggle competitions to practise my skills.",
+    "Thank you for considering my application."
+]
+
+def available_cpus():
+    """CPU cores this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+class TranscriptionEngine:
+    """Turn a local audio file into text; engines load their model once and are reused"""
+
+    name = 'base'
+
+    def transcribe(self, audio_path):
+        raise NotImplementedError
+
+class FakeTranscriptionEngine(TranscriptionEngine):
+    """Deterministic engine for tests: a sidecar <audio>.txt if present, else text derived from the file bytes"""
+
+    name = 'fake'
+
+    def transcribe(self, audio_path):
+        sidecar = audio_path + '.txt'
+        if os.path.exists(sidecar):
+            with open(sidecar, encoding='utf-8') as f:
+                return f.read().strip()
+
+        with open(audio_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).digest()
+        count = 5 + digest[0] % 5
+        return ' '.join(FAKE_SENTENCES[(digest[i + 1] + i) % len(FAKE_SENTENCES)] for i in range(count))
+
+class WhisperTranscriptionEngine(TranscriptionEngine):
+    """Whisper on CPU through faster-whisper with int8 weights"""
+
+    name = 'whisper'
+
+    def __init__(self, model_size=WHISPER_MODEL_SIZE):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("Whisper transcription needs faster-whisper: pip install faster-whisper")
+        # Parallelism comes from the process pool, so each worker keeps to one thread
+        self.model = WhisperModel(model_size, device='cpu', compute_type='int8', cpu_threads=1)
+
+    def transcribe(self, audio_path):
+        segments, _ = self.model.transcribe(audio_path, beam_size=1, language='en', vad_filter=True)
+        return ' '.join(segment.text.strip() for segment in segments).strip()
+
+class VoskTranscriptionEngine(TranscriptionEngine):
+    """Offline Kaldi recognizer through vosk; expects 16-bit mono PCM WAV"""
+
+    name = 'vosk'
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        try:
+            from vosk import Model, SetLogLevel
+        except ImportError:
+            raise RuntimeError("Vosk transcription needs vosk: pip install vosk")
+        if not os.path.isdir(model_path):
+            raise RuntimeError(f"Vosk model not found at {model_path}")
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+
+    def transcribe(self, audio_path):
+        from vosk import KaldiRecognizer
+
+        with wave.open(audio_path, 'rb') as wav:
+            if wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                raise ValueError(f"{audio_path} must be 16-bit mono WAV for vosk")
+            recognizer = KaldiRecognizer(self.model, wav.getframerate())
+            parts = []
+            while True:
+                frames = wav.readframes(4000)
+                if not frames:
+                    break
+                if recognizer.AcceptWaveform(frames):
+                    parts.append(json.loads(recognizer.Result()).get('text', ''))
+            parts.append(json.loads(recognizer.FinalResult()).get('text', ''))
+        return ' '.join(part for part in parts if part).strip()
+
+ENGINES = {
+    'fake': FakeTranscriptionEngine,
+    'whisper': WhisperTranscriptionEngine,
+    'vosk': VoskTranscriptionEngine
+}
+
+def create_engine(name):
+    """Build a transcription engine by name"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown transcription engine: {name}")
+    return ENGINES[name]()
+
+# Engine loaded once in each worker process
+_worker_engine = None
+
+def _init_worker(engine_name):
+    global _worker_engine
+    _worker_engine = create_engine(engine_name)
+
+def _transcribe_in_worker(audio_path):
+    return _worker_engine.transcribe(audio_path)
+
+class TranscriptionPool:
+    """Process pool sized to the available cores, each worker holding its own engine instance"""
+
+    def __init__(self, engine_name, workers=TRANSCRIPTION_WORKERS):
+        self.engine_name = engine_name
+        self.workers = workers or available_cpus()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers do not inherit the parent's HTTP pools and threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.engine_name,)
+                )
+                print(f"🎙️ Started {self.workers} '{self.engine_name}' transcription workers")
+            return self._executor
+
+    def submit(self, audio_path):
+        """Queue one file and return a future for its transcript"""
+        return self._get_executor().submit(_transcribe_in_worker, audio_path)
+
+    def transcribe(self, audio_path):
+        return self.submit(audio_path).result()
+
+    def transcribe_many(self, audio_paths):
+        """Transcribe files in parallel, returning transcripts (or the exception raised) in input order"""
+        futures = [self.submit(path) for path in audio_paths]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
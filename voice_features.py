@@ -0,0 +1,115 @@
+import math
+import re
+import numpy as np
+from config import VOICE_MIN_WORDS, VOICE_MIN_SPEECH_SECONDS
+
+# Topics an AI/Data Science introduction is expected to touch; single words also match longer forms ("learn" → "learning")
+TOPIC_KEYWORDS = [
+    'artificial intelligence', 'machine learning', 'data', 'python', 'model', 'project',
+    'experience', 'goal', 'learn', 'neural', 'analysis', 'research', 'career', 'passionate'
+]
+
+# Only true disfluencies: words such as 'like', 'actually' or 'kind of' are fillers in some sentences and
+# content in others ("models like GPT", "a kind of regression"), and counting them penalizes fluent speakers
+FILLER_WORDS = ['um', 'umm', 'uh', 'uhm', 'er', 'erm', 'ah', 'hmm']
+FILLER_PHRASES = ['you know', 'i mean']
+
+# Lexical diversity is measured over a fixed number of words so long and short transcripts compare fairly
+DIVERSITY_WINDOW = 100
+
+def tokenize(text):
+    return re.findall(r"[a-z']+", text.lower())
+
+def is_usable_transcript(transcript):
+    return bool(transcript and transcript.strip()) and not transcript.startswith('Error')
+
+def extract_features(transcripts, audio_stats=None):
+    """Lexical and acoustic features for a batch of transcripts, one dict per transcript.
+    audio_stats holds {'duration_seconds', 'speech_seconds'} per transcript, or None where no audio was measured."""
+    count = len(transcripts)
+    audio_stats = audio_stats or [None] * count
+    usable = np.array([is_usable_transcript(transcript) for transcript in transcripts], dtype=bool)
+    tokens_per_doc = [tokenize(transcript) if ok else [] for transcript, ok in zip(transcripts, usable)]
+    lengths = np.array([len(tokens) for tokens in tokens_per_doc], dtype=np.int64)
+
+    # Every token of the batch in one flat array of vocabulary ids, tagged with its document and position
+    all_tokens = [token for tokens in tokens_per_doc for token in tokens]
+    vocab, ids = np.unique(np.array(all_tokens, dtype=str), return_inverse=True) if all_tokens else (np.array([], dtype=str), np.zeros(0, dtype=np.int64))
+    ids = ids.reshape(-1)
+    doc = np.repeat(np.arange(count), lengths)
+    position = np.arange(len(ids)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    # Consecutive token pairs that do not cross a document boundary
+    pair = doc[:-1] == doc[1:] if len(ids) > 1 else np.zeros(0, dtype=bool)
+
+    fillers = np.bincount(doc, weights=np.isin(vocab, FILLER_WORDS)[ids], minlength=count)
+    for phrase in FILLER_PHRASES:
+        first, second = phrase.split()
+        hits = pair & (vocab == first)[ids[:-1]] & (vocab == second)[ids[1:]]
+        fillers += np.bincount(doc[:-1][hits], minlength=count)
+
+    covered = np.zeros((count, len(TOPIC_KEYWORDS)), dtype=bool)
+    for index, keyword in enumerate(TOPIC_KEYWORDS):
+        words = keyword.split()
+        if len(words) == 1:
+            hits = np.char.startswith(vocab, words[0])[ids] if len(vocab) else np.zeros(0, dtype=bool)
+            covered[doc[hits], index] = True
+        else:
+            hits = pair & (vocab == words[0])[ids[:-1]] & np.char.startswith(vocab, words[1])[ids[1:]]
+            covered[doc[:-1][hits], index] = True
+
+    window = position < DIVERSITY_WINDOW
+    distinct = np.unique(doc[window] * max(1, len(vocab)) + ids[window])
+    types = np.bincount(distinct // max(1, len(vocab)), minlength=count)
+
+    duration = np.array([stats['duration_seconds'] if stats else np.nan for stats in audio_stats], dtype=float)
+    speech = np.array([stats['speech_seconds'] if stats else np.nan for stats in audio_stats], dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        filler_density = np.where(lengths > 0, fillers / lengths * 100, np.nan)
+        lexical_diversity = np.where(lengths > 0, types / np.minimum(lengths, DIVERSITY_WINDOW), np.nan)
+        speech_rate = np.where(speech > 0, lengths / speech * 60, np.nan)
+        pause_ratio = np.where(duration > 0, 1 - speech / duration, np.nan)
+
+    columns = {
+        'usable': usable,
+        'word_count': lengths,
+        'speech_seconds': speech,
+        'speech_rate_wpm': speech_rate,
+        'pause_ratio': pause_ratio,
+        'filler_density': filler_density,
+        'lexical_diversity': lexical_diversity,
+        'keyword_coverage': covered.sum(axis=1)
+    }
+    return [
+        {name: _plain(values[row]) for name, values in columns.items()}
+        for row in range(count)
+    ]
+
+def _plain(value):
+    """NumPy scalar as a plain Python value, with NaN as None"""
+    value = value.item()
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+def rejection_reason(features, min_words=VOICE_MIN_WORDS, min_speech_seconds=VOICE_MIN_SPEECH_SECONDS):
+    """Why a submission fails without needing an LLM review, or None if it needs one"""
+    if not features['usable']:
+        return "no usable transcript"
+    if features['word_count'] < min_words:
+        return f"only {features['word_count']} words were transcribed"
+    if features['speech_seconds'] is not None and features['speech_seconds'] < min_speech_seconds:
+        return f"near-silent recording ({features['speech_seconds']:.1f}s of speech)"
+    return None
+
+def describe_features(features):
+    """Feature summary for the scoring prompt; measurements that are unavailable are left out"""
+    lines = []
+    if features['speech_rate_wpm'] is not None:
+        lines.append(f"- Speech rate: {features['speech_rate_wpm']:.0f} words per minute")
+    if features['pause_ratio'] is not None:
+        lines.append(f"- Silence: {features['pause_ratio']:.0%} of the recording")
+    if features['filler_density'] is not None:
+        lines.append(f"- Filler words: {features['filler_density']:.1f} per 100 words")
+    if features['lexical_diversity'] is not None:
+        lines.append(f"- Lexical diversity: {features['lexical_diversity']:.2f} (distinct words among the first {DIVERSITY_WINDOW})")
+    lines.append(f"- AI/Data Science topics mentioned: {features['keyword_coverage']} of {len(TOPIC_KEYWORDS)}")
+    return "Delivery signals:\n" + "\n".join(lines)
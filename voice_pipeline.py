@@ -0,0 +1,173 @@
+import contextvars
+import queue
+import threading
+import time
+from config import VOICE_PIPELINE_QUEUE_SIZE
+
+# Marks the end of a stage's input; each worker consumes exactly one
+_END = object()
+
+class PipelineStage:
+    """One step of a pipeline: a handler run by its own pool of worker threads.
+    A batch stage hands its handler a list of whatever is queued (up to batch_size) and expects a list back."""
+
+    def __init__(self, name, handler, workers=1, batch_size=None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._running = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.processed = 0
+            self.failed = 0
+            self.busy_seconds = 0.0
+            self.blocked_seconds = 0.0
+            self.max_queue_depth = 0
+
+    def _record(self, busy, blocked, failed, count=1):
+        with self._lock:
+            if failed:
+                self.failed += count
+            else:
+                self.processed += count
+            self.busy_seconds += busy
+            self.blocked_seconds += blocked
+
+    def _observe_depth(self, depth):
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+class StagedPipeline:
+    """Stages joined by bounded queues: a full queue blocks the stage feeding it, so a slow stage
+    throttles the ones before it instead of letting work pile up in memory"""
+
+    def __init__(self, stages, queue_size=VOICE_PIPELINE_QUEUE_SIZE):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.elapsed_seconds = 0.0
+
+    def run(self, items):
+        """Push items through every stage and return the final stage's results in input order.
+        Items whose handler raises, or returns None, are dropped from the results."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results = {}
+        results_lock = threading.Lock()
+        for stage in self.stages:
+            stage.reset()
+            stage._running = stage.workers
+
+        def work(index):
+            stage = self.stages[index]
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            finished = False
+            while not finished:
+                stage._observe_depth(inbox.qsize())
+                entry = inbox.get()
+                if entry is _END:
+                    break
+                entries = [entry]
+                # Batch stages take whatever else is already waiting, without holding up the first item
+                while stage.batch_size and len(entries) < stage.batch_size:
+                    try:
+                        entry = inbox.get_nowait()
+                    except queue.Empty:
+                        break
+                    if entry is _END:
+                        finished = True
+                        break
+                    entries.append(entry)
+
+                positions = [position for position, _ in entries]
+                started = time.perf_counter()
+                try:
+                    if stage.batch_size:
+                        outputs = stage.handler([item for _, item in entries])
+                    else:
+                        outputs = [stage.handler(entries[0][1])]
+                    failed = False
+                except Exception as e:
+                    print(f"❌ Pipeline stage '{stage.name}' failed: {e}")
+                    outputs = []
+                    failed = True
+                busy = time.perf_counter() - started
+
+                blocked = 0.0
+                for position, output in zip(positions, outputs):
+                    if output is None:
+                        continue
+                    if outbox is None:
+                        with results_lock:
+                            results[position] = output
+                    else:
+                        waited = time.perf_counter()
+                        outbox.put((position, output))
+                        blocked += time.perf_counter() - waited
+                stage._record(busy, blocked, failed, len(entries))
+
+            # The last worker out closes the next stage's input
+            with stage._lock:
+                stage._running -= 1
+                last = stage._running == 0
+            if last and outbox is not None:
+                for _ in range(self.stages[index + 1].workers):
+                    outbox.put(_END)
+
+        started = time.perf_counter()
+        threads = [
+            # Workers run in a copy of the caller's context so their LLM calls count towards its run
+            threading.Thread(
+                target=contextvars.copy_context().run, args=(work, index),
+                name=f"pipeline-{stage.name}-{worker}", daemon=True
+            )
+            for index, stage in enumerate(self.stages)
+            for worker in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        # Feeding blocks as soon as the first stage falls behind
+        for position, item in enumerate(items):
+            queues[0].put((position, item))
+        for _ in range(self.stages[0].workers):
+            queues[0].put(_END)
+
+        for thread in threads:
+            thread.join()
+        self.elapsed_seconds = time.perf_counter() - started
+        return [results[position] for position in sorted(results)]
+
+    def stats(self):
+        """Per-stage throughput, utilization and backpressure for the last run"""
+        elapsed = self.elapsed_seconds or 1e-9
+        stats = []
+        for stage in self.stages:
+            with stage._lock:
+                stats.append({
+                    'stage': stage.name,
+                    'workers': stage.workers,
+                    'processed': stage.processed,
+                    'failed': stage.failed,
+                    'items_per_second': round((stage.processed + stage.failed) / elapsed, 2),
+                    'utilization': round(stage.busy_seconds / (elapsed * stage.workers), 3),
+                    'avg_seconds': round(stage.busy_seconds / max(1, stage.processed + stage.failed), 4),
+                    'blocked_seconds': round(stage.blocked_seconds, 3),
+                    'max_queue_depth': stage.max_queue_depth
+                })
+        return stats
+
+    def bottleneck(self):
+        """Name of the busiest stage, the one limiting cohort throughput"""
+        stats = self.stats()
+        return max(stats, key=lambda stage: stage['utilization'])['stage'] if stats else None
+
+    def print_stats(self):
+        print(f"📊 Pipeline finished in {self.elapsed_seconds:.2f}s (bottleneck: {self.bottleneck()})")
+        for stage in self.stats():
+            print(f"   {stage['stage']:<11} x{stage['workers']:<2} {stage['processed']:>5} done {stage['failed']:>3} failed "
+                  f"{stage['items_per_second']:>8.2f}/s  busy {stage['utilization']:.0%}  "
+                  f"blocked {stage['blocked_seconds']:.2f}s  max queue {stage['max_queue_depth']}")
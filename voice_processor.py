@@ -1,37 +1,140 @@
 import requests
 from bs4 import BeautifulSoup
+import glob
+import hashlib
+import os
 import re
-from urllib.parse import urlparse, parse_qs
-from llm_manager import llm_manager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from analysis_memo import AnalysisMemo
+from audio_fetcher import AudioFetcher
+from audio_preprocessing import AudioPreprocessor
+from link_resolver import LinkResolver, drive_file_id
+from config import (
+    LLM_STRUCTURED_OUTPUT,
+    LLM_MAX_REPAIR_ATTEMPTS,
+    TRANSCRIPTION_ENGINE,
+    AUDIO_DIR,
+    AUDIO_FETCH_WORKERS,
+    AUDIO_PREPROCESS_ENABLED,
+    ANALYSIS_MEMO_ENABLED,
+    VOICE_PRESCREEN_ENABLED,
+    VOICE_FEATURES_IN_PROMPT
+)
+from llm_metrics import metrics
+from model_router import model_router
+from prompt_builder import PromptBuilder
+from transcription import TranscriptionPool
+from voice_features import TOPIC_KEYWORDS, describe_features, extract_features, rejection_reason
+from structured_output import (
+    SCORE_EXAMPLE,
+    SCORE_SCHEMA,
+    format_score_analysis,
+    parse_json_object,
+    validate_score,
+    validate_with_repairs
+)
+
+# Returned for links that name no recording; unlike other failed transcripts, retrying cannot help
+INVALID_LINK_TRANSCRIPT = "Error: Could not extract a recording ID from link. Please ensure the link is a valid Google Drive, YouTube or audio file link."
+
+# Instructions go first and never vary between students, so provider-side prefix caching applies;
+# the transcript is always appended last
+ANALYSIS_RUBRIC = """
+            Analyze the following audio transcript from a 1-minute student introduction and provide a score from 1-10 based on:
+            1. Clarity of communication (1-3 points)
+            2. Professional presentation (1-3 points)
+            3. Content relevance to AI/Data Science (1-2 points)
+            4. Enthusiasm and engagement (1-2 points)
+            
+            Delivery signals, when listed, were measured automatically from the recording and transcript.
+            Treat them as supporting evidence for clarity and engagement, not as a score on their own.
+            """
+
+ANALYSIS_TEXT_PREFIX = ANALYSIS_RUBRIC + """
+            Please provide:
+            1. A numerical score (1-10)
+            2. Brief feedback on strengths
+            3. Areas for improvement
+            4. Overall assessment
+            
+            Format your response as:
+            Score: [number]
+            Strengths: [text]
+            Improvements: [text]
+            Assessment: [text]
+            """
+
+ANALYSIS_JSON_PREFIX = ANALYSIS_RUBRIC + f"""
+            Return only a JSON object matching this format: {SCORE_EXAMPLE}
+            "score" must be an integer from 1 to 10; the other fields hold brief feedback on strengths,
+            areas for improvement and the overall assessment.
+            """
+
+HEURISTIC_KEYWORDS = TOPIC_KEYWORDS
+
+def heuristic_score(transcript):
+    """Rough 1-10 score from transcript length and topic coverage, used only while no LLM is reachable"""
+    text = transcript.lower()
+    word_count = len(re.findall(r"[a-z']+", text))
+    coverage = sum(1 for keyword in HEURISTIC_KEYWORDS if keyword in text)
+    
+    # A 1-minute introduction runs to roughly 120-180 words
+    if 100 <= word_count <= 220:
+        length_points = 3
+    elif 60 <= word_count <= 300:
+        length_points = 2
+    else:
+        length_points = 1
+    score = max(1, min(10, 2 + length_points + min(5, coverage // 2)))
+    
+    return {
+        'score': score,
+        'strengths': f"Covers {coverage} of {len(HEURISTIC_KEYWORDS)} expected topics in {word_count} words.",
+        'improvements': "Not assessed: scored offline from length and topic coverage only.",
+        'assessment': "Provisional score pending a full LLM review."
+    }
 
 class VoiceProcessor:
     def __init__(self):
-        self.llm = llm_manager.get_llm()
+        self.text_prompt_builder = PromptBuilder(ANALYSIS_TEXT_PREFIX)
+        self.score_prompt_builder = PromptBuilder(ANALYSIS_JSON_PREFIX)
+        self.transcription_pool = None
+        self.audio_fetcher = AudioFetcher()
+        self.audio_preprocessor = AudioPreprocessor() if AUDIO_PREPROCESS_ENABLED else None
+        self.link_resolver = LinkResolver(self.audio_fetcher)
+        self.analysis_memo = AnalysisMemo() if ANALYSIS_MEMO_ENABLED else None
+        self.audio_stats = {}
+    
+    @property
+    def rubric_version(self):
+        """Hash of everything that shapes a score: the prompt wording, response mode and scoring models.
+        Editing any of them invalidates every memoized analysis."""
+        prefix = self.score_prompt_builder.prefix if LLM_STRUCTURED_OUTPUT else self.text_prompt_builder.prefix
+        models = [model_router.model_for(task).model_id for task in ('voice_scoring', 'voice_escalation')]
+        fingerprint = '\n'.join([prefix, str(LLM_STRUCTURED_OUTPUT), str(VOICE_FEATURES_IN_PROMPT)] + models)
+        return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:12]
     
     def extract_file_id_from_drive_link(self, drive_link):
         """Extract file ID from Google Drive link (works for audio files)"""
         try:
-            # Handle different Google Drive link formats
-            if 'drive.google.com' in drive_link:
-                if '/file/d/' in drive_link:
-                    # Format: https://drive.google.com/file/d/FILE_ID/view
-                    file_id = drive_link.split('/file/d/')[1].split('/')[0]
-                elif 'id=' in drive_link:
-                    # Format: https://drive.google.com/open?id=FILE_ID
-                    file_id = parse_qs(urlparse(drive_link).query)['id'][0]
-                else:
-                    return None
-                return file_id
-            return None
+            return drive_file_id(drive_link)
         except Exception as e:
             print(f"Error extracting file ID: {e}")
             return None
     
+    def recording_key(self, link):
+        """Stable key of the recording behind a Drive, YouTube or direct audio link, or None"""
+        try:
+            return self.link_resolver.key_for(link)
+        except Exception as e:
+            print(f"Error resolving link: {e}")
+            return None
+    
     def get_audio_transcript_from_drive(self, drive_link):
-        """Get transcript from Google Drive audio file"""
+        """Get the transcript of a submission link: Google Drive, YouTube (captions first) or a direct audio URL"""
         try:
             # Check if this is a demo/mock link
-            if 'ABC123DEF456' in drive_link or 'GHI789JKL012' in drive_link or 'MNO345PQR678' in drive_link:
+            if self._is_demo_link(drive_link):
                 # Return realistic demo transcript
                 demo_transcripts = {
                     'ABC123DEF456': """Hello, my name is John Smith. I'm passionate about artificial intelligence and machine learning. I have 3 years of experience working with Python and data analysis. I've completed several projects involving neural networks and deep learning. I'm particularly interested in natural language processing and computer vision. My goal is to become an AI researcher and contribute to cutting-edge solutions that can solve real-world problems. I believe this bootcamp will provide me with the advanced skills I need to achieve my career objectives.""",
@@ -49,15 +152,63 @@ class VoiceProcessor:
                 # Default demo transcript
                 return "Hello, I'm excited to be part of this AI bootcamp. I have a strong background in programming and I'm passionate about machine learning and artificial intelligence."
             
-            # For real links, attempt actual processing
-            file_id = self.extract_file_id_from_drive_link(drive_link)
-            if not file_id:
-                return "Error: Could not extract file ID from link. Please ensure the link is a valid Google Drive audio link."
+            # For real links, resolve the host and the recording behind the link
+            key = self.recording_key(drive_link)
+            if not key:
+                return INVALID_LINK_TRANSCRIPT
             
-            # Simulate transcript generation for real links
-            # In production, replace this with actual transcription service
-            simulated_transcript = f"""
-            This is a simulated transcript for audio file ID: {file_id}
+            transcript = self._memoized_transcript(key)
+            if transcript is None:
+                transcript, audio_path = self.acquire_recording(drive_link, key)
+                if transcript is None:
+                    transcript = self.get_transcription_pool().transcribe(audio_path)
+                    self._memoize_transcript(key, transcript)
+            return transcript
+            
+        except Exception as e:
+            print(f"Error getting transcript: {e}")
+            return f"Error generating transcript: {str(e)}"
+    
+    def get_transcription_pool(self):
+        """Get the transcription process pool, started on first use"""
+        if self.transcription_pool is None:
+            self.transcription_pool = TranscriptionPool(TRANSCRIPTION_ENGINE)
+        return self.transcription_pool
+    
+    def get_audio_path(self, file_id, link=None):
+        """Path of a recording: a file in AUDIO_DIR named by its key, else downloaded by the link's provider.
+        Without a link the key is taken to be a Drive file ID."""
+        for path in sorted(glob.glob(os.path.join(AUDIO_DIR, f"{glob.escape(file_id)}.*"))):
+            if not path.endswith(('.txt', '.part')):
+                return path
+        if link is None:
+            return self.audio_fetcher.fetch(file_id)
+        return self.link_resolver.fetch_audio(link)
+    
+    def prepare_audio(self, file_id, link=None):
+        """Fetch a recording and preprocess it into trimmed 16 kHz mono speech, ready for the transcription workers"""
+        path = self.get_audio_path(file_id, link)
+        if self.audio_preprocessor:
+            path = self.audio_preprocessor.process(path)
+            self.audio_stats[file_id] = self.audio_preprocessor.stats(path)
+        return path
+    
+    def acquire_recording(self, link, key, preprocess=True):
+        """Existing captions when the host has them, else the recording ready for transcription.
+        Returns (transcript, audio_path) with exactly one of them set."""
+        captions = self.link_resolver.captions(link)
+        if captions:
+            self._memoize_transcript(key, captions)
+            return captions, None
+        if TRANSCRIPTION_ENGINE == 'simulated':
+            return self._simulated_transcript(key), None
+        return None, self.prepare_audio(key, link) if preprocess else self.get_audio_path(key, link)
+    
+    def _simulated_transcript(self, key):
+        # Simulate transcript generation for real links
+        # In production, replace this with actual transcription service
+        simulated_transcript = f"""
+            This is a simulated transcript for audio file ID: {key}
             
             [Student Introduction]
             Hello, my name is [Student Name] and I'm excited to be part of the AISB Onboarding Process.
@@ -71,87 +222,209 @@ class VoiceProcessor:
             [Closing]
             Thank you for considering my application. I look forward to the opportunity to work with AISB.
             """
+        
+        return simulated_transcript.strip()
+    
+    @property
+    def transcript_source(self):
+        """Engine plus preprocessing settings; stored transcripts are only reused when both match"""
+        if self.audio_preprocessor:
+            return f"{TRANSCRIPTION_ENGINE}:{self.audio_preprocessor.signature}"
+        return TRANSCRIPTION_ENGINE
+    
+    def get_audio_transcripts(self, audio_links):
+        """Transcribe many links at once: downloads run concurrently and each recording
+        goes to the transcription workers as soon as it is on disk"""
+        transcripts = {}
+        downloads = {}
+        futures = {}
+        with ThreadPoolExecutor(max_workers=AUDIO_FETCH_WORKERS) as fetch_executor:
+            for link in dict.fromkeys(audio_links):
+                key = self.recording_key(link) if not self._is_demo_link(link) else None
+                transcript = self._memoized_transcript(key) if key else None
+                if transcript is not None:
+                    transcripts[link] = transcript
+                elif key:
+                    downloads[fetch_executor.submit(self.acquire_recording, link, key)] = link
+                else:
+                    transcripts[link] = self.get_audio_transcript_from_drive(link)
             
-            return simulated_transcript.strip()
-            
+            for download in as_completed(downloads):
+                link = downloads[download]
+                try:
+                    transcript, audio_path = download.result()
+                    if transcript is not None:
+                        transcripts[link] = transcript
+                    else:
+                        futures[link] = self.get_transcription_pool().submit(audio_path)
+                except Exception as e:
+                    print(f"Error preparing audio: {e}")
+                    transcripts[link] = f"Error generating transcript: {str(e)}"
+        
+        for link, future in futures.items():
+            try:
+                transcripts[link] = future.result()
+                self._memoize_transcript(self.recording_key(link), transcripts[link])
+            except Exception as e:
+                print(f"Error getting transcript: {e}")
+                transcripts[link] = f"Error generating transcript: {str(e)}"
+        return transcripts
+    
+    def fetch_stage(self, job):
+        """Pipeline fetch: resolve the link and download the recording, unless stored, caption or simulated text will do"""
+        link = job['audio_link']
+        job.setdefault('transcript', None)
+        try:
+            key = self.recording_key(link) if not self._is_demo_link(link) else None
+            if not key:
+                job['transcript'] = self.get_audio_transcript_from_drive(link)
+                return job
+            job['key'] = key
+            job['transcript'] = self._memoized_transcript(key)
+            if job['transcript'] is None:
+                job['transcript'], job['audio_path'] = self.acquire_recording(link, key, preprocess=False)
         except Exception as e:
-            print(f"Error getting transcript: {e}")
-            return f"Error generating transcript: {str(e)}"
+            print(f"Error fetching audio: {e}")
+            job['transcript'] = f"Error generating transcript: {str(e)}"
+        return job
+    
+    def preprocess_stage(self, job):
+        """Pipeline preprocess: decode, trim and duration-gate the downloaded recording"""
+        if job['transcript'] is None and self.audio_preprocessor:
+            try:
+                job['audio_path'] = self.audio_preprocessor.process(job['audio_path'])
+                self.audio_stats[job['key']] = self.audio_preprocessor.stats(job['audio_path'])
+            except Exception as e:
+                print(f"Error preparing audio: {e}")
+                job['transcript'] = f"Error generating transcript: {str(e)}"
+        return job
+    
+    def transcribe_stage(self, job):
+        """Pipeline transcribe: run the recording on a transcription worker process"""
+        if job['transcript'] is None:
+            try:
+                job['transcript'] = self.get_transcription_pool().transcribe(job['audio_path'])
+                self._memoize_transcript(job['key'], job['transcript'])
+            except Exception as e:
+                print(f"Error getting transcript: {e}")
+                job['transcript'] = f"Error generating transcript: {str(e)}"
+        return job
+    
+    def features_stage(self, jobs):
+        """Pipeline features (batch stage): compute pre-scoring features for every queued transcript at once"""
+        features = self.compute_features([job['audio_link'] for job in jobs], [job['transcript'] for job in jobs])
+        for job, job_features in zip(jobs, features):
+            job['features'] = job_features
+        return jobs
+    
+    def score_stage(self, job):
+        """Pipeline score: analyze the transcript and return the submission result"""
+        return self.process_audio_submission(
+            job['student_name'], job['audio_link'], job['transcript'], job.get('features')
+        )
+    
+    def compute_features(self, audio_links, transcripts):
+        """Pre-scoring features for a batch of submissions, using the audio measurements where a recording was preprocessed"""
+        return extract_features(transcripts, [
+            self.audio_stats.get(self.recording_key(link)) for link in audio_links
+        ])
+    
+    def _memoized_transcript(self, file_id):
+        """Transcript stored for a recording by the current engine, or None"""
+        if not self.analysis_memo:
+            return None
+        transcript = self.analysis_memo.get_transcript(file_id, self.transcript_source)
+        if transcript is not None:
+            print(f"💾 Reusing stored transcript for {file_id}")
+        return transcript
+    
+    def _memoize_transcript(self, file_id, transcript):
+        if self.analysis_memo and transcript:
+            self.analysis_memo.put_transcript(file_id, self.transcript_source, transcript)
+    
+    def _is_demo_link(self, link):
+        return 'ABC123DEF456' in link or 'GHI789JKL012' in link or 'MNO345PQR678' in link
     
     def analyze_audio_content(self, transcript):
         """Analyze audio content using AI"""
         try:
-            prompt = f"""
-            Analyze the following audio transcript from a 1-minute student introduction and provide a score from 1-10 based on:
-            1. Clarity of communication (1-3 points)
-            2. Professional presentation (1-3 points)
-            3. Content relevance to AI/Data Science (1-2 points)
-            4. Enthusiasm and engagement (1-2 points)
-            
-            Transcript:
-            {transcript}
-            
-            Please provide:
-            1. A numerical score (1-10)
-            2. Brief feedback on strengths
-            3. Areas for improvement
-            4. Overall assessment
-            
-            Format your response as:
-            Score: [number]
-            Strengths: [text]
-            Improvements: [text]
-            Assessment: [text]
-            """
-            
-            # Use centralized LLM provider
-            from llm_provider import MODEL
+            if LLM_STRUCTURED_OUTPUT:
+                score_data = self.score_audio_content(transcript)
+                if not score_data:
+                    return "Error analyzing content: no valid score returned"
+                return format_score_analysis(score_data)
             
-            response = MODEL.generate_content(prompt)
-            return response.text
+            return self._generate_analysis(transcript)
             
         except Exception as e:
             print(f"Error analyzing audio content: {e}")
             return f"Error analyzing content: {str(e)}"
     
+    def _generate_analysis(self, transcript, model=None, tag='VoiceProcessor.analyze_audio_content', signals=None):
+        """Request the plain-text analysis; LLM errors propagate to the caller"""
+        model = model or model_router.model_for('voice_scoring')
+        prompt = self.text_prompt_builder.build(transcript, tag=tag, context=signals)
+        
+        response = model.generate_content(prompt, tag=tag)
+        return response.text
+    
+    def _build_score_prompt(self, transcript, tag='VoiceProcessor.analyze_audio_content', signals=None):
+        """Build the scoring prompt for the structured JSON response mode"""
+        return self.score_prompt_builder.build(transcript, tag=tag, context=signals)
+    
+    def score_audio_content(self, transcript, model=None, tag='VoiceProcessor.analyze_audio_content', signals=None):
+        """Score a transcript as a validated score object, or None if no valid score was returned.
+        LLM errors (including an open circuit) propagate so callers can fall back."""
+        model = model or model_router.model_for('voice_scoring')
+        prompt = self._build_score_prompt(transcript, tag, signals)
+        
+        response = model.generate_json(prompt, 'voice_score', SCORE_SCHEMA, tag=tag)
+        [score_data] = validate_with_repairs(
+            model,
+            [parse_json_object(response.text)],
+            validate_score,
+            'score',
+            SCORE_EXAMPLE,
+            SCORE_SCHEMA,
+            LLM_MAX_REPAIR_ATTEMPTS,
+            context=prompt,
+            tag=tag
+        )
+        return score_data
+    
+    def _find_score(self, analysis_text):
+        """Score stated in a text analysis, or None when there is none"""
+        # Look for "Score: [number]" pattern; other numbers in the text (such as "1-minute") are not scores
+        score_match = re.search(r'Score:\s*\**\s*(\d+)', analysis_text)
+        return int(score_match.group(1)) if score_match else None
+    
     def extract_score_from_analysis(self, analysis_text):
         """Extract numerical score from analysis text"""
         try:
-            # Look for "Score: [number]" pattern
-            score_match = re.search(r'Score:\s*(\d+)', analysis_text)
-            if score_match:
-                return int(score_match.group(1))
+            # Structured analyses carry the score as a JSON field
+            score_data, errors = validate_score(parse_json_object(analysis_text))
+            if not errors:
+                return score_data['score']
             
-            # Fallback: look for any number in the text
-            numbers = re.findall(r'\d+', analysis_text)
-            if numbers:
-                return int(numbers[0])
+            score = self._find_score(analysis_text)
+            if score is not None:
+                return score
             
-            return 5  # Default score if no number found
+            print("⚠️ No score found in analysis, using default score")
+            return 5  # Default score if no score found
             
         except Exception as e:
             print(f"Error extracting score: {e}")
             return 5
     
-    def process_audio_submission(self, student_name, audio_link):
+    def process_audio_submission(self, student_name, audio_link, transcript=None, features=None):
         """Process an audio submission and return analysis results"""
         try:
-            # Get transcript
-            transcript = self.get_audio_transcript_from_drive(audio_link)
-            
-            # Analyze content
-            analysis = self.analyze_audio_content(transcript)
+            # Get transcript, unless it was already transcribed as part of a batch
+            if transcript is None:
+                transcript = self.get_audio_transcript_from_drive(audio_link)
             
-            # Extract score
-            score = self.extract_score_from_analysis(analysis)
-            
-            return {
-                'student_name': student_name,
-                'audio_link': audio_link,
-                'transcript': transcript,
-                'analysis': analysis,
-                'score': score
-            }
+            return self.score_transcript(student_name, audio_link, transcript, features)
             
         except Exception as e:
             print(f"Error processing audio submission: {e}")
@@ -162,3 +435,137 @@ class VoiceProcessor:
                 'analysis': f"Error: {str(e)}",
                 'score': 0
             }
+    
+    def _score_with(self, model, transcript, tag, signals=None):
+        """Score a transcript with one model, returning (score or None, analysis text)"""
+        if LLM_STRUCTURED_OUTPUT:
+            # Score straight from the validated JSON object
+            score_data = self.score_audio_content(transcript, model, tag, signals)
+            if not score_data:
+                return None, "Error: no valid score returned after re-asks"
+            return score_data['score'], format_score_analysis(score_data)
+        
+        analysis = self._generate_analysis(transcript, model, tag, signals)
+        return self._find_score(analysis), analysis
+    
+    def score_transcript(self, student_name, audio_link, transcript, features=None):
+        """Score a transcript with the cheap scoring model, escalating borderline or invalid results,
+        and fall back to the local heuristic when no LLM is reachable"""
+        if features is None and (VOICE_PRESCREEN_ENABLED or VOICE_FEATURES_IN_PROMPT):
+            [features] = self.compute_features([audio_link], [transcript])
+        
+        if VOICE_PRESCREEN_ENABLED and transcript.startswith('Error') and transcript != INVALID_LINK_TRANSCRIPT:
+            # The recording could not be fetched or transcribed this time: hold a provisional score
+            # and fetch it again later instead of failing the student for a download error
+            print(f"⏳ Could not transcribe {student_name}'s recording yet, holding a provisional score")
+            return {
+                'student_name': student_name,
+                'audio_link': audio_link,
+                'transcript': transcript,
+                'analysis': format_score_analysis({
+                    'score': 1,
+                    'strengths': "None assessed.",
+                    'improvements': "None assessed.",
+                    'assessment': f"Provisional: the recording could not be transcribed yet ({transcript}); it will be retried."
+                }),
+                'score': 1,
+                'scored_by': 'prescreen',
+                'needs_rescore': True
+            }
+        
+        reason = rejection_reason(features) if VOICE_PRESCREEN_ENABLED else None
+        if reason:
+            # Nothing an LLM could score; fail it here and save the call
+            print(f"⏭️ Rejected {student_name} without an LLM review: {reason}")
+            return {
+                'student_name': student_name,
+                'audio_link': audio_link,
+                'transcript': transcript,
+                'analysis': format_score_analysis({
+                    'score': 1,
+                    'strengths': "None assessed.",
+                    'improvements': f"Submit a clear spoken introduction of about one minute; {reason}.",
+                    'assessment': f"Rejected before review: {reason}."
+                }),
+                'score': 1,
+                'scored_by': 'prescreen',
+                'needs_rescore': False
+            }
+        signals = describe_features(features) if VOICE_FEATURES_IN_PROMPT and features else None
+        
+        memo_key = self.recording_key(audio_link) or audio_link
+        memoizable = self.analysis_memo is not None and not transcript.startswith('Error')
+        if memoizable:
+            rubric_version = self.rubric_version
+            cached = self.analysis_memo.get_analysis(memo_key, transcript, rubric_version)
+            if cached:
+                metrics.record_cache_hit('VoiceProcessor.analyze_audio_content', cached['scored_by'])
+                print(f"💾 Reusing stored analysis for {student_name}")
+                return {
+                    'student_name': student_name,
+                    'audio_link': audio_link,
+                    'transcript': transcript,
+                    'analysis': cached['analysis'],
+                    'score': cached['score'],
+                    'scored_by': cached['scored_by'],
+                    'needs_rescore': False
+                }
+        
+        needs_rescore = False
+        try:
+            model = model_router.model_for('voice_scoring')
+            score, analysis = self._score_with(model, transcript, 'VoiceProcessor.analyze_audio_content', signals)
+            
+            if model_router.should_escalate(score):
+                # Only decisions near the pass mark (or failed first passes) pay for the stronger model
+                escalation_model = model_router.model_for('voice_escalation')
+                print(f"⬆️ Escalating {student_name} from {model.model_id} (score {score}) to {escalation_model.model_id}")
+                try:
+                    escalated_score, escalated_analysis = self._score_with(
+                        escalation_model, transcript, 'VoiceProcessor.escalate_score', signals
+                    )
+                    if escalated_score is not None:
+                        model, score, analysis = escalation_model, escalated_score, escalated_analysis
+                except Exception as e:
+                    print(f"⚠️ Escalation failed for {student_name} ({e}), keeping the first-pass result")
+            
+            scored_by = model.fallback_model_id if model.used_fallback else model.model_id
+            if score is None and LLM_STRUCTURED_OUTPUT:
+                # No valid score even after the re-asks: a 0 would silently fail the student,
+                # so score locally and re-score later like an outage
+                print(f"⚠️ No valid LLM score for {student_name}, using the local heuristic score")
+                score_data = heuristic_score(transcript)
+                analysis = f"[Provisional: local heuristic score]\n{format_score_analysis(score_data)}"
+                score = score_data['score']
+                scored_by = 'heuristic'
+                needs_rescore = True
+            elif score is None:
+                # Text analyses without a score keep the default score
+                score = self.extract_score_from_analysis(analysis)
+            
+            if model.used_fallback and scored_by != 'heuristic':
+                needs_rescore = True
+                analysis = f"[Provisional: scored by fallback model {scored_by}]\n{analysis}"
+            
+        except Exception as e:
+            # An outage must not turn into a silent 0; score locally and re-score once the LLM is back
+            print(f"⚠️ LLM scoring unavailable for {student_name} ({e}), using the local heuristic score")
+            score_data = heuristic_score(transcript)
+            analysis = f"[Provisional: local heuristic score]\n{format_score_analysis(score_data)}"
+            score = score_data['score']
+            scored_by = 'heuristic'
+            needs_rescore = True
+        
+        # Provisional and failed analyses are never stored, so they are redone next time
+        if memoizable and not needs_rescore and not analysis.startswith('Error'):
+            self.analysis_memo.put_analysis(memo_key, transcript, rubric_version, analysis, score, scored_by)
+        
+        return {
+            'student_name': student_name,
+            'audio_link': audio_link,
+            'transcript': transcript,
+            'analysis': analysis,
+            'score': score,
+            'scored_by': scored_by,
+            'needs_rescore': needs_rescore
+        }